@@ -1,7 +1,8 @@
 # adaptive_optimizer.py - Sistema de optimización adaptativa
 import logging
-import sqlite3
 from datetime import datetime, timedelta
+from db_manager import db_manager
+from performance_tracker import epoch_cutoff
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,7 @@ class AdaptiveOptimizer:
     def get_recent_performance(self, hours=24):
         """Obtiene rendimiento de las últimas X horas"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = db_manager.get_connection(self.db_path)
             cursor = conn.cursor()
             
             # Obtener señales de las últimas X horas
@@ -37,12 +38,12 @@ class AdaptiveOptimizer:
                     AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
                     AVG(time_to_resolution) as avg_time
                 FROM signals 
-                WHERE datetime(timestamp) > datetime('now', '-{} hours')
+                WHERE ts > ?
                 AND result IS NOT NULL
-            '''.format(hours))
+            ''', (epoch_cutoff(hours=hours),))
             
             stats = cursor.fetchone()
-            conn.close()
+            cursor.close()
             
             if stats[0] == 0:  # No hay datos
                 return None
@@ -116,6 +117,19 @@ class AdaptiveOptimizer:
             'timestamp': datetime.now().isoformat()
         }
     
+    def get_backtest_recommendations(self, paths, method="random", n_iter=30, **kwargs):
+        """Recomendaciones validadas con un barrido de parámetros sobre velas históricas"""
+        # Import diferido: el backtester importa trading_logic, que importa este módulo
+        from parameter_optimizer import run_parameter_sweep
+
+        report = run_parameter_sweep(paths, method=method, n_iter=n_iter, **kwargs)
+        return {
+            'performance': report['baseline'],
+            'recommendations': report['recommendations'],
+            'timestamp': report['timestamp'],
+            'report': report
+        }
+
     def log_optimization_analysis(self):
         """Registra análisis de optimización en logs"""
         analysis = self.get_optimization_recommendations()
@@ -1,10 +1,15 @@
 # analytics_dashboard.py - Dashboard de análisis de rendimiento
 from flask import jsonify
 import sqlite3
+import logging
 from datetime import datetime, timedelta
 
 import json
 
+from page_templates import PageTemplate
+
+logger = logging.getLogger(__name__)
+
 def safe_float(value, default=0):
     """Convierte un valor a float de forma segura"""
     try:
@@ -19,8 +24,42 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
     total_signals = performance_stats.get('total_signals', 0)
     win_rate = safe_float(performance_stats.get('win_rate', 0))
     avg_return = safe_float(performance_stats.get('avg_return', 0))
-    
-    return f"""
+    net_profit = safe_float(performance_stats.get('net_profit', 0))
+
+    return ANALYTICS_TEMPLATE.render(
+        total_signals=total_signals,
+        wins=performance_stats.get('wins', 0),
+        losses=performance_stats.get('losses', 0),
+        expired=performance_stats.get('expired', 0),
+        pending=performance_stats.get('pending', 0),
+        win_rate=win_rate,
+        win_rate_class='win-rate' if win_rate >= 60 else 'neutral' if win_rate >= 50 else 'loss-rate',
+        win_rate_label='🎯 Excelente' if win_rate >= 70 else '✅ Bueno' if win_rate >= 60 else '⚠️ Mejorable' if win_rate >= 50 else '❌ Revisar',
+        avg_return=avg_return,
+        avg_return_class='win-rate' if avg_return > 0 else 'loss-rate',
+        best_return=safe_float(performance_stats.get('best_return', 0)),
+        worst_return=safe_float(performance_stats.get('worst_return', 0)),
+        net_profit=net_profit,
+        net_profit_class='win-rate' if net_profit > 0 else 'loss-rate',
+        total_profit=safe_float(performance_stats.get('total_profit', 0)),
+        total_loss=safe_float(performance_stats.get('total_loss', 0)),
+        avg_score=safe_float(performance_stats.get('avg_score', 0)),
+        avg_time_minutes=safe_float(performance_stats.get('avg_time_minutes', 0)),
+        score_breakdown=generate_score_breakdown(performance_stats.get('score_breakdown', [])),
+        trend_breakdown=generate_trend_breakdown(performance_stats.get('trend_breakdown', [])),
+        score_by_trend_breakdown=generate_score_by_trend_breakdown(performance_stats.get('score_by_trend_breakdown', [])),
+        symbol_breakdown=generate_symbol_breakdown(performance_stats.get('symbol_breakdown', []), performance_stats.get('symbol_streaks', {})),
+        hourly_breakdown=generate_hourly_breakdown(performance_stats.get('hourly_breakdown', [])),
+        volatility_breakdown=generate_volatility_breakdown(performance_stats.get('volatility_breakdown', [])),
+        streak_analysis=generate_streak_analysis(performance_stats.get('streak_analysis', {})),
+        system_avg_time=performance_stats.get('avg_time_minutes', 0),
+        updated_at=datetime.now().strftime('%H:%M:%S'),
+        reliability='🎯 Alta' if win_rate >= 60 else '⚠️ Media' if win_rate >= 50 else '❌ Baja',
+        signals_table=generate_signals_table(recent_signals)
+    )
+
+# Página completa compilada al importar el módulo; por petición solo se rellenan los campos
+ANALYTICS_TEMPLATE = PageTemplate("""
     <!DOCTYPE html>
     <html lang="es">
     <head>
@@ -360,31 +399,31 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                 <div class="stat-card" title="📊 Total de señales generadas por el algoritmo de trading. Incluye todas las señales BUY/SELL procesadas desde el inicio del sistema.">
                     <div class="stat-value win-rate">{total_signals}</div>
                     <div class="stat-label">Total Señales</div>
-                    <div class="stat-trend">✅ {performance_stats.get('wins', 0)} wins • ❌ {performance_stats.get('losses', 0)} losses • ⏰ {performance_stats.get('expired', 0)} expired • 🔄 {performance_stats.get('pending', 0)} pending</div>
+                    <div class="stat-trend">✅ {wins} wins • ❌ {losses} losses • ⏰ {expired} expired • 🔄 {pending} pending</div>
                 </div>
 
                 <div class="stat-card" title="📈 Porcentaje de señales exitosas (WIN) vs total de señales completadas. Se calcula como: (Señales WIN / Señales Completadas) × 100. No incluye señales pendientes.">
-                    <div class="stat-value {'win-rate' if win_rate >= 60 else 'neutral' if win_rate >= 50 else 'loss-rate'}">{win_rate:.1f}%</div>
+                    <div class="stat-value {win_rate_class}">{win_rate:.1f}%</div>
                     <div class="stat-label">Win Rate</div>
-                    <div class="stat-trend">{'🎯 Excelente' if win_rate >= 70 else '✅ Bueno' if win_rate >= 60 else '⚠️ Mejorable' if win_rate >= 50 else '❌ Revisar'}</div>
+                    <div class="stat-trend">{win_rate_label}</div>
                 </div>
 
                 <div class="stat-card" title="💰 Retorno promedio de todas las señales completadas. Se calcula como: Suma de todos los retornos / Número de señales completadas. Incluye tanto ganancias como pérdidas.">
-                    <div class="stat-value {'win-rate' if avg_return > 0 else 'loss-rate'}">{avg_return:+.2f}%</div>
+                    <div class="stat-value {avg_return_class}">{avg_return:+.2f}%</div>
                     <div class="stat-label">Retorno Promedio</div>
-                    <div class="stat-trend">💰 Mejor: {safe_float(performance_stats.get('best_return', 0)):+.2f}% • 📉 Peor: {safe_float(performance_stats.get('worst_return', 0)):+.2f}%</div>
+                    <div class="stat-trend">💰 Mejor: {best_return:+.2f}% • 📉 Peor: {worst_return:+.2f}%</div>
                 </div>
 
                 <div class="stat-card">
-                    <div class="stat-value {'win-rate' if safe_float(performance_stats.get('net_profit', 0)) > 0 else 'loss-rate'}">{safe_float(performance_stats.get('net_profit', 0)):+.2f}%</div>
+                    <div class="stat-value {net_profit_class}">{net_profit:+.2f}%</div>
                     <div class="stat-label">Profit Neto</div>
-                    <div class="stat-trend">📈 Total: {safe_float(performance_stats.get('total_profit', 0)):+.2f}% • 📉 Pérdidas: {safe_float(performance_stats.get('total_loss', 0)):+.2f}%</div>
+                    <div class="stat-trend">📈 Total: {total_profit:+.2f}% • 📉 Pérdidas: {total_loss:+.2f}%</div>
                 </div>
 
                 <div class="stat-card" title="🎯 Score promedio del SISTEMA PROFESIONAL. Evalúa: Momentum Multi-timeframe (35%), Volumen Inteligente (30%), Price Action (25%), Volatilidad Controlada (10%). Solo señales ≥80 envían emails y se analizan aquí.">
-                    <div class="stat-value neutral">{safe_float(performance_stats.get('avg_score', 0)):.0f}/100</div>
+                    <div class="stat-value neutral">{avg_score:.0f}/100</div>
                     <div class="stat-label">Score Promedio (Sistema Profesional)</div>
-                    <div class="stat-trend">⏱️ Tiempo medio: {safe_float(performance_stats.get('avg_time_minutes', 0)):.0f} min • 📧 Solo Score ≥90</div>
+                    <div class="stat-trend">⏱️ Tiempo medio: {avg_time_minutes:.0f} min • 📧 Solo Score ≥90</div>
                 </div>
             </div>
             
@@ -392,14 +431,14 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                 <div class="chart-card">
                     <div class="chart-title">📈 Rendimiento por Score</div>
                     <div class="score-breakdown">
-                        {generate_score_breakdown(performance_stats.get('score_breakdown', []))}
+                        {score_breakdown}
                     </div>
                 </div>
 
                 <div class="chart-card">
                     <div class="chart-title">🌊 Análisis por Tendencia de Mercado</div>
                     <div class="score-breakdown">
-                        {generate_trend_breakdown(performance_stats.get('trend_breakdown', []))}
+                        {trend_breakdown}
                     </div>
                 </div>
             </div>
@@ -408,14 +447,14 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                 <div class="chart-card">
                     <div class="chart-title">🎯 Score por Contexto de Mercado</div>
                     <div class="score-breakdown">
-                        {generate_score_by_trend_breakdown(performance_stats.get('score_by_trend_breakdown', []))}
+                        {score_by_trend_breakdown}
                     </div>
                 </div>
 
                 <div class="chart-card">
                     <div class="chart-title">💰 Análisis por Símbolo</div>
                     <div class="score-breakdown">
-                        {generate_symbol_breakdown(performance_stats.get('symbol_breakdown', []), performance_stats.get('symbol_streaks', {}))}
+                        {symbol_breakdown}
                     </div>
                 </div>
             </div>
@@ -424,14 +463,14 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                 <div class="chart-card">
                     <div class="chart-title">🕐 Mejores Horarios</div>
                     <div class="score-breakdown">
-                        {generate_hourly_breakdown(performance_stats.get('hourly_breakdown', []))}
+                        {hourly_breakdown}
                     </div>
                 </div>
 
                 <div class="chart-card">
                     <div class="chart-title">📊 Análisis de Volatilidad</div>
                     <div class="score-breakdown">
-                        {generate_volatility_breakdown(performance_stats.get('volatility_breakdown', []))}
+                        {volatility_breakdown}
                     </div>
                 </div>
             </div>
@@ -440,7 +479,7 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                 <div class="chart-card">
                     <div class="chart-title">🔥 Análisis de Rachas</div>
                     <div class="score-breakdown">
-                        {generate_streak_analysis(performance_stats.get('streak_analysis', {}))}
+                        {streak_analysis}
                     </div>
                 </div>
 
@@ -450,7 +489,7 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                     <div class="chart-title">⏱️ Métricas de Sistema</div>
                     <div class="score-item" title="Tiempo promedio que tardan las señales en resolverse (WIN/LOSS) o expirar">
                         <span class="score-range">Tiempo Promedio TP/SL</span>
-                        <span class="score-stats">{performance_stats.get('avg_time_minutes', 0):.0f} minutos</span>
+                        <span class="score-stats">{system_avg_time:.0f} minutos</span>
                     </div>
                     <div class="score-item" title="Total de señales generadas en las últimas 24 horas">
                         <span class="score-range">Señales Últimas 24h</span>
@@ -458,11 +497,11 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                     </div>
                     <div class="score-item" title="Hora de la última actualización de datos del sistema">
                         <span class="score-range">Última Actualización</span>
-                        <span class="score-stats">{datetime.now().strftime('%H:%M:%S')}</span>
+                        <span class="score-stats">{updated_at}</span>
                     </div>
                     <div class="score-item" title="Evaluación de la fiabilidad del sistema basada en el win rate actual">
                         <span class="score-range">Fiabilidad Sistema</span>
-                        <span class="score-stats">{'🎯 Alta' if win_rate >= 60 else '⚠️ Media' if win_rate >= 50 else '❌ Baja'}</span>
+                        <span class="score-stats">{reliability}</span>
                     </div>
                     <div class="score-item" title="Configuración actual del filtro de emails (solo señales ultra-premium)">
                         <span class="score-range">Filtro Email</span>
@@ -546,7 +585,7 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
                         </tr>
                     </thead>
                     <tbody id="signalsTableBody">
-                        {generate_signals_table(recent_signals)}
+                        {signals_table}
                     </tbody>
                     </table>
                 </div>
@@ -555,7 +594,7 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
         
         <script>
             let refreshCountdown = 30;
-            let lastSignalCount = {performance_stats.get('total_signals', 0)};
+            let lastSignalCount = {total_signals};
 
             // Función para actualizar timestamp
             function updateTimestamp() {{
@@ -791,19 +830,19 @@ def generate_analytics_dashboard(performance_stats, recent_signals, market_trend
 
     </body>
     </html>
-    """
+    """)
 
 def generate_score_breakdown(score_breakdown):
     """Genera el desglose de rendimiento por score"""
     if not score_breakdown:
         return "<div class='score-item'><span>No hay datos suficientes</span></div>"
 
-    html = ""
+    html = []
     for item in score_breakdown:
         win_rate = safe_float(item.get('win_rate', 0))
         color_class = 'win-rate' if win_rate >= 60 else 'neutral' if win_rate >= 50 else 'loss-rate'
 
-        html += f"""
+        html.append(f"""
         <div class="score-item">
             <span class="score-range">{item.get('range', 'N/A')}</span>
             <div class="score-stats">
@@ -813,15 +852,15 @@ def generate_score_breakdown(score_breakdown):
                 <span>📈 {safe_float(item.get('best_return', 0)):+.1f}%</span>
             </div>
         </div>
-        """
-    return html
+        """)
+    return "".join(html)
 
 def generate_symbol_breakdown(symbol_breakdown, symbol_streaks=None):
     """Genera el desglose de rendimiento por símbolo con wins/losses/pending/expired claros y rachas"""
     if not symbol_breakdown:
         return "<div class='score-item'><span>No hay datos suficientes</span></div>"
 
-    html = ""
+    html = []
     for item in symbol_breakdown:
         win_rate = safe_float(item.get('win_rate', 0))
         total_signals = item.get('count', 0)
@@ -840,7 +879,7 @@ def generate_symbol_breakdown(symbol_breakdown, symbol_streaks=None):
         # Emoji por símbolo
         emoji = {"BTCUSDT": "₿", "ETHUSDT": "Ξ", "SOLUSDT": "◎"}.get(item.get('symbol', ''), "💰")
 
-        html += f"""
+        html.append(f"""
         <div class="symbol-breakdown-item">
             <div class="symbol-header">
                 <span class="symbol-name">{emoji} {item.get('symbol', 'N/A')}</span>
@@ -873,8 +912,8 @@ def generate_symbol_breakdown(symbol_breakdown, symbol_streaks=None):
                 </div>
             </div>
         </div>
-        """
-    return html
+        """)
+    return "".join(html)
 
 def generate_hourly_breakdown(hourly_breakdown):
     """Genera el desglose de rendimiento por horario"""
@@ -884,12 +923,12 @@ def generate_hourly_breakdown(hourly_breakdown):
     # Ordenar por win rate
     sorted_hours = sorted(hourly_breakdown, key=lambda x: x.get('win_rate', 0), reverse=True)[:8]
 
-    html = ""
+    html = []
     for item in sorted_hours:
         win_rate = safe_float(item.get('win_rate', 0))
         color_class = 'win-rate' if win_rate >= 60 else 'neutral' if win_rate >= 50 else 'loss-rate'
 
-        html += f"""
+        html.append(f"""
         <div class="score-item">
             <span class="score-range">🕐 {item.get('hour', 'N/A')}</span>
             <div class="score-stats">
@@ -898,21 +937,21 @@ def generate_hourly_breakdown(hourly_breakdown):
                 <span>{safe_float(item.get('avg_return', 0)):+.2f}%</span>
             </div>
         </div>
-        """
-    return html
+        """)
+    return "".join(html)
 
 def generate_signals_table(recent_signals):
     """Genera la tabla de señales recientes"""
     if not recent_signals:
         return "<tr><td colspan='8' style='text-align: center; color: #94a3b8;'>No hay señales recientes</td></tr>"
 
-    html = ""
+    html = []
     for signal in recent_signals[:20]:  # Últimas 20 señales
         # Mapear resultado a texto legible - SINCRONIZADO CON CARDS
         result_raw = signal.get('result')
 
         # Debug: mostrar el valor real
-        print(f"DEBUG: signal {signal.get('id')} result_raw = '{result_raw}' (type: {type(result_raw)})")
+        logger.debug(f"signal {signal.get('id')} result_raw = '{result_raw}' (type: {type(result_raw)})")
 
         if result_raw in ['WIN', 'WIN_TP', 'WIN_TIME'] or result_raw == 1:
             if 'TP' in str(result_raw):
@@ -1028,7 +1067,7 @@ def generate_signals_table(recent_signals):
             tp_sl_dollars = "N/A"
             tp_sl_percent = "N/A"
 
-        html += f"""
+        html.append(f"""
         <tr>
             <td>{signal.get('timestamp', '')[:16]}</td>
             <td>{signal.get('symbol', '')}</td>
@@ -1041,8 +1080,8 @@ def generate_signals_table(recent_signals):
             <td class="{status_class}">{actual_return:+.2f}%</td>
             <td>{int(time_resolution)} min</td>
         </tr>
-        """
-    return html
+        """)
+    return "".join(html)
 
 def get_analytics_data():
     """Obtiene datos para el dashboard de analytics"""
@@ -1082,7 +1121,7 @@ def generate_volatility_breakdown(volatility_analysis):
     if not volatility_analysis:
         return "<div class='score-item'><span>No hay datos de volatilidad</span></div>"
 
-    html = ""
+    html = []
     for item in volatility_analysis:
         emoji = {"BTCUSDT": "₿", "ETHUSDT": "Ξ", "SOLUSDT": "◎"}.get(item['symbol'], "💰")
 
@@ -1102,7 +1141,7 @@ def generate_volatility_breakdown(volatility_analysis):
         else:
             volatility_level = "📊 Baja"
 
-        html += f"""
+        html.append(f"""
         <div class="score-item">
             <span class="score-range">{emoji} {item['symbol']}</span>
             <div class="score-stats">
@@ -1112,8 +1151,8 @@ def generate_volatility_breakdown(volatility_analysis):
                 <span>{item.get('count', 0)} señales</span>
             </div>
         </div>
-        """
-    return html
+        """)
+    return "".join(html)
 
 def generate_streak_analysis(streak_analysis):
     """Genera el análisis de rachas"""
@@ -1174,7 +1213,7 @@ def generate_trend_breakdown(trend_breakdown):
             trends[trend] = {'BUY': None, 'SELL': None}
         trends[trend][item.get('signal_type', 'BUY')] = item
 
-    html = ""
+    html = []
     trend_emojis = {
         'BULLISH': '📈',
         'BEARISH': '📉',
@@ -1184,11 +1223,11 @@ def generate_trend_breakdown(trend_breakdown):
     for trend, signals in trends.items():
         emoji = trend_emojis.get(trend, '❓')
 
-        html += f"""
+        html.append(f"""
         <div class="score-item trend-header">
             <span class="score-range">{emoji} {trend}</span>
         </div>
-        """
+        """)
 
         for signal_type, data in signals.items():
             if data:
@@ -1196,7 +1235,7 @@ def generate_trend_breakdown(trend_breakdown):
                 color_class = 'win-rate' if win_rate >= 60 else 'neutral' if win_rate >= 50 else 'loss-rate'
                 signal_emoji = '🟢' if signal_type == 'BUY' else '🔴'
 
-                html += f"""
+                html.append(f"""
                 <div class="score-item trend-signal">
                     <span class="score-range">  {signal_emoji} {signal_type}</span>
                     <div class="score-stats">
@@ -1206,9 +1245,9 @@ def generate_trend_breakdown(trend_breakdown):
                         <span>🎯 {safe_float(data.get('avg_score', 0)):.0f}/100</span>
                     </div>
                 </div>
-                """
+                """)
 
-    return html
+    return "".join(html)
 
 def generate_score_by_trend_breakdown(score_by_trend_breakdown):
     """Genera el desglose de score por tendencia de mercado"""
@@ -1225,7 +1264,7 @@ def generate_score_by_trend_breakdown(score_by_trend_breakdown):
             trends[trend] = {}
         trends[trend][score_range] = item
 
-    html = ""
+    html = []
     trend_emojis = {
         'BULLISH': '📈',
         'BEARISH': '📉',
@@ -1242,11 +1281,11 @@ def generate_score_by_trend_breakdown(score_by_trend_breakdown):
     for trend, scores in trends.items():
         emoji = trend_emojis.get(trend, '❓')
 
-        html += f"""
+        html.append(f"""
         <div class="score-item trend-header">
             <span class="score-range">{emoji} {trend}</span>
         </div>
-        """
+        """)
 
         for score_range, data in scores.items():
             if data:
@@ -1254,7 +1293,7 @@ def generate_score_by_trend_breakdown(score_by_trend_breakdown):
                 color_class = 'win-rate' if win_rate >= 60 else 'neutral' if win_rate >= 50 else 'loss-rate'
                 score_emoji = score_emojis.get(score_range, '❓')
 
-                html += f"""
+                html.append(f"""
                 <div class="score-item trend-signal">
                     <span class="score-range">  {score_emoji} {score_range}</span>
                     <div class="score-stats">
@@ -1264,9 +1303,9 @@ def generate_score_by_trend_breakdown(score_by_trend_breakdown):
                         <span>📊 {safe_float(data.get('avg_score', 0)):.0f}/100</span>
                     </div>
                 </div>
-                """
+                """)
 
-    return html
+    return "".join(html)
 
 def generate_streak_info_for_symbol(symbol, symbol_streaks):
     """Genera información de racha para un símbolo específico"""
@@ -3,17 +3,24 @@ import os
 import time
 import threading
 from datetime import datetime
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
 # Importar módulos propios
 from log_manager import get_logger, get_logs_html_response, get_logs_json_response, rotate_logs
-from market_analyzer import analyze_market, get_market_data
+from market_analyzer import analyze_market, get_market_data, market_analyzer
+from market_stream import start_market_stream, is_market_stream_alive
 from trading_logic import analyze_trading_signals, get_trading_stats
 from dashboard import generate_dashboard_html
 from analytics_dashboard import generate_analytics_dashboard
 from instructions_dashboard import generate_instructions_dashboard
-from email_service import initialize_email_service, test_email_connection
-from config import validate_config, SYMBOLS, PORT
+from email_service import initialize_email_service, test_email_connection, get_email_stats
+from notifier import get_notifier_stats
+from binance_api import get_binance_stats
+from config import Config, validate_config, SYMBOLS, PORT
+from db_manager import db_manager
+from response_cache import cached_response, invalidate_responses, SIGNALS, MARKET, STATUS
+from version_info import get_version_string
+from live_feed import live_feed, TOPICS
 
 # Configurar logger
 logger = get_logger()
@@ -28,7 +35,8 @@ EMAIL_TO = os.getenv("EMAIL_TO")
 
 # Inicializar servicio de email
 if EMAIL_FROM and EMAIL_PASSWORD and EMAIL_TO:
-    initialize_email_service(EMAIL_FROM, EMAIL_PASSWORD, EMAIL_TO)
+    initialize_email_service(EMAIL_FROM, EMAIL_PASSWORD, EMAIL_TO, smtp_server=Config.SMTP_SERVER,
+                             smtp_port=Config.SMTP_PORT, security=Config.SMTP_SECURITY, timeout=Config.SMTP_TIMEOUT)
     logger.info("✅ Servicio de email inicializado")
 else:
     logger.warning("⚠️ Servicio de email no inicializado - faltan variables de entorno")
@@ -46,11 +54,21 @@ logger.info(f"📧 Email: {'✅' if validate_config() else '❌'}")
 
 # === FUNCIONES PRINCIPALES DEL BOT ===
 
+def on_stream_analysis(symbol):
+    """Callback del stream: analiza señales del símbolo tras cada vela"""
+    global last_analysis_time, signal_count
+
+    last_analysis_time = datetime.now()
+    market_data = get_market_data()
+    signal_count += analyze_trading_signals({symbol: market_data[symbol]})
+    invalidate_responses(STATUS)
+
 def trading_loop():
     """Loop principal de trading"""
     global bot_running, last_analysis_time, signal_count, using_simulation
     
     bot_running = True
+    invalidate_responses(STATUS)
     cycle_count = 0
     
     logger.info("🚀 INICIANDO LOOP DE TRADING")
@@ -60,26 +78,39 @@ def trading_loop():
     try:
         if analyze_market():
             last_analysis_time = datetime.now()
+            invalidate_responses(STATUS)
             logger.info("✅ Primer análisis de datos completado")
     except Exception as e:
         logger.error(f"❌ Error en primer análisis: {e}")
 
+    # Modo streaming: el análisis lo dispara cada cierre de vela en vez del sleep
+    streaming = False
+    if Config.MARKET_DATA_MODE == "stream":
+        streaming = start_market_stream(market_analyzer, on_analysis=on_stream_analysis)
+
     while bot_running:
         try:
             cycle_count += 1
             logger.info(f"🔄 Ciclo {cycle_count} - Analizando mercado...")
             
-            # Analizar mercado usando el módulo
-            if analyze_market():
-                last_analysis_time = datetime.now()
-                
-                # Obtener datos del mercado
-                market_data = get_market_data()
-                
-                # Analizar señales de trading
-                signals_sent = analyze_trading_signals(market_data)
-                signal_count += signals_sent
+            if streaming and is_market_stream_alive():
+                # Análisis y señales ya gestionados por el stream
+                analysis_ok = True
+                signals_sent = 0
+            else:
+                # Analizar mercado usando el módulo
+                analysis_ok = analyze_market()
+                if analysis_ok:
+                    last_analysis_time = datetime.now()
+
+                    # Obtener datos del mercado
+                    market_data = get_market_data()
 
+                    # Analizar señales de trading
+                    signals_sent = analyze_trading_signals(market_data)
+                    signal_count += signals_sent
+
+            if analysis_ok:
                 # Evaluar señales pendientes automáticamente cada 3 ciclos
                 if cycle_count % 3 == 0:
                     try:
@@ -104,6 +135,7 @@ def trading_loop():
             else:
                 logger.error(f"❌ Error en ciclo {cycle_count}")
                 using_simulation = True
+            invalidate_responses(STATUS)  # Hora del último análisis, contador de señales y modo simulación
             
             # Rotar logs cada 5 ciclos
             if cycle_count % 5 == 0:
@@ -122,6 +154,7 @@ def trading_loop():
             time.sleep(60)
     
     bot_running = False
+    invalidate_responses(STATUS)
     logger.info("🛑 Trading loop finalizado")
 
 # === FLASK APP ===
@@ -178,7 +211,11 @@ def convert_bools_to_json(obj):
 
 @app.route("/api/data")
 def api_data():
-    """API endpoint para datos en tiempo real"""
+    """API endpoint para datos en tiempo real (cacheado hasta el próximo análisis o señal)"""
+    return cached_response("api_data", build_api_data, tags=(MARKET, SIGNALS, STATUS))
+
+def build_api_data():
+    """Genera la respuesta de /api/data"""
     try:
         market_data = get_market_data()
         trading_stats = get_trading_stats()
@@ -202,59 +239,95 @@ def api_data():
         logger.error(f"❌ Error en API: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route("/stream")
+def stream():
+    """Feed en vivo (Server-Sent Events): deltas de mercado, señales nuevas y líneas de log
+
+    ?topics=market,signals,logs elige qué recibir (por defecto, todo).
+    """
+    topics = [t for t in request.args.get("topics", ",".join(TOPICS)).split(",") if t in TOPICS]
+    if not topics:
+        return jsonify({"error": f"topics debe incluir alguno de: {', '.join(TOPICS)}"}), 400
+
+    if not request.environ.get("wsgi.multithread"):
+        # Servidor sin hilos (gunicorn sync): un cliente SSE ocuparía el único worker hasta el --timeout
+        return jsonify({"error": "Feed en vivo no disponible sin servidor con hilos (gunicorn --threads)"}), 503
+
+    subscription = live_feed.subscribe(topics)
+    if subscription is None:
+        return jsonify({"error": "Demasiados clientes conectados al feed en vivo"}), 503
+
+    return Response(
+        live_feed.stream(subscription, get_market_data),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def log_query_args():
+    """?limit=, ?level=, ?after=, ?before= y búsqueda (?date=, ?from=, ?to=, ?q=) de /logs y /logs-json"""
+    return dict(
+        limit=request.args.get("limit", type=int),
+        level=request.args.get("level"),
+        after=request.args.get("after", type=int),
+        before=request.args.get("before", type=int),
+        day=request.args.get("date"),
+        since=request.args.get("from"),
+        until=request.args.get("to"),
+        q=request.args.get("q")
+    )
+
 @app.route("/logs")
 def view_logs():
-    """Endpoint para ver logs del bot - Muestra todos los logs del día actual"""
-    return get_logs_html_response()
+    """Endpoint para ver logs del bot - Últimas líneas del día (?level=, ?before= para paginar)"""
+    return get_logs_html_response(**log_query_args())
 
 @app.route('/repair-database')
 def repair_database():
     """Endpoint para reparar la base de datos sin reiniciar el servidor"""
     try:
-        import sqlite3
         import random
 
         db_path = "trading_performance.db"
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Verificar si market_trend existe
-        cursor.execute("PRAGMA table_info(signals)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-
-        if 'market_trend' not in column_names:
-            # Añadir columna
-            cursor.execute("ALTER TABLE signals ADD COLUMN market_trend TEXT DEFAULT 'SIDEWAYS'")
-
-            # Actualizar señales existentes con tendencias realistas
-            cursor.execute("SELECT id, signal_type, score FROM signals")
-            all_signals = cursor.fetchall()
-
-            for signal_id, signal_type, score in all_signals:
-                if signal_type == 'buy':
-                    if score >= 80:
-                        trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[50, 30, 20])[0]
-                    else:
-                        trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[25, 50, 25])[0]
-                else:  # sell
-                    if score >= 80:
-                        trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[50, 30, 20])[0]
-                    else:
-                        trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[25, 50, 25])[0]
-
-                cursor.execute("UPDATE signals SET market_trend = ? WHERE id = ?", (trend, signal_id))
-
-            conn.commit()
-            conn.close()
+        with db_manager.transaction(db_path) as cursor:
+            # Verificar si market_trend existe
+            cursor.execute("PRAGMA table_info(signals)")
+            columns = cursor.fetchall()
+            column_names = [col[1] for col in columns]
+
+            if 'market_trend' not in column_names:
+                # Añadir columna
+                cursor.execute("ALTER TABLE signals ADD COLUMN market_trend TEXT DEFAULT 'SIDEWAYS'")
+
+                # Actualizar señales existentes con tendencias realistas
+                cursor.execute("SELECT id, signal_type, score FROM signals")
+                all_signals = cursor.fetchall()
+
+                for signal_id, signal_type, score in all_signals:
+                    if signal_type == 'buy':
+                        if score >= 80:
+                            trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[50, 30, 20])[0]
+                        else:
+                            trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[25, 50, 25])[0]
+                    else:  # sell
+                        if score >= 80:
+                            trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[50, 30, 20])[0]
+                        else:
+                            trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[25, 50, 25])[0]
+
+                    cursor.execute("UPDATE signals SET market_trend = ? WHERE id = ?", (trend, signal_id))
+
+                repaired = True
+            else:
+                repaired = False
 
+        if repaired:
+            invalidate_responses(SIGNALS)
             return jsonify({
                 'status': 'success',
                 'message': 'Base de datos reparada correctamente. Columna market_trend añadida y datos actualizados.',
                 'action': 'refresh_analytics'
             })
         else:
-            conn.close()
             return jsonify({
                 'status': 'info',
                 'message': 'La base de datos ya está actualizada. Columna market_trend existe.',
@@ -270,8 +343,8 @@ def repair_database():
 
 @app.route("/logs-json")
 def view_logs_json():
-    """Endpoint para logs en JSON - Muestra todos los logs del día actual"""
-    return get_logs_json_response()
+    """Endpoint para logs en JSON - Últimas líneas del día (?after= para pedir solo las nuevas)"""
+    return get_logs_json_response(**log_query_args())
 
 @app.route("/test-email")
 def test_email():
@@ -285,6 +358,8 @@ def test_email():
                 "test_result": "success",
                 "message": "Conexión de email verificada correctamente",
                 "email_to": EMAIL_TO,
+                "email": get_email_stats(),
+                "channels": get_notifier_stats(),
                 "timestamp": datetime.now().isoformat()
             })
         else:
@@ -292,6 +367,8 @@ def test_email():
             return jsonify({
                 "test_result": "failed",
                 "message": "Error en conexión de email",
+                "email": get_email_stats(),
+                "channels": get_notifier_stats(),
                 "timestamp": datetime.now().isoformat()
             })
     except Exception as e:
@@ -311,6 +388,7 @@ def start_bot():
         # Iniciar bot en hilo separado
         bot_thread = threading.Thread(target=trading_loop, daemon=True)
         bot_thread.start()
+        invalidate_responses(STATUS)  # trading_loop vuelve a invalidar al marcar running
 
         logger.info("🚀 Bot iniciado desde endpoint")
         return jsonify({
@@ -332,6 +410,7 @@ def stop_bot():
     
     if bot_running:
         bot_running = False
+        invalidate_responses(STATUS)
         logger.info("🛑 Bot detenido desde endpoint")
         return jsonify({
             "status": "success",
@@ -351,7 +430,8 @@ def stop_bot():
 def instructions():
     """Dashboard educativo de instrucciones"""
     try:
-        return generate_instructions_dashboard()
+        # Página estática renderizada al arrancar: se codifica una vez y se sirve desde memoria (ETag/304)
+        return cached_response("instructions", generate_instructions_dashboard, ttl=float("inf"))
     except Exception as e:
         logger.error(f"❌ Error generando dashboard de instrucciones: {e}")
         return f"""
@@ -370,18 +450,13 @@ def analytics():
     """Dashboard de análisis de rendimiento (PRIVADO)"""
     try:
         from analytics_dashboard import get_analytics_data, generate_analytics_dashboard
-        from flask import make_response
-
-        performance_stats, recent_signals, market_trends = get_analytics_data()
-        dashboard_html = generate_analytics_dashboard(performance_stats, recent_signals, market_trends)
 
-        # Crear respuesta con headers anti-cache
-        response = make_response(dashboard_html)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+        def build():
+            performance_stats, recent_signals, market_trends = get_analytics_data()
+            return generate_analytics_dashboard(performance_stats, recent_signals, market_trends)
 
-        return response
+        # Cacheado hasta que cambien las señales; el navegador revalida siempre (ETag/304)
+        return cached_response("analytics", build, tags=(SIGNALS,))
 
     except ImportError as e:
         logger.error(f"ImportError en analytics: {e}")
@@ -477,58 +552,20 @@ def admin_reset_data(secret_key):
         }), 403
 
     try:
-        import os
-        import sqlite3
-
         # Eliminar base de datos existente
         db_path = 'trading_performance.db'
-        if os.path.exists(db_path):
-            os.remove(db_path)
-
-        # Crear nueva base de datos vacía
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Crear tabla signals con estructura completa
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                signal_type TEXT NOT NULL,
-                entry_price REAL NOT NULL,
-                score REAL NOT NULL,
-                conditions_met INTEGER,
-                total_conditions INTEGER,
-                rsi_1m REAL,
-                rsi_15m REAL,
-                ema_fast REAL,
-                ema_slow REAL,
-                volume_ratio REAL,
-                atr REAL,
-                candle_change REAL,
-                tp_price REAL,
-                sl_price REAL,
-                expected_move REAL,
-                risk_reward REAL,
-                market_conditions TEXT,
-                result TEXT,
-                exit_price REAL,
-                exit_timestamp TEXT,
-                actual_return REAL,
-                time_to_resolution INTEGER,
-                notes TEXT
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
+        db_manager.remove_database(db_path)
+
+        # Crear nueva base de datos vacía con el esquema completo (índices, rollups y triggers)
+        from performance_tracker import PerformanceTracker
+        PerformanceTracker(db_path).init_database()
 
         # Limpiar cache de señales
         from trading_logic import trading_logic
         trading_logic.last_signals = {}
         trading_logic.signal_count = 0
 
+        invalidate_responses(SIGNALS)
         logger.info("🗑️ RESET ADMINISTRATIVO: Base de datos limpiada")
 
         return jsonify({
@@ -546,7 +583,11 @@ def admin_reset_data(secret_key):
 
 @app.route('/api/signal-count')
 def get_signal_count():
-    """Endpoint para obtener el número total de señales"""
+    """Endpoint para obtener el número total de señales (cacheado hasta la próxima escritura)"""
+    return cached_response("signal_count", build_signal_count, tags=(SIGNALS,))
+
+def build_signal_count():
+    """Genera la respuesta de /api/signal-count"""
     try:
         from performance_tracker import PerformanceTracker
         tracker = PerformanceTracker()
@@ -562,6 +603,14 @@ def get_signal_count():
             'error': str(e)
         }), 500
 
+@app.route('/api/binance-stats')
+def binance_stats():
+    """Peso de peticiones usado en el minuto, espera en cola y respuestas 429/418 de Binance"""
+    return jsonify({
+        "rate_limit": get_binance_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.route('/admin/reset-data', methods=['POST'])
 def reset_data():
     """Endpoint SEGURO para resetear datos - requiere token"""
@@ -578,18 +627,14 @@ def reset_data():
         from performance_tracker import PerformanceTracker
         tracker = PerformanceTracker()
 
-        import sqlite3
-        conn = sqlite3.connect('trading_performance.db')
-        cursor = conn.cursor()
-
-        # Backup antes de borrar
-        cursor.execute('CREATE TABLE IF NOT EXISTS signals_backup AS SELECT * FROM signals')
+        with db_manager.transaction('trading_performance.db') as cursor:
+            # Backup antes de borrar
+            cursor.execute('CREATE TABLE IF NOT EXISTS signals_backup AS SELECT * FROM signals')
 
-        # Limpiar tabla principal
-        cursor.execute('DELETE FROM signals')
-        conn.commit()
-        conn.close()
+            # Limpiar tabla principal
+            cursor.execute('DELETE FROM signals')
 
+        invalidate_responses(SIGNALS)
         logger.info("🗑️ Base de datos reseteada por administrador")
 
         return jsonify({
@@ -611,48 +656,44 @@ def admin_repair_database(password):
         return jsonify({"error": "Acceso denegado"}), 403
 
     try:
-        import sqlite3
         import random
 
         from performance_tracker import PerformanceTracker
         tracker = PerformanceTracker()
 
-        conn = sqlite3.connect(tracker.db_path)
-        cursor = conn.cursor()
-
-        # Verificar si market_trend existe
-        cursor.execute("PRAGMA table_info(signals)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-
-        if 'market_trend' not in column_names:
-            # Añadir columna
-            cursor.execute("ALTER TABLE signals ADD COLUMN market_trend TEXT DEFAULT 'SIDEWAYS'")
-
-            # Actualizar señales existentes con tendencias realistas
-            cursor.execute("SELECT id, signal_type, score FROM signals")
-            all_signals = cursor.fetchall()
-
-            for signal_id, signal_type, score in all_signals:
-                if signal_type == 'buy':
-                    if score >= 80:
-                        trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[50, 30, 20])[0]
-                    else:
-                        trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[25, 50, 25])[0]
-                else:  # sell
-                    if score >= 80:
-                        trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[50, 30, 20])[0]
-                    else:
-                        trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[25, 50, 25])[0]
-
-                cursor.execute("UPDATE signals SET market_trend = ? WHERE id = ?", (trend, signal_id))
-
-            conn.commit()
-            message = "Base de datos reparada: columna market_trend añadida y datos actualizados"
-        else:
-            message = "Base de datos ya actualizada: columna market_trend existe"
+        with db_manager.transaction(tracker.db_path) as cursor:
+            # Verificar si market_trend existe
+            cursor.execute("PRAGMA table_info(signals)")
+            columns = cursor.fetchall()
+            column_names = [col[1] for col in columns]
+
+            if 'market_trend' not in column_names:
+                # Añadir columna
+                cursor.execute("ALTER TABLE signals ADD COLUMN market_trend TEXT DEFAULT 'SIDEWAYS'")
+
+                # Actualizar señales existentes con tendencias realistas
+                cursor.execute("SELECT id, signal_type, score FROM signals")
+                all_signals = cursor.fetchall()
+
+                for signal_id, signal_type, score in all_signals:
+                    if signal_type == 'buy':
+                        if score >= 80:
+                            trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[50, 30, 20])[0]
+                        else:
+                            trend = random.choices(['BULLISH', 'SIDEWAYS', 'BEARISH'], weights=[25, 50, 25])[0]
+                    else:  # sell
+                        if score >= 80:
+                            trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[50, 30, 20])[0]
+                        else:
+                            trend = random.choices(['BEARISH', 'SIDEWAYS', 'BULLISH'], weights=[25, 50, 25])[0]
+
+                    cursor.execute("UPDATE signals SET market_trend = ? WHERE id = ?", (trend, signal_id))
+
+                message = "Base de datos reparada: columna market_trend añadida y datos actualizados"
+            else:
+                message = "Base de datos ya actualizada: columna market_trend existe"
 
-        conn.close()
+        invalidate_responses(SIGNALS)
         logger.info(f"🔧 {message}")
         return jsonify({"message": message, "status": "success"})
 
@@ -660,6 +701,9 @@ def admin_repair_database(password):
         logger.error(f"❌ Error reparando base de datos: {e}")
         return jsonify({"error": str(e), "status": "error"}), 500
 
+# Versión resuelta una sola vez al arrancar (Git o version.json); el badge se sirve desde memoria
+logger.info(f"🏷️ Versión: {get_version_string()}")
+
 # Inicializar bot automáticamente
 init_trading_bot()
 
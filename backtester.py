@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# backtester.py - Backtesting del pipeline de análisis y señales con velas históricas
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from binance_api import TIMEFRAMES
+from config import Config
+from db_manager import db_manager
+from indicators import calculate_price_targets
+from market_analyzer import MarketAnalyzer
+from performance_tracker import PerformanceTracker, resolve_path_outcome
+from trading_logic import TradingLogic
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+    logger.warning("pandas no disponible - el backtester solo leerá CSV")
+
+INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000}
+
+# Parámetros que el optimizador puede variar en cada backtest
+TUNABLE_PARAMS = ("ema_fast", "ema_slow", "tp_multiplier", "sl_multiplier", "required_buy", "required_sell")
+
+# Loggers del pipeline en vivo que se silencian durante el replay (un mensaje por vela)
+PIPELINE_LOGGERS = ("market_analyzer", "trading_logic", "indicators")
+
+def _normalize_row(row) -> List:
+    """Fila de vela con tipos numéricos (open_time en ms aunque venga en µs)"""
+    open_time = int(float(row[0]))
+    close_time = int(float(row[6]))
+    if open_time > 10**14:  # Ficheros de data.binance.vision desde 2025 (microsegundos)
+        open_time //= 1000
+        close_time //= 1000
+    return [open_time, float(row[1]), float(row[2]), float(row[3]),
+            float(row[4]), float(row[5]), close_time]
+
+def load_klines(path: str) -> List:
+    """Carga velas de 1m desde CSV o Parquet (formato de columnas de Binance)"""
+    if path.endswith(".parquet"):
+        if not PANDAS_AVAILABLE:
+            raise RuntimeError("pandas/pyarrow necesarios para leer Parquet")
+        frame = pd.read_parquet(path)
+        return [_normalize_row(row) for row in frame.itertuples(index=False)]
+
+    klines = []
+    with open(path, "r", newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().lstrip("-").isdigit():
+                continue  # Cabecera o línea vacía
+            klines.append(_normalize_row(row))
+    return klines
+
+def load_symbol_files(paths: List[str]) -> List:
+    """Concatena varios ficheros de un símbolo ordenados y sin velas duplicadas"""
+    rows = {}
+    for path in sorted(paths):
+        for row in load_klines(path):
+            rows[row[0]] = row
+    return [rows[t] for t in sorted(rows)]
+
+def symbol_from_path(path: str) -> str:
+    """Símbolo a partir del nombre del fichero (BTCUSDT-1m-2024-01.csv -> BTCUSDT)"""
+    return re.split(r"[-_.]", os.path.basename(path))[0].upper()
+
+class TimeframeResampler:
+    """Construye velas de un timeframe superior a partir de velas de 1m"""
+    __slots__ = ("interval_ms", "limit", "bars", "current")
+
+    def __init__(self, interval: str, limit: int):
+        self.interval_ms = INTERVAL_MS[interval]
+        self.limit = limit
+        self.bars = deque(maxlen=limit - 1)  # Velas cerradas
+        self.current = None                  # Vela en formación
+
+    def add(self, row: List):
+        bucket = row[0] - row[0] % self.interval_ms
+        current = self.current
+        if current is None or current[0] != bucket:
+            if current is not None:
+                self.bars.append(current)
+            self.current = [bucket, row[1], row[2], row[3], row[4], row[5], bucket + self.interval_ms - 1]
+            return
+
+        current[2] = max(current[2], row[2])
+        current[3] = min(current[3], row[3])
+        current[4] = row[4]
+        current[5] += row[5]
+
+    @property
+    def ready(self) -> bool:
+        return len(self.bars) == self.limit - 1
+
+    def window(self) -> List:
+        """Ventana como la de la API: velas cerradas + la vela en curso"""
+        return list(self.bars) + [list(self.current)]
+
+class SimulatedClock:
+    """Reloj controlado por el tiempo de las velas (sustituye a time.time)"""
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _iso(ms: int) -> str:
+    """Timestamp ISO (UTC, sin zona) como lo guarda performance_tracker"""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).replace(tzinfo=None).isoformat()
+
+def resolve_outcome(signal_type: str, index: int, entry_price: float, tp_price: float, sl_price: float,
+                    highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                    close_times: np.ndarray) -> Optional[Dict]:
+    """Resuelve una señal con los máximos/mínimos de las velas siguientes (primer toque)"""
+    end = index + 1 + Config.TIMEOUT_HOURS * 60
+    outcome = resolve_path_outcome(
+        signal_type, entry_price, int(close_times[index]), tp_price, sl_price,
+        highs[index + 1:end], lows[index + 1:end], closes[index + 1:end], close_times[index + 1:end]
+    )
+    if outcome is None:
+        return None  # Sin datos suficientes: queda pendiente
+
+    return {
+        "result": outcome["result"],
+        "exit_price": outcome["exit_price"],
+        "exit_timestamp": _iso(outcome["exit_time_ms"]),
+        "actual_return": outcome["actual_return"],
+        "time_to_resolution": outcome["time_to_resolution"],
+        "notes": f"Backtest: {outcome['result']} tras {outcome['time_to_resolution']} velas de 1m"
+    }
+
+def apply_params(analyzer: MarketAnalyzer, logic: TradingLogic, symbol: str, params: Dict):
+    """Aplica parámetros candidatos al par del símbolo y retorna los multiplicadores de ATR"""
+    unknown = set(params) - set(TUNABLE_PARAMS)
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+
+    pair_params = analyzer.get_adaptive_params(analyzer.detect_pair_type(symbol))
+    for key in ("ema_fast", "ema_slow"):
+        if key in params:
+            pair_params[key] = params[key]
+
+    if "required_buy" in params:
+        logic.required_criteria["buy_trend"] = params["required_buy"]
+    if "required_sell" in params:
+        logic.required_criteria["sell_trend"] = params["required_sell"]
+
+    return (params.get("tp_multiplier"), params.get("sl_multiplier"))
+
+def backtest_symbol(symbol: str, klines: List, timeframes=TIMEFRAMES, params: Optional[Dict] = None) -> List[Dict]:
+    """Reproduce las velas de un símbolo por analizador → lógica de trading → resolución TP/SL"""
+    for name in PIPELINE_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    limits = dict(timeframes)
+    analyzer = MarketAnalyzer([symbol])
+    logic = TradingLogic()
+    clock = SimulatedClock()
+    logic.clock = clock
+    atr_multipliers = apply_params(analyzer, logic, symbol, params or {})
+
+    window_1m = deque(maxlen=limits["1m"])
+    resamplers = {interval: TimeframeResampler(interval, limit)
+                  for interval, limit in timeframes if interval != "1m"}
+
+    highs = np.array([k[2] for k in klines])
+    lows = np.array([k[3] for k in klines])
+    closes = np.array([k[4] for k in klines])
+    close_times = np.array([k[6] for k in klines], dtype=np.int64)
+
+    trades = []
+    for i, row in enumerate(klines):
+        window_1m.append(row)
+        for resampler in resamplers.values():
+            resampler.add(row)
+
+        if len(window_1m) < limits["1m"] or not all(r.ready for r in resamplers.values()):
+            continue  # Calentamiento: esperar ventanas completas como en vivo
+
+        timeframe_data = {"1m": list(window_1m)}
+        for interval, resampler in resamplers.items():
+            timeframe_data[interval] = resampler.window()
+
+        clock.now = row[6] / 1000
+        if not analyzer.analyze_symbol(symbol, timeframe_data=timeframe_data, symbol_info={}):
+            continue
+
+        market_data = analyzer.market_data
+        signal_type = "buy"
+        valid, conditions = logic.check_buy_conditions(symbol, market_data, timeframe_data)
+        if not valid:
+            signal_type = "sell"
+            valid, conditions = logic.check_sell_conditions(symbol, market_data, timeframe_data)
+        if not valid:
+            continue
+
+        data = market_data[symbol]
+        price_targets = calculate_price_targets(data["price"], data["atr"], signal_type, symbol, atr_multipliers)
+        logic.update_signal_tracking(symbol, signal_type, data["price"])
+
+        trade = {
+            "timestamp": _iso(row[6]),
+            "symbol": symbol,
+            "signal_type": signal_type,
+            "entry_price": data["price"],
+            "score": data["score"],
+            "conditions_met": sum(1 for v in conditions.values() if v),
+            "total_conditions": len(conditions),
+            "rsi_1m": data["rsi_1m"],
+            "rsi_15m": data["rsi_15m"],
+            "ema_fast": data["ema_fast"],
+            "ema_slow": data["ema_slow"],
+            "volume_ratio": data["volume"] / data["vol_avg"] if data["vol_avg"] else 0,
+            "atr": data["atr"],
+            "candle_change": data["candle_change_percent"],
+            "tp_price": price_targets["take_profit"],
+            "sl_price": price_targets["stop_loss"],
+            "expected_move": price_targets["expected_move_percent"],
+            "risk_reward": price_targets["risk_reward_ratio"],
+            "market_conditions": {"conditions": {k: bool(v) for k, v in conditions.items()},
+                                  "timeframe_data": "backtest"},
+            "market_trend": conditions.get("Market_trend", "SIDEWAYS")
+        }
+        trade["outcome"] = resolve_outcome(
+            signal_type, i, data["price"], trade["tp_price"], trade["sl_price"],
+            highs, lows, closes, close_times
+        )
+        trades.append(trade)
+
+    return trades
+
+def _backtest_files(symbol: str, paths: List[str], timeframes, params=None) -> List[Dict]:
+    """Worker de proceso: carga los ficheros de un símbolo y lo reproduce"""
+    return backtest_symbol(symbol, load_symbol_files(paths), timeframes, params)
+
+def calculate_max_drawdown(trades: List[Dict]) -> float:
+    """Máximo drawdown (en puntos de % acumulados) ordenando por cierre de la operación"""
+    resolved = sorted((t for t in trades if t["outcome"]), key=lambda t: t["outcome"]["exit_timestamp"])
+    if not resolved:
+        return 0.0
+    equity = np.cumsum([t["outcome"]["actual_return"] for t in resolved])
+    peaks = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    return float(np.max(peaks - equity))
+
+class Backtester:
+    """Ejecuta el backtest por símbolo (en paralelo) y genera estadísticas como get_performance_stats"""
+
+    def __init__(self, timeframes=TIMEFRAMES, max_workers: Optional[int] = None, db_path: Optional[str] = None,
+                 params: Optional[Dict] = None):
+        self.timeframes = tuple(timeframes)
+        self.params = dict(params or {})  # Parámetros candidatos (ver TUNABLE_PARAMS)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.db_path = db_path  # Si se indica, las señales simuladas se conservan en esa BD
+
+        if dict(self.timeframes).get("1h", 0) < 50:
+            logger.warning("⚠️ Ventana de 1h < 50 velas: la tendencia siempre será SIDEWAYS "
+                           "y el filtro de tendencia rechazará todas las señales")
+
+    def run(self, klines_by_symbol: Dict[str, List]) -> Dict:
+        """Backtest con velas de 1m ya cargadas en memoria"""
+        start = time.perf_counter()
+        trades = []
+        for symbol, klines in klines_by_symbol.items():
+            trades.extend(backtest_symbol(symbol, klines, self.timeframes, self.params))
+        candles = sum(len(k) for k in klines_by_symbol.values())
+        return self.build_report(trades, list(klines_by_symbol), candles, time.perf_counter() - start)
+
+    def run_files(self, paths_by_symbol: Dict[str, List[str]]) -> Dict:
+        """Backtest desde ficheros CSV/Parquet, un proceso por símbolo"""
+        start = time.perf_counter()
+        workers = min(self.max_workers, len(paths_by_symbol))
+        trades = []
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_backtest_files, symbol, paths, self.timeframes, self.params)
+                           for symbol, paths in paths_by_symbol.items()]
+                for future in futures:
+                    trades.extend(future.result())
+        else:
+            for symbol, paths in paths_by_symbol.items():
+                trades.extend(_backtest_files(symbol, paths, self.timeframes, self.params))
+
+        return self.build_report(trades, list(paths_by_symbol), None, time.perf_counter() - start)
+
+    def build_report(self, trades: List[Dict], symbols: List[str], candles: Optional[int], elapsed: float) -> Dict:
+        """Guarda las señales simuladas y calcula las estadísticas con PerformanceTracker"""
+        db_path = self.db_path
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(prefix="backtest_", suffix=".db")
+            os.close(fd)
+
+        try:
+            tracker = PerformanceTracker(db_path)
+            for trade in trades:
+                signal_data = {k: v for k, v in trade.items() if k != "outcome"}
+                signal_id = tracker.record_signal(signal_data)
+                if trade["outcome"]:
+                    self._store_outcome(tracker, signal_id, trade["outcome"])
+
+            # La ventana de get_performance_stats es relativa a ahora: cubrir todo el histórico
+            days = 1
+            if trades:
+                first = datetime.fromisoformat(min(t["timestamp"] for t in trades))
+                days = (datetime.now(timezone.utc).replace(tzinfo=None) - first).days + 2
+            stats = tracker.get_performance_stats(days)
+        finally:
+            if self.db_path is None:
+                db_manager.remove_database(db_path)
+
+        stats["max_drawdown"] = calculate_max_drawdown(trades)
+        stats["total_return"] = sum(t["outcome"]["actual_return"] for t in trades if t["outcome"])
+        stats["backtest"] = {
+            "symbols": symbols,
+            "candles": candles,
+            "timeframes": dict(self.timeframes),
+            "params": self.params,
+            "elapsed_seconds": elapsed,
+            "first_signal": min((t["timestamp"] for t in trades), default=None),
+            "last_signal": max((t["timestamp"] for t in trades), default=None)
+        }
+
+        logger.info(f"🧪 Backtest: {len(trades)} señales en {len(symbols)} símbolos ({elapsed:.1f}s) - "
+                    f"WR {stats['win_rate']:.1f}%, retorno {stats['total_return']:+.2f}%, "
+                    f"drawdown {stats['max_drawdown']:.2f}%")
+        return stats
+
+    def _store_outcome(self, tracker, signal_id: int, outcome: Dict):
+        """Guarda el resultado simulado con las mismas columnas que check_signal_outcomes"""
+        with db_manager.transaction(tracker.db_path) as cursor:
+            tracker.apply_outcomes(cursor, [(
+                outcome["result"], outcome["exit_price"], outcome["exit_timestamp"],
+                outcome["actual_return"], outcome["time_to_resolution"], outcome["notes"], signal_id
+            )])
+
+def run_backtest(paths: List[str], **kwargs) -> Dict:
+    """Función helper para lanzar un backtest desde ficheros (símbolo según el nombre del fichero)"""
+    paths_by_symbol = {}
+    for path in paths:
+        paths_by_symbol.setdefault(symbol_from_path(path), []).append(path)
+    return Backtester(**kwargs).run_files(paths_by_symbol)
+
+def parse_timeframes(overrides: List[str]):
+    """Aplica overrides 'intervalo=velas' sobre los timeframes en vivo"""
+    limits = dict(TIMEFRAMES)
+    for item in overrides or []:
+        interval, limit = item.split("=")
+        if interval not in limits:
+            raise ValueError(f"Timeframe desconocido: {interval}")
+        limits[interval] = int(limit)
+    return tuple(limits.items())
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest del bot con velas de 1m (CSV/Parquet de Binance)")
+    parser.add_argument("paths", nargs="+", help="Ficheros de velas de 1m (p.ej. BTCUSDT-1m-2024-01.csv)")
+    parser.add_argument("--timeframe", action="append", default=[], metavar="INTERVALO=VELAS",
+                        help="Cambia el tamaño de ventana de un timeframe (p.ej. 1h=60)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--db", default=None, help="Conservar las señales simuladas en esta base de datos")
+    parser.add_argument("--json", default=None, help="Guardar las estadísticas completas en JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    stats = run_backtest(args.paths, timeframes=parse_timeframes(args.timeframe),
+                         max_workers=args.workers, db_path=args.db)
+
+    print("🧪 RESULTADOS DEL BACKTEST")
+    print("=" * 40)
+    print(f"Señales: {stats['total_signals']} (✅ {stats['wins']} / ❌ {stats['losses']} / ⏰ {stats['expired']} / ⏳ {stats['pending']})")
+    print(f"Win rate: {stats['win_rate']:.1f}%")
+    print(f"Retorno total: {stats['total_return']:+.2f}%  (medio {stats['avg_return']:+.2f}%)")
+    print(f"Máximo drawdown: {stats['max_drawdown']:.2f}%")
+    for row in stats["symbol_breakdown"]:
+        print(f"  {row['symbol']}: {row['count']} señales, WR {row['win_rate']:.1f}%, retorno medio {row['avg_return']:+.2f}%")
+    print(f"Tiempo: {stats['backtest']['elapsed_seconds']:.1f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(stats, f, indent=2, default=str)
+        print(f"💾 Estadísticas guardadas en {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# benchmark_http.py - Latencia de peticiones HTTP con conexiones nuevas (frías) frente al pool keep-alive (calientes)
+import argparse
+import json
+import logging
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+from http_client import HTTPTransport
+
+class PingHandler(BaseHTTPRequestHandler):
+    """Responde {} a cualquier GET manteniendo la conexión abierta (HTTP/1.1)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    """Servidor local que tarda connect_delay en aceptar cada conexión nueva (simula el TCP+TLS)"""
+
+    daemon_threads = True
+
+    def __init__(self, connect_delay: float):
+        super().__init__(("127.0.0.1", 0), PingHandler)
+        self.connect_delay = connect_delay
+        self.connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Cabeceras y cuerpo sin esperar al ACK
+        time.sleep(self.connect_delay)
+        super().process_request(request, client_address)
+
+def transport(args) -> HTTPTransport:
+    return HTTPTransport(pool_size=args.workers, connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+                         read_timeout=Config.HTTP_READ_TIMEOUT, retries=0, http2=args.http2)
+
+def cold(args, url: str):
+    """Una sesión nueva por petición: cada una abre (y cierra) su conexión"""
+    samples = []
+    for _ in range(args.requests):
+        client = transport(args)
+        start = time.perf_counter()
+        client.get(url, timeout=10).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        client.close()
+    return samples
+
+def warm(args, url: str, client: HTTPTransport, workers: int = 1):
+    """Peticiones sobre un transporte compartido con el pool ya abierto"""
+    def timed_get(_):
+        start = time.perf_counter()
+        client.get(url, timeout=10).raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(timed_get, range(workers)))  # Abrir las conexiones del pool antes de medir
+        return list(pool.map(timed_get, range(args.requests)))
+
+def summary(samples) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"mediana {statistics.median(ordered):7.2f} ms   p95 {p95:7.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de conexiones HTTP frías frente a keep-alive")
+    parser.add_argument("--url", default=f"{Config.BINANCE_API_BASE}/ping", help="URL a pedir con GET")
+    parser.add_argument("--local", action="store_true", help="Usar un servidor local en vez de --url")
+    parser.add_argument("--connect-delay", type=float, default=0.02,
+                        help="Segundos que tarda el servidor local en aceptar cada conexión")
+    parser.add_argument("--requests", type=int, default=30, help="Peticiones por medición")
+    parser.add_argument("--workers", type=int, default=8, help="Hilos de la medición en paralelo")
+    parser.add_argument("--http2", action="store_true", help="HTTP/2 con httpx (si está instalado)")
+    parser.add_argument("--json", action="store_true", help="Resultados en JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = None
+    url = args.url
+    if args.local:
+        server = LocalHTTPServer(args.connect_delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/v3/ping"
+
+    try:
+        client = transport(args)
+        results = {
+            "cold": cold(args, url),
+            "warm": warm(args, url, client),
+            "warm_parallel": warm(args, url, client, args.workers)
+        }
+        client.close()
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.json:
+        print(json.dumps({name: {"median_ms": round(statistics.median(samples), 3), "samples": len(samples)}
+                          for name, samples in results.items()}))
+        return
+
+    print(f"🌐 {url} - {args.requests} peticiones por medición")
+    print(f"   fría (conexión nueva):          {summary(results['cold'])}")
+    print(f"   caliente (keep-alive):          {summary(results['warm'])}")
+    print(f"   caliente ({args.workers} hilos, pool):       {summary(results['warm_parallel'])}")
+    speedup = statistics.median(results["cold"]) / max(statistics.median(results["warm"]), 1e-6)
+    print(f"   ➜ {speedup:.1f}x más rápida con la conexión reutilizada")
+    if server is not None:
+        print(f"   conexiones abiertas en el servidor: {server.connections}")
+
+if __name__ == "__main__":
+    main()
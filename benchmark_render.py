@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# benchmark_render.py - Tiempo y memoria por petición al renderizar los dashboards HTML
+import argparse
+import logging
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from analytics_dashboard import generate_analytics_dashboard
+from dashboard import generate_dashboard_html
+from instructions_dashboard import generate_instructions_dashboard
+
+def synthetic_market_data(symbols: int, rng: random.Random) -> dict:
+    """Datos de mercado como los de market_analyzer para symbols pares"""
+    names = ["BTCUSDT", "ETHUSDT", "SOLUSDT"] + [f"ALT{i}USDT" for i in range(max(0, symbols - 3))]
+    market_data = {}
+    for symbol in names[:symbols]:
+        price = rng.uniform(1, 100000)
+        market_data[symbol] = {
+            'price': price, 'rsi_1m': rng.uniform(10, 90), 'rsi_15m': rng.uniform(10, 90),
+            'volume_ratio': rng.uniform(0.5, 3), 'score': rng.randint(0, 100),
+            'candle_change_percent': rng.uniform(-1, 1), 'ema_fast': price * rng.uniform(0.98, 1.02),
+            'ema_slow': price * rng.uniform(0.98, 1.02), 'market_trend': rng.choice(["BULLISH", "BEARISH", "SIDEWAYS"]),
+            'price_24h_change_percent': rng.uniform(-5, 5), 'price_24h_change_amount': rng.uniform(-500, 500),
+            'price_change_percent': rng.uniform(-0.5, 0.5), 'price_change_amount': rng.uniform(-50, 50)
+        }
+    return market_data
+
+def synthetic_analytics(signals: int, rng: random.Random):
+    """Estadísticas y señales recientes con la forma que devuelve get_analytics_data"""
+    now = datetime.now()
+    symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    trends = ["BULLISH", "BEARISH", "SIDEWAYS"]
+    score_ranges = ['ULTRA-PREMIUM (90-100)', 'PREMIUM (85-89)', 'EXCELENTE (80-84)', 'OTROS (<80)']
+
+    def item(**extra):
+        return dict(count=rng.randint(1, 500), win_rate=rng.uniform(0, 100), avg_return=rng.uniform(-2, 2),
+                    best_return=rng.uniform(0, 5), avg_score=rng.uniform(50, 100), **extra)
+
+    performance_stats = {
+        'total_signals': signals, 'wins': signals // 3, 'losses': signals // 3, 'expired': signals // 6,
+        'pending': 5, 'win_rate': 55.5, 'avg_return': 0.42, 'best_return': 4.1, 'worst_return': -2.3,
+        'net_profit': 12.5, 'total_profit': 40.2, 'total_loss': -27.7, 'avg_score': 84, 'avg_time_minutes': 63,
+        'score_breakdown': [item(range=label) for label in score_ranges],
+        'trend_breakdown': [item(trend=trend, signal_type=side) for trend in trends for side in ("BUY", "SELL")],
+        'score_by_trend_breakdown': [item(trend=trend, score_range=label) for trend in trends for label in score_ranges],
+        'symbol_breakdown': [item(symbol=symbol, wins=10, losses=8, expired=3, pending=1) for symbol in symbols],
+        'symbol_streaks': {symbol: {'current_streak': rng.randint(-4, 4), 'max_win_streak': 6, 'max_loss_streak': 4,
+                                    'last_signal_time': (now - timedelta(minutes=rng.randint(1, 600))).isoformat()}
+                           for symbol in symbols},
+        'hourly_breakdown': [item(hour=f"{hour:02d}:00") for hour in range(24)],
+        'volatility_breakdown': [item(symbol=symbol, avg_atr=rng.uniform(1, 300), avg_candle_volatility=0.3)
+                                 for symbol in symbols],
+        'streak_analysis': {'current_streak': 2, 'max_win_streak': 6, 'max_loss_streak': 4, 'streak_status': 'WINNING'}
+    }
+
+    recent_signals = []
+    for i in range(50):
+        entry = rng.uniform(10, 50000)
+        recent_signals.append({
+            'id': i, 'timestamp': (now - timedelta(minutes=30 * i)).isoformat(), 'symbol': rng.choice(symbols),
+            'signal_type': rng.choice(["BUY", "SELL"]), 'entry_price': entry, 'score': rng.randint(80, 100),
+            'tp_price': entry * 1.01, 'sl_price': entry * 0.99,
+            'result': rng.choice(['WIN_TP', 'LOSS_SL', 'EXPIRED', None]), 'actual_return': rng.uniform(-1, 1),
+            'time_to_resolution': rng.randint(0, 180), 'today': i < 10
+        })
+    return performance_stats, recent_signals, {}
+
+def measure(render, repeat: int):
+    """(mediana en ms, bytes asignados en el pico, tamaño de la página) de render()"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    html = render()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(samples), peak, len(html)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del renderizado de los dashboards HTML")
+    parser.add_argument("--symbols", type=int, default=3, help="Filas de criptos del dashboard principal")
+    parser.add_argument("--signals", type=int, default=1000, help="Total de señales de las estadísticas sintéticas")
+    parser.add_argument("--repeat", type=int, default=50, help="Renderizados por medición")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(42)
+    market_data = synthetic_market_data(args.symbols, rng)
+    performance_stats, recent_signals, market_trends = synthetic_analytics(args.signals, rng)
+
+    pages = (
+        ("dashboard", lambda: generate_dashboard_html(
+            market_data, [], 0, True, datetime.now(), False, "✅ OK")),
+        ("analytics", lambda: generate_analytics_dashboard(performance_stats, recent_signals, market_trends)),
+        ("instructions", generate_instructions_dashboard)
+    )
+
+    print(f"🖥️ Renderizado por petición ({args.symbols} criptos, {len(recent_signals)} señales recientes)")
+    for label, render in pages:
+        elapsed, peak, size = measure(render, args.repeat)
+        print(f"   {label:<13} {elapsed:8.3f} ms   pico {peak / 1024:8.1f} KiB   página {size / 1024:6.1f} KiB")
+
+if __name__ == "__main__":
+    main()
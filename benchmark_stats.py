@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# benchmark_stats.py - Latencia de get_performance_stats con muchas señales en la base de datos
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import Config
+from db_manager import db_manager
+from performance_tracker import PerformanceTracker, INSERT_SIGNAL_SQL, timestamp_to_epoch
+
+# Consulta básica con el filtro anterior (función sobre la columna: recorre toda la tabla)
+LEGACY_BASIC_QUERY = '''
+    SELECT COUNT(*), SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END), AVG(actual_return)
+    FROM signals
+    WHERE datetime(timestamp) > datetime('now', '-{} days')
+'''
+
+INDEXED_BASIC_QUERY = '''
+    SELECT COUNT(*), SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END), AVG(actual_return)
+    FROM signals
+    WHERE ts > CAST(strftime('%s', 'now', '-{} days') AS INTEGER)
+'''
+
+def populate(db_path: str, rows: int, span_days: int, seed: int = 42):
+    """Inserta señales sintéticas en orden cronológico repartidas en los últimos span_days días"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    trends = ["BULLISH", "BEARISH", "SIDEWAYS"]
+
+    offsets = sorted((rng.uniform(0, span_days * 86400) for _ in range(rows)), reverse=True)
+
+    batch = []
+    with db_manager.transaction(db_path) as cursor:
+        for offset in offsets:
+            timestamp = (now - timedelta(seconds=offset)).isoformat()
+            price = rng.uniform(10, 50000)
+            batch.append((
+                timestamp, rng.choice(symbols), rng.choice(["buy", "sell"]), price, rng.randint(50, 100),
+                rng.randint(4, 8), 8, rng.uniform(20, 80), rng.uniform(20, 80), price, price,
+                rng.uniform(0.5, 3), price * 0.002, rng.uniform(-1, 1), price * 1.01, price * 0.99,
+                1.0, 1.5, json.dumps({}), rng.choice(trends), timestamp_to_epoch(timestamp)
+            ))
+            if len(batch) == 10000:
+                cursor.executemany(INSERT_SIGNAL_SQL, batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SIGNAL_SQL, batch)
+
+        # Resultados simulados; solo las señales de las últimas horas siguen pendientes
+        cursor.execute('''
+            UPDATE signals SET
+            result = (CASE abs(random()) % 5 WHEN 0 THEN 'WIN_TP' WHEN 1 THEN 'WIN_TIME' WHEN 2 THEN 'LOSS_SL'
+                      WHEN 3 THEN 'LOSS_TIME' ELSE 'EXPIRED' END),
+            actual_return = (abs(random()) % 400) / 100.0 - 2.0,
+            time_to_resolution = abs(random()) % 180 + 1
+            WHERE ts <= ?
+        ''', (timestamp_to_epoch(now.isoformat()) - Config.TIMEOUT_HOURS * 3600,))
+
+    # Volcar el WAL a la base de datos antes de medir
+    db_manager.get_connection(db_path).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def timed(func, repeat: int) -> float:
+    """Mediana en milisegundos de repeat ejecuciones"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estadísticas de rendimiento sobre la tabla signals")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Señales sintéticas a insertar")
+    parser.add_argument("--span-days", type=int, default=365, help="Días de histórico que cubren las señales")
+    parser.add_argument("--days", type=int, default=30, help="Ventana de get_performance_stats")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medición")
+    parser.add_argument("--db", default=None, help="Base de datos a usar (por defecto, una temporal que se borra)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    db_path = args.db
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix="bench_stats_", suffix=".db")
+        os.close(fd)
+
+    try:
+        tracker = PerformanceTracker(db_path)
+        if args.db is None or not tracker.get_recent_signals(1):
+            start = time.perf_counter()
+            populate(db_path, args.rows, args.span_days)
+            print(f"📥 {args.rows:,} señales insertadas en {time.perf_counter() - start:.1f}s")
+
+        cursor = db_manager.get_connection(db_path).cursor()
+        cursor.execute("ANALYZE")
+        cursor.execute("SELECT COUNT(*) FROM signals")
+        total = cursor.fetchone()[0]
+
+        print(f"📊 Señales en BD: {total:,} - ventana de {args.days} días")
+        print(f"   get_performance_stats (primera, sin caché): "
+              f"{timed(lambda: tracker.get_performance_stats(args.days), 1):.1f} ms")
+        print(f"   get_performance_stats: {timed(lambda: tracker.get_performance_stats(args.days), args.repeat):.1f} ms")
+        print(f"   check pendientes:      {timed(lambda: tracker.get_pending_signals(cursor, 'DESC'), args.repeat):.1f} ms")
+        print(f"   agregado básico (ts):        "
+              f"{timed(lambda: cursor.execute(INDEXED_BASIC_QUERY.format(args.days)).fetchall(), args.repeat):.1f} ms")
+        print(f"   agregado básico (datetime()): "
+              f"{timed(lambda: cursor.execute(LEGACY_BASIC_QUERY.format(args.days)).fetchall(), args.repeat):.1f} ms")
+
+        print("🔍 Planes de consulta:")
+        for label, query, params in (
+            ("ventana", "SELECT COUNT(*) FROM signals WHERE ts > ?", (0,)),
+            ("símbolo", "SELECT result FROM signals WHERE symbol = ? AND ts > ?", ("BTCUSDT", 0)),
+            ("resultado", "SELECT ts FROM signals WHERE result = ? AND ts > ?", ("WIN_TP", 0)),
+            ("pendientes", "SELECT id FROM signals WHERE (result IS NULL OR result = 'None' OR result = '') "
+                           "ORDER BY ts DESC", ())
+        ):
+            plan = cursor.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+            print(f"   {label}: {' | '.join(row[-1] for row in plan)}")
+        cursor.close()
+    finally:
+        if args.db is None:
+            db_manager.remove_database(db_path)
+
+if __name__ == "__main__":
+    main()
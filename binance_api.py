@@ -1,32 +1,299 @@
 # binance_api.py - Conexión con la API de Binance
+import json
 import requests
 import logging
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
+from config import Config
+from http_client import http_transport
 
 logger = logging.getLogger(__name__)
 
+# Timeframes usados en el análisis multi-timeframe: (intervalo, número de velas)
+TIMEFRAMES = (("1m", 100), ("5m", 50), ("15m", 50), ("1h", 30))
+
+# Peso por endpoint según la tabla de límites de Binance (klines y tickers dependen de los parámetros)
+ENDPOINT_WEIGHTS = {"ping": 1, "time": 1, "exchangeInfo": 20, "depth": 5, "trades": 25}
+
+# Cabeceras con el peso usado en el minuto actual (la segunda en respuestas antiguas)
+USED_WEIGHT_HEADERS = ("X-MBX-USED-WEIGHT-1M", "X-MBX-USED-WEIGHT")
+
+def request_weight(url: str, params: Optional[Dict] = None) -> int:
+    """Peso estimado de una petición antes de enviarla (la cabecera de la respuesta lo corrige)"""
+    params = params or {}
+    endpoint = url.rstrip("/").split("/api/v3/")[-1]
+    if endpoint == "klines":
+        limit = int(params.get("limit", 500))
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    if endpoint == "ticker/24hr":
+        if "symbol" in params:
+            return 2
+        count = len(json.loads(params["symbols"])) if "symbols" in params else 0
+        return 2 if 0 < count <= 20 else 40 if 0 < count <= 100 else 80
+    if endpoint == "ticker/price":
+        return 2 if "symbol" in params else 4
+    return ENDPOINT_WEIGHTS.get(endpoint, 1)
+
+def retry_after(response) -> Optional[float]:
+    """Segundos de la cabecera Retry-After de un 429/418 (None si no viene)"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+class BinanceRateLimitError(Exception):
+    """Binance nos tiene limitados más tiempo del que se puede esperar"""
+
+class RequestWeightLimiter:
+    """Cubo de tokens de peso que se rellena al empezar cada minuto, como la ventana de Binance
+
+    Cada petición reserva su peso antes de salir y espera al siguiente minuto si no cabe en el
+    presupuesto. El peso que informa Binance en X-MBX-USED-WEIGHT-1M corrige la estimación (incluye
+    lo que gasten otros procesos desde la misma IP) y un 429/418 bloquea a todas las hebras hasta que
+    pase el Retry-After. Lleva las métricas de peso usado y de espera en cola.
+    """
+
+    def __init__(self, weight_limit: int = 4800, max_wait: float = 65):
+        self.weight_limit = weight_limit
+        self.max_wait = max_wait
+        self._window = self._current_window()
+        self.used_weight = 0          # Estimación propia del minuto actual (reservas incluidas)
+        self.reported_weight = 0      # Último X-MBX-USED-WEIGHT-1M recibido
+        self.max_used_weight = 0
+        self.blocked_until = 0.0      # time.time() hasta el que no se envía nada (Retry-After)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.waiting = 0
+        self.wait_count = 0           # Peticiones que esperaron por peso o por bloqueo
+        self.wait_total = 0.0         # Segundos en cola (slots, peso, bloqueo e intervalo mínimo)
+        self.wait_max = 0.0
+        self.throttled = 0            # Respuestas 429
+        self.banned = 0               # Respuestas 418
+        self.retries = 0
+
+    @staticmethod
+    def _current_window() -> int:
+        return int(time.time() // 60)
+
+    def _roll_window(self):
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self.used_weight = 0
+
+    def acquire(self, weight: int) -> int:
+        """Reserva weight en la ventana actual esperando lo necesario; retorna la ventana reservada"""
+        waited = False
+        while True:
+            with self._lock:
+                self._roll_window()
+                now = time.time()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.used_weight + weight <= self.weight_limit or self.used_weight == 0:
+                    self.used_weight += weight
+                    self.max_used_weight = max(self.max_used_weight, self.used_weight)
+                    self.requests += 1
+                    if waited:
+                        self.wait_count += 1
+                    return self._window
+                else:
+                    wait = (self._window + 1) * 60 - now + 0.05  # Hasta el minuto siguiente
+                if wait > self.max_wait:
+                    raise BinanceRateLimitError(f"límite de peso de Binance: habría que esperar {wait:.0f}s")
+                if not waited and now >= self.blocked_until:  # Los bloqueos ya se avisan al recibir el 429/418
+                    logger.warning(f"⏳ Límite de peso de Binance: esperando {wait:.1f}s "
+                                   f"({self.used_weight}/{self.weight_limit})")
+                waited = True
+                self.waiting += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+    def update(self, window: int, used_weight: int):
+        """Sincroniza con el peso que informa Binance (solo si sigue siendo la misma ventana)"""
+        with self._lock:
+            self.reported_weight = used_weight
+            self._roll_window()
+            if window == self._window and used_weight > self.used_weight:
+                self.used_weight = used_weight
+                self.max_used_weight = max(self.max_used_weight, used_weight)
+
+    def backoff(self, seconds: float, banned: bool = False):
+        """Bloquea todas las peticiones durante seconds tras un 429 (o un 418 si banned)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+            if banned:
+                self.banned += 1
+            else:
+                self.throttled += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._roll_window()
+            return {
+                "used_weight": self.used_weight,
+                "reported_weight": self.reported_weight,
+                "max_used_weight": self.max_used_weight,
+                "weight_limit": self.weight_limit,
+                "requests": self.requests,
+                "waiting": self.waiting,
+                "waited_requests": self.wait_count,
+                "avg_queue_wait_ms": round(self.wait_total / self.requests * 1000, 2) if self.requests else 0.0,
+                "max_queue_wait_ms": round(self.wait_max * 1000, 2),
+                "throttled_429": self.throttled,
+                "banned_418": self.banned,
+                "retries": self.retries,
+                "blocked_for": round(max(0.0, self.blocked_until - time.time()), 1)
+            }
+
+class KlineCache:
+    """Ring buffer de velas por (símbolo, intervalo) para descargas incrementales"""
+
+    def __init__(self):
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, interval: str, limit: int) -> Optional[List]:
+        """Retorna las velas cacheadas o None si no hay suficientes"""
+        with self._lock:
+            buffer = self._buffers.get((symbol, interval))
+            if buffer is None or buffer.maxlen != limit or len(buffer) < limit:
+                return None
+            return list(buffer)
+
+    def store(self, symbol: str, interval: str, klines: List, limit: int) -> List:
+        """Reemplaza el buffer completo con una descarga completa"""
+        with self._lock:
+            buffer = deque(klines, maxlen=limit)
+            self._buffers[(symbol, interval)] = buffer
+            return list(buffer)
+
+    def merge(self, symbol: str, interval: str, new_klines: List) -> Optional[List]:
+        """Añade velas nuevas sustituyendo la última vela (aún abierta) cacheada"""
+        with self._lock:
+            buffer = self._buffers.get((symbol, interval))
+            if buffer is None:
+                return None
+
+            first_open_time = new_klines[0][0]
+            while buffer and buffer[-1][0] >= first_open_time:
+                buffer.pop()
+            buffer.extend(new_klines)
+            return list(buffer)
+
+    def clear(self):
+        """Vacía la cache"""
+        with self._lock:
+            self._buffers.clear()
+
 class BinanceAPI:
-    def __init__(self, base_url="https://api.binance.com/api/v3"):
+    def __init__(self, base_url="https://api.binance.com/api/v3",
+                 max_concurrent_requests=8, min_request_interval=0.0,
+                 weight_limit=4800, max_retries=3, retry_backoff=1.0, max_wait=65, transport=None):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ScalpingBot/1.0'
-        })
+        # Conexiones keep-alive compartidas con el resto de módulos
+        self.transport = transport or http_transport
+
+        # Presupuesto de peticiones compartido por todas las hebras
+        self.request_slots = threading.BoundedSemaphore(max_concurrent_requests)
+        self.min_request_interval = min_request_interval
+        self._last_request_time = 0.0
+        self._throttle_lock = threading.Lock()
+
+        # Presupuesto de peso por minuto y reintentos ante 429/418
+        self.weight_limiter = RequestWeightLimiter(weight_limit, max_wait)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        # Pool para descargar los timeframes de un símbolo en paralelo
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_requests, thread_name_prefix="binance"
+        )
+
+        # Cache incremental de velas
+        self.kline_cache = KlineCache()
+
+    def _wait_request_interval(self):
+        """Espacia el inicio de las peticiones según el intervalo mínimo"""
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._last_request_time + self.min_request_interval - now
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request_time = time.monotonic()
+
+    def _get(self, url: str, params: Optional[Dict] = None, timeout: int = 10):
+        """GET limitado por el presupuesto compartido de peticiones y de peso
+
+        Ante un 429/418 espera el Retry-After (o un backoff exponencial) y reintenta hasta
+        max_retries veces; si el bloqueo supera max_wait retorna la respuesta de error.
+        """
+        limiter = self.weight_limiter
+        weight = request_weight(url, params)
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            with self.request_slots:
+                window = limiter.acquire(weight)
+                self._wait_request_interval()
+                limiter.record_wait(time.monotonic() - queued_at)
+                response = self.transport.get(url, params=params, timeout=timeout)
+
+            used_weight = next((response.headers[name] for name in USED_WEIGHT_HEADERS
+                                if name in response.headers), None)
+            if used_weight is not None:
+                limiter.update(window, int(used_weight))
+
+            if response.status_code not in (429, 418):
+                return response
+
+            delay = retry_after(response) or self.retry_backoff * 2 ** attempt
+            limiter.backoff(delay, banned=response.status_code == 418)
+            if attempt == self.max_retries or delay > limiter.max_wait:
+                logger.error(f"❌ Binance {response.status_code}: límite de peticiones superado "
+                             f"(bloqueado {delay:.0f}s)")
+                return response
+            limiter.record_retry()
+            logger.warning(f"⏳ Binance {response.status_code}: reintento {attempt + 1}/{self.max_retries} "
+                           f"en {delay:.1f}s")
+        return response
+
+    def get_rate_limit_stats(self) -> Dict:
+        """Métricas de peso usado, espera en cola y respuestas 429/418"""
+        return self.weight_limiter.get_stats()
     
-    def get_klines(self, symbol: str, interval: str, limit: int = 100) -> Optional[List]:
-        """Obtiene datos de velas de Binance"""
+    def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                   start_time: Optional[int] = None) -> Optional[List]:
+        """Obtiene datos de velas de Binance (desde start_time si se indica)"""
         url = f"{self.base_url}/klines"
         params = {
             "symbol": symbol,
             "interval": interval,
             "limit": limit
         }
+        if start_time is not None:
+            params["startTime"] = start_time
         
         try:
-            logger.info(f"📡 Conectando a Binance: {url}?symbol={symbol}&interval={interval}&limit={limit}")
+            logger.info(f"📡 Conectando a Binance: {url}?symbol={symbol}&interval={interval}&limit={limit}"
+                        + (f"&startTime={start_time}" if start_time is not None else ""))
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params=params, timeout=10)
             logger.info(f"📡 Respuesta Binance: Status {response.status_code}")
             
             if response.status_code == 200:
@@ -47,39 +314,48 @@ class BinanceAPI:
             logger.error(f"❌ Error inesperado: {e}")
             return None
     
-    def get_multi_timeframe_data(self, symbol: str) -> Dict:
-        """Obtiene datos de múltiples timeframes para un símbolo"""
-        logger.info("📡 Obteniendo datos multi-timeframe...")
-        
-        # Obtener datos de diferentes timeframes
-        data_1m = self.get_klines(symbol, "1m", 100)
-        if not data_1m:
-            return {}
-
-        time.sleep(0.1)  # Rate limiting
+    def get_cached_klines(self, symbol: str, interval: str, limit: int = 100) -> Optional[List]:
+        """Obtiene velas descargando solo las nuevas desde la última cacheada"""
+        cached = self.kline_cache.get(symbol, interval, limit)
+        if cached is None:
+            data = self.get_klines(symbol, interval, limit)
+            if not data:
+                return None
+            return self.kline_cache.store(symbol, interval, data, limit)
 
-        data_5m = self.get_klines(symbol, "5m", 50)
-        if not data_5m:
-            return {}
+        # Pedir desde la última vela cacheada (aún abierta) en adelante
+        delta = self.get_klines(symbol, interval, limit, start_time=cached[-1][0])
+        if not delta:
+            return None
 
-        time.sleep(0.1)  # Rate limiting
+        if len(delta) >= limit:
+            # El hueco cubre toda la ventana: recargar completa
+            data = self.get_klines(symbol, interval, limit)
+            if not data:
+                return None
+            return self.kline_cache.store(symbol, interval, data, limit)
 
-        data_15m = self.get_klines(symbol, "15m", 50)
-        if not data_15m:
-            return {}
+        logger.info(f"♻️ {symbol} {interval}: {len(delta)} velas nuevas fusionadas en cache")
+        return self.kline_cache.merge(symbol, interval, delta)
 
-        time.sleep(0.1)  # Rate limiting
+    def get_multi_timeframe_data(self, symbol: str) -> Dict:
+        """Obtiene datos de múltiples timeframes para un símbolo (en paralelo)"""
+        logger.info(f"📡 Obteniendo datos multi-timeframe de {symbol}...")
 
-        data_1h = self.get_klines(symbol, "1h", 30)
-        if not data_1h:
-            return {}
-        
-        return {
-            "1m": data_1m,
-            "5m": data_5m,
-            "15m": data_15m,
-            "1h": data_1h
+        # Lanzar todas las descargas a la vez; el rate limiting lo aplica _get
+        futures = {
+            interval: self.executor.submit(self.get_cached_klines, symbol, interval, limit)
+            for interval, limit in TIMEFRAMES
         }
+
+        result = {}
+        for interval, future in futures.items():
+            data = future.result()
+            if not data:
+                return {}
+            result[interval] = data
+
+        return result
     
     def extract_prices_from_klines(self, klines: List) -> Dict:
         """Extrae precios de los datos de klines"""
@@ -108,7 +384,7 @@ class BinanceAPI:
         params = {"symbol": symbol}
         
         try:
-            response = self.session.get(url, params=params, timeout=5)
+            response = self._get(url, params=params, timeout=5)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -118,17 +394,52 @@ class BinanceAPI:
             logger.error(f"❌ Error obteniendo info de {symbol}: {e}")
             return {}
     
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Obtiene el precio actual de un símbolo"""
+        url = f"{self.base_url}/ticker/price"
+
+        try:
+            response = self._get(url, params={"symbol": symbol}, timeout=5)
+            if response.status_code == 200:
+                return float(response.json()["price"])
+            logger.error(f"❌ Error obteniendo precio de {symbol}: {response.status_code}")
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo precio de {symbol}: {e}")
+        return None
+
+    def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Obtiene el precio actual de varios símbolos con una sola petición"""
+        url = f"{self.base_url}/ticker/price"
+        params = {"symbols": json.dumps(list(symbols), separators=(",", ":"))}
+
+        try:
+            response = self._get(url, params=params, timeout=5)
+            if response.status_code == 200:
+                return {item["symbol"]: float(item["price"]) for item in response.json()}
+            logger.error(f"❌ Error obteniendo precios: {response.status_code} - {response.text}")
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo precios: {e}")
+        return {}
+    
     def test_connection(self) -> bool:
         """Prueba la conexión con Binance"""
         try:
             url = f"{self.base_url}/ping"
-            response = self.session.get(url, timeout=5)
+            response = self._get(url, timeout=5)
             return response.status_code == 200
         except:
             return False
 
 # Instancia global
-binance_api = BinanceAPI()
+binance_api = BinanceAPI(
+    Config.BINANCE_API_BASE,
+    max_concurrent_requests=Config.BINANCE_MAX_CONCURRENT_REQUESTS,
+    min_request_interval=Config.BINANCE_MIN_REQUEST_INTERVAL,
+    weight_limit=Config.BINANCE_WEIGHT_LIMIT,
+    max_retries=Config.BINANCE_MAX_RETRIES,
+    retry_backoff=Config.BINANCE_RETRY_BACKOFF,
+    max_wait=Config.BINANCE_MAX_WAIT
+)
 
 def get_binance_data(symbol: str, interval: str, limit: int = 100) -> Optional[List]:
     """Función helper para obtener datos de Binance"""
@@ -145,3 +456,7 @@ def extract_prices(klines: List) -> Dict:
 def test_binance_connection() -> bool:
     """Función helper para probar conexión"""
     return binance_api.test_connection()
+
+def get_binance_stats() -> Dict:
+    """Función helper con las métricas de límite de peticiones"""
+    return binance_api.get_rate_limit_stats()
@@ -25,14 +25,36 @@ class Config:
     EMAIL_TO = os.getenv("EMAIL_TO")
     SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
     SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+    SMTP_SECURITY = os.getenv("SMTP_SECURITY", "ssl" if SMTP_PORT == 465 else "starttls")  # ssl | starttls | none
+    SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "15"))  # segundos por operación SMTP
+    SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))  # segundos sin correo antes de cerrar la conexión
+    EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", "100"))  # Señales en la cola del canal smtp antes de descartar
+    EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "3"))  # Reintentos por email ante fallos temporales
+    EMAIL_RETRY_BACKOFF = float(os.getenv("EMAIL_RETRY_BACKOFF", "2"))  # segundos (se duplica en cada reintento)
+    EMAIL_DIGEST = os.getenv("EMAIL_DIGEST", "false").lower() == "true"  # Un solo email con todas las señales del grupo
+    EMAIL_DIGEST_WINDOW = float(os.getenv("EMAIL_DIGEST_WINDOW", "0"))  # segundos por grupo (0 = un email por ciclo)
+
+    # Canales de notificación de señales (notifier.py)
+    NOTIFY_CHANNELS = os.getenv("NOTIFY_CHANNELS", "smtp")  # Lista separada por comas: smtp, webhook, file
+    NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL")
+    NOTIFY_WEBHOOK_TIMEOUT = float(os.getenv("NOTIFY_WEBHOOK_TIMEOUT", "5"))  # segundos
+    NOTIFY_FILE = os.getenv("NOTIFY_FILE", "notifications.jsonl")
+    NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "2"))  # Hilos por canal (smtp siempre 1)
+    NOTIFY_RATE = float(os.getenv("NOTIFY_RATE", "1"))  # Notificaciones por segundo y canal (0 = sin límite)
+    NOTIFY_BURST = int(os.getenv("NOTIFY_BURST", "5"))  # Ráfaga permitida por encima del ritmo
+    NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "100"))  # Pendientes por canal antes de descartar
+    NOTIFY_BREAKER_FAILURES = int(os.getenv("NOTIFY_BREAKER_FAILURES", "5"))  # Fallos seguidos que abren el circuito
+    NOTIFY_BREAKER_RESET = float(os.getenv("NOTIFY_BREAKER_RESET", "60"))  # segundos con el circuito abierto
     
     # Configuración de la aplicación
     ANALYSIS_INTERVAL = int(os.getenv("ANALYSIS_INTERVAL", "60"))  # segundos
     WEB_REFRESH_INTERVAL = int(os.getenv("WEB_REFRESH_INTERVAL", "30"))  # segundos
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))  # segundos (0 = sin caché de respuestas)
 
     # Configuración de optimización (NUEVAS MEJORAS)
     EMAIL_SCORE_THRESHOLD = int(os.getenv("EMAIL_SCORE_THRESHOLD", "85"))  # Score mínimo para emails
     TIMEOUT_HOURS = int(os.getenv("TIMEOUT_HOURS", "3"))  # Horas para expirar señales
+    PENDING_MAX_AGE_HOURS = int(os.getenv("PENDING_MAX_AGE_HOURS", "24"))  # Horas tras expirar sin descargar velas
     WIN_THRESHOLD_PERCENT = float(os.getenv("WIN_THRESHOLD_PERCENT", "1.2"))  # % para considerar WIN
     LOSS_THRESHOLD_PERCENT = float(os.getenv("LOSS_THRESHOLD_PERCENT", "0.8"))  # % para considerar LOSS
     
@@ -42,9 +64,47 @@ class Config:
     
     # URLs de API
     BINANCE_API_BASE = os.getenv("BINANCE_API_BASE", "https://api.binance.com/api/v3")
-    
+
+    # Configuración de concurrencia del análisis
+    ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "8"))  # Símbolos analizados en paralelo
+    BINANCE_MAX_CONCURRENT_REQUESTS = int(os.getenv("BINANCE_MAX_CONCURRENT_REQUESTS", "8"))  # Peticiones simultáneas
+    BINANCE_MIN_REQUEST_INTERVAL = float(os.getenv("BINANCE_MIN_REQUEST_INTERVAL", "0"))  # segundos entre peticiones (opcional)
+    BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", "4800"))  # Peso por minuto (Binance: 6000, con margen)
+    BINANCE_MAX_RETRIES = int(os.getenv("BINANCE_MAX_RETRIES", "3"))  # Reintentos ante 429/418
+    BINANCE_RETRY_BACKOFF = float(os.getenv("BINANCE_RETRY_BACKOFF", "1.0"))  # segundos, se duplica (sin Retry-After)
+    BINANCE_MAX_WAIT = float(os.getenv("BINANCE_MAX_WAIT", "65"))  # segundos máximos de espera por límite antes de fallar
+
+    # Transporte HTTP compartido (http_client.py): pool keep-alive para Binance y webhooks
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))  # Conexiones abiertas por host
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))  # segundos
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))  # segundos (si el llamador no indica otro)
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))  # Reintentos de GET ante errores de conexión y 5xx
+    HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))  # segundos, se duplica en cada reintento
+    HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "false").lower() == "true"  # Requiere httpx[http2]
+
+    # Configuración de datos en streaming (alternativa al polling REST)
+    MARKET_DATA_MODE = os.getenv("MARKET_DATA_MODE", "rest")  # rest | stream
+    STREAM_URL = os.getenv("STREAM_URL", "wss://stream.binance.com:9443/stream")  # tcp://host:port para replay local
+    STREAM_INTRACANDLE = os.getenv("STREAM_INTRACANDLE", "false").lower() == "true"  # Analizar también velas abiertas
+    STREAM_MIN_ANALYSIS_INTERVAL = float(os.getenv("STREAM_MIN_ANALYSIS_INTERVAL", "1.0"))  # segundos por símbolo
+
+    # Feed en vivo del dashboard (Server-Sent Events en /stream)
+    LIVE_FEED_MAX_CLIENTS = int(os.getenv("LIVE_FEED_MAX_CLIENTS", "10"))  # Conexiones simultáneas (cada una ocupa un hilo)
+    LIVE_FEED_KEEPALIVE = float(os.getenv("LIVE_FEED_KEEPALIVE", "15"))  # segundos entre comentarios keepalive
+    LIVE_FEED_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "500"))  # Eventos pendientes por cliente antes de cortarlo
+
     # Configuración de logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_VIEW_LINES = int(os.getenv("LOG_VIEW_LINES", "500"))  # Líneas por página en /logs y /logs-json
+    LOG_VIEW_MAX_LINES = int(os.getenv("LOG_VIEW_MAX_LINES", "5000"))  # Máximo que se puede pedir con ?limit=
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"  # Formatear y escribir en un hilo aparte (cola)
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json (una línea JSON por registro en el fichero)
+    LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))  # Registros máximos por escritura en modo async
+    LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))  # segundos máximos sin volcar al fichero
+    LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "1"))  # Conservar 1 de cada N mensajes repetidos (1 = todos)
+    LOG_SAMPLE_LEVEL = os.getenv("LOG_SAMPLE_LEVEL", "INFO")  # Nivel máximo muestreado (WARNING+ nunca se descarta)
+    LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "log_archive")  # Días anteriores comprimidos e indexados
+    LOG_ARCHIVE_SEGMENT_LINES = int(os.getenv("LOG_ARCHIVE_SEGMENT_LINES", "2000"))  # Registros por segmento comprimido
     
     @classmethod
     def validate(cls):
@@ -73,7 +133,20 @@ class Config:
             
         if not (0 <= cls.RSI_SELL_MAX <= 100):
             errors.append("RSI_SELL_MAX debe estar entre 0 y 100")
-        
+
+        # Validar concurrencia
+        if cls.ANALYSIS_MAX_WORKERS < 1:
+            errors.append("ANALYSIS_MAX_WORKERS debe ser mayor que 0")
+
+        if cls.BINANCE_MAX_CONCURRENT_REQUESTS < 1:
+            errors.append("BINANCE_MAX_CONCURRENT_REQUESTS debe ser mayor que 0")
+
+        if cls.BINANCE_WEIGHT_LIMIT < 1:
+            errors.append("BINANCE_WEIGHT_LIMIT debe ser mayor que 0")
+
+        if cls.HTTP_POOL_SIZE < cls.BINANCE_MAX_CONCURRENT_REQUESTS:
+            errors.append("HTTP_POOL_SIZE debe ser al menos BINANCE_MAX_CONCURRENT_REQUESTS")
+
         return errors
     
     @classmethod
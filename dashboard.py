@@ -1,186 +1,191 @@
-def get_trend_indicator(market_trend):
-    """Genera el indicador visual de tendencia de mercado"""
-    trend_configs = {
-        'BULLISH': {
-            'icon': '📈',
-            'text': 'ALCISTA',
-            'color': '#10b981',
-            'bg_color': 'rgba(16, 185, 129, 0.1)',
-            'description': 'Mercado en tendencia alcista. Favorable para señales de COMPRA. Los precios están por encima de las medias móviles con momentum positivo.'
-        },
-        'BEARISH': {
-            'icon': '📉',
-            'text': 'BAJISTA',
-            'color': '#ef4444',
-            'bg_color': 'rgba(239, 68, 68, 0.1)',
-            'description': 'Mercado en tendencia bajista. Favorable para señales de VENTA. Los precios están por debajo de las medias móviles con momentum negativo.'
-        },
-        'SIDEWAYS': {
-            'icon': '➡️',
-            'text': 'LATERAL',
-            'color': '#6b7280',
-            'bg_color': 'rgba(107, 114, 128, 0.1)',
-            'description': 'Mercado en consolidación lateral. Baja probabilidad de señales efectivas. Se recomienda esperar una tendencia clara.'
-        }
+from page_templates import PageTemplate
+
+# Configuración visual de cada tendencia de mercado
+TREND_CONFIGS = {
+    'BULLISH': {
+        'icon': '📈',
+        'text': 'ALCISTA',
+        'color': '#10b981',
+        'bg_color': 'rgba(16, 185, 129, 0.1)',
+        'description': 'Mercado en tendencia alcista. Favorable para señales de COMPRA. Los precios están por encima de las medias móviles con momentum positivo.'
+    },
+    'BEARISH': {
+        'icon': '📉',
+        'text': 'BAJISTA',
+        'color': '#ef4444',
+        'bg_color': 'rgba(239, 68, 68, 0.1)',
+        'description': 'Mercado en tendencia bajista. Favorable para señales de VENTA. Los precios están por debajo de las medias móviles con momentum negativo.'
+    },
+    'SIDEWAYS': {
+        'icon': '➡️',
+        'text': 'LATERAL',
+        'color': '#6b7280',
+        'bg_color': 'rgba(107, 114, 128, 0.1)',
+        'description': 'Mercado en consolidación lateral. Baja probabilidad de señales efectivas. Se recomienda esperar una tendencia clara.'
     }
+}
 
-    config = trend_configs.get(market_trend, trend_configs['SIDEWAYS'])
+# Iconos y colores por crypto
+CRYPTO_ICONS = {'BTC': '₿', 'ETH': 'Ξ', 'SOL': '◎'}
+CRYPTO_COLORS = {'BTC': '#f7931a', 'ETH': '#627eea', 'SOL': '#9945ff'}
 
-    return {
-        'html': f'''
+def render_trend_indicator(config):
+    """HTML del indicador de tendencia para una configuración de TREND_CONFIGS"""
+    return f'''
         <div class="trend-indicator" style="background: {config['bg_color']}; color: {config['color']}; border: 1px solid {config['color']};"
              title="{config['description']}">
             <span class="trend-icon">{config['icon']}</span>
             <span class="trend-text">{config['text']}</span>
         </div>
-        ''',
-        'config': config
-    }
+        '''
 
-def generate_dashboard_html(market_data, last_signals, signal_count, bot_running, last_analysis_time, using_simulation, email_status):
-    """Dashboard limpio con diseño profesional"""
-    from version_info import get_version_badge
+# El indicador solo depende de la tendencia: se genera una vez por tendencia al importar el módulo
+TREND_INDICATORS = {
+    trend: {'html': render_trend_indicator(config), 'config': config}
+    for trend, config in TREND_CONFIGS.items()
+}
 
-    # Generar filas de cryptos
-    crypto_rows = ""
-    for symbol, data in market_data.items():
-        name = symbol.replace('USDT', '')
-        price = data.get('price', 0)
-        rsi_1m = data.get('rsi_1m', 0)
-        rsi_15m = data.get('rsi_15m', 0)
-        vol_ratio = data.get('volume_ratio', 0)
-        score = data.get('score', 0)
-        candle_change = data.get('candle_change_percent', 0)
-        market_trend = data.get('market_trend', 'SIDEWAYS')
-
-        # Iconos y colores por crypto
-        icons = {'BTC': '₿', 'ETH': 'Ξ', 'SOL': '◎'}
-        colors = {'BTC': '#f7931a', 'ETH': '#627eea', 'SOL': '#9945ff'}
-        icon = icons.get(name, '●')
-        color = colors.get(name, '#64748b')
-
-        # Indicador de tendencia de mercado
-        trend_info = get_trend_indicator(market_trend)
-
-        # 8 criterios PRINCIPALES con indicadores de intensidad
-        # Nota: Breakout_candle y Signal_distance se evalúan internamente
-
-        # RSI 1min con intensidad
-        if 40 <= rsi_1m <= 60:
-            c1, c1_intensity = "🟢", "ÓPTIMO"
-        elif 30 <= rsi_1m <= 70:
-            c1, c1_intensity = "✓", "BUENO"
-        else:
-            c1, c1_intensity = "○", "EXTREMO"
-
-        # RSI 15min con intensidad
-        if rsi_15m > 60:
-            c2, c2_intensity = "🟢", "FUERTE"
-        elif rsi_15m > 50:
-            c2, c2_intensity = "✓", "ALCISTA"
-        else:
-            c2, c2_intensity = "○", "BAJISTA"
-
-        # EMA con intensidad
-        ema_diff = ((data.get('ema_fast', 0) - data.get('ema_slow', 0)) / data.get('ema_slow', 1)) * 100 if data.get('ema_slow', 0) > 0 else 0
-        if ema_diff > 0.5:
-            c3, c3_intensity = "🟢", "FUERTE"
-        elif ema_diff > 0:
-            c3, c3_intensity = "✓", "ALCISTA"
-        else:
-            c3, c3_intensity = "○", "BAJISTA"
-
-        # Volumen con intensidad
-        if vol_ratio > 2.0:
-            c4, c4_intensity = "🟢", "EXPLOSIVO"
-        elif vol_ratio > 1.5:
-            c4, c4_intensity = "🟢", "ALTO"
-        elif vol_ratio > 1.2:
-            c4, c4_intensity = "✓", "ELEVADO"
-        else:
-            c4, c4_intensity = "○", "BAJO"
-
-        # Score con intensidad - NUEVO SISTEMA
-        if score >= 95:
-            c5, c5_intensity = "🔥", "PREMIUM"
-        elif score >= 90:
-            c5, c5_intensity = "🟢", "EXCELENTE"
-        elif score >= 80:
-            c5, c5_intensity = "✓", "BUENO"
-        elif score >= 70:
-            c5, c5_intensity = "⚠️", "REGULAR"
-        else:
-            c5, c5_intensity = "○", "DÉBIL"
-
-        # Precio vs EMA con intensidad
-        price_ema_diff = ((price - data.get('ema_fast', 0)) / data.get('ema_fast', 1)) * 100 if data.get('ema_fast', 0) > 0 else 0
-        if price_ema_diff > 1.0:
-            c6, c6_intensity = "🟢", "FUERTE"
-        elif price_ema_diff > 0:
-            c6, c6_intensity = "✓", "POSITIVO"
-        else:
-            c6, c6_intensity = "○", "NEGATIVO"
-
-        # Vela con intensidad
-        if candle_change > 0.5:
-            c7, c7_intensity = "🟢", "FUERTE"
-        elif candle_change > 0.1:
-            c7, c7_intensity = "✓", "POSITIVA"
-        else:
-            c7, c7_intensity = "○", "DÉBIL"
-
-        # Ruptura con intensidad
-        if vol_ratio > 1.5 and candle_change > 0.3:
-            c8, c8_intensity = "🟢", "EXPLOSIVA"
-        elif vol_ratio > 1.2 and candle_change > 0.1:
-            c8, c8_intensity = "✓", "BUENA"
-        else:
-            c8, c8_intensity = "○", "DÉBIL"
-
-        count = [c1,c2,c3,c4,c5,c6,c7,c8].count("✓")
-
-        # PROGRESS BAR CON NUEVO SISTEMA DE SCORING
-        base_percentage = (count / 8) * 100  # Base: criterios cumplidos
-        bonus_points = max(0, score - 80) if score >= 80 else 0  # Bonus si score ≥ 80
-        progress_percentage = min(100, base_percentage + bonus_points)  # Máximo 100%
-
-        # Sistema de badges PROFESIONAL para máxima precisión
-        if score >= 90:                    # 90%+ = ULTRA-PREMIUM (Solo estos envían email sin límites)
-            signal = "🔥 ULTRA-PREMIUM"
-            signal_class = "signal-premium"
-        elif score >= 80:                  # 80-89% = PREMIUM (Solo estos envían email)
-            signal = "⭐ PREMIUM"
-            signal_class = "signal-excellent"
-        elif score >= 70:                  # 70-79% = FUERTE (No envían email)
-            signal = "✅ FUERTE"
-            signal_class = "signal-strong"
-        elif score >= 60:                  # 60-69% = BUENA (No envían email)
-            signal = "💡 BUENA"
-            signal_class = "signal-good"
-        elif score >= 50:                  # 50-59% = REGULAR (No envían email)
-            signal = "⚠️ REGULAR"
-            signal_class = "signal-regular"
-        elif score >= 40:                  # 40-49% = DÉBIL
-            signal = "⏳ DÉBIL"
-            signal_class = "signal-weak"
-        else:                               # 0-39% = NO OPERAR
-            signal = "❌ NO OPERAR"
-            signal_class = "signal-no"
-
-        # Datos de cambios de precio
-        price_24h_change_percent = data.get('price_24h_change_percent', 0)
-        price_24h_change_amount = data.get('price_24h_change_amount', 0)
-        price_change_percent = data.get('price_change_percent', 0)
-        price_change_amount = data.get('price_change_amount', 0)
-
-        # Iconos y colores para cambios
-        change_24h_icon = "📈" if price_24h_change_percent >= 0 else "📉"
-        change_24h_color = "#22c55e" if price_24h_change_percent >= 0 else "#ef4444"
-        change_now_icon = "🔼" if price_change_percent >= 0 else "🔽"
-        change_now_color = "#22c55e" if price_change_percent >= 0 else "#ef4444"
-
-        crypto_rows += f"""
-        <tr class="crypto-row">
+def get_trend_indicator(market_trend):
+    """Genera el indicador visual de tendencia de mercado"""
+    return TREND_INDICATORS.get(market_trend, TREND_INDICATORS['SIDEWAYS'])
+
+def render_crypto_row(symbol, data):
+    """Fila HTML de un símbolo (también la envía el feed en vivo cuando cambian sus datos)"""
+    name = symbol.replace('USDT', '')
+    price = data.get('price', 0)
+    rsi_1m = data.get('rsi_1m', 0)
+    rsi_15m = data.get('rsi_15m', 0)
+    vol_ratio = data.get('volume_ratio', 0)
+    score = data.get('score', 0)
+    candle_change = data.get('candle_change_percent', 0)
+    market_trend = data.get('market_trend', 'SIDEWAYS')
+
+    # Iconos y colores por crypto
+    icon = CRYPTO_ICONS.get(name, '●')
+    color = CRYPTO_COLORS.get(name, '#64748b')
+
+    # Indicador de tendencia de mercado
+    trend_info = get_trend_indicator(market_trend)
+
+    # 8 criterios PRINCIPALES con indicadores de intensidad
+    # Nota: Breakout_candle y Signal_distance se evalúan internamente
+
+    # RSI 1min con intensidad
+    if 40 <= rsi_1m <= 60:
+        c1, c1_intensity = "🟢", "ÓPTIMO"
+    elif 30 <= rsi_1m <= 70:
+        c1, c1_intensity = "✓", "BUENO"
+    else:
+        c1, c1_intensity = "○", "EXTREMO"
+
+    # RSI 15min con intensidad
+    if rsi_15m > 60:
+        c2, c2_intensity = "🟢", "FUERTE"
+    elif rsi_15m > 50:
+        c2, c2_intensity = "✓", "ALCISTA"
+    else:
+        c2, c2_intensity = "○", "BAJISTA"
+
+    # EMA con intensidad
+    ema_diff = ((data.get('ema_fast', 0) - data.get('ema_slow', 0)) / data.get('ema_slow', 1)) * 100 if data.get('ema_slow', 0) > 0 else 0
+    if ema_diff > 0.5:
+        c3, c3_intensity = "🟢", "FUERTE"
+    elif ema_diff > 0:
+        c3, c3_intensity = "✓", "ALCISTA"
+    else:
+        c3, c3_intensity = "○", "BAJISTA"
+
+    # Volumen con intensidad
+    if vol_ratio > 2.0:
+        c4, c4_intensity = "🟢", "EXPLOSIVO"
+    elif vol_ratio > 1.5:
+        c4, c4_intensity = "🟢", "ALTO"
+    elif vol_ratio > 1.2:
+        c4, c4_intensity = "✓", "ELEVADO"
+    else:
+        c4, c4_intensity = "○", "BAJO"
+
+    # Score con intensidad - NUEVO SISTEMA
+    if score >= 95:
+        c5, c5_intensity = "🔥", "PREMIUM"
+    elif score >= 90:
+        c5, c5_intensity = "🟢", "EXCELENTE"
+    elif score >= 80:
+        c5, c5_intensity = "✓", "BUENO"
+    elif score >= 70:
+        c5, c5_intensity = "⚠️", "REGULAR"
+    else:
+        c5, c5_intensity = "○", "DÉBIL"
+
+    # Precio vs EMA con intensidad
+    price_ema_diff = ((price - data.get('ema_fast', 0)) / data.get('ema_fast', 1)) * 100 if data.get('ema_fast', 0) > 0 else 0
+    if price_ema_diff > 1.0:
+        c6, c6_intensity = "🟢", "FUERTE"
+    elif price_ema_diff > 0:
+        c6, c6_intensity = "✓", "POSITIVO"
+    else:
+        c6, c6_intensity = "○", "NEGATIVO"
+
+    # Vela con intensidad
+    if candle_change > 0.5:
+        c7, c7_intensity = "🟢", "FUERTE"
+    elif candle_change > 0.1:
+        c7, c7_intensity = "✓", "POSITIVA"
+    else:
+        c7, c7_intensity = "○", "DÉBIL"
+
+    # Ruptura con intensidad
+    if vol_ratio > 1.5 and candle_change > 0.3:
+        c8, c8_intensity = "🟢", "EXPLOSIVA"
+    elif vol_ratio > 1.2 and candle_change > 0.1:
+        c8, c8_intensity = "✓", "BUENA"
+    else:
+        c8, c8_intensity = "○", "DÉBIL"
+
+    count = [c1,c2,c3,c4,c5,c6,c7,c8].count("✓")
+
+    # PROGRESS BAR CON NUEVO SISTEMA DE SCORING
+    base_percentage = (count / 8) * 100  # Base: criterios cumplidos
+    bonus_points = max(0, score - 80) if score >= 80 else 0  # Bonus si score ≥ 80
+    progress_percentage = min(100, base_percentage + bonus_points)  # Máximo 100%
+
+    # Sistema de badges PROFESIONAL para máxima precisión
+    if score >= 90:                    # 90%+ = ULTRA-PREMIUM (Solo estos envían email sin límites)
+        signal = "🔥 ULTRA-PREMIUM"
+        signal_class = "signal-premium"
+    elif score >= 80:                  # 80-89% = PREMIUM (Solo estos envían email)
+        signal = "⭐ PREMIUM"
+        signal_class = "signal-excellent"
+    elif score >= 70:                  # 70-79% = FUERTE (No envían email)
+        signal = "✅ FUERTE"
+        signal_class = "signal-strong"
+    elif score >= 60:                  # 60-69% = BUENA (No envían email)
+        signal = "💡 BUENA"
+        signal_class = "signal-good"
+    elif score >= 50:                  # 50-59% = REGULAR (No envían email)
+        signal = "⚠️ REGULAR"
+        signal_class = "signal-regular"
+    elif score >= 40:                  # 40-49% = DÉBIL
+        signal = "⏳ DÉBIL"
+        signal_class = "signal-weak"
+    else:                               # 0-39% = NO OPERAR
+        signal = "❌ NO OPERAR"
+        signal_class = "signal-no"
+
+    # Datos de cambios de precio
+    price_24h_change_percent = data.get('price_24h_change_percent', 0)
+    price_24h_change_amount = data.get('price_24h_change_amount', 0)
+    price_change_percent = data.get('price_change_percent', 0)
+    price_change_amount = data.get('price_change_amount', 0)
+
+    # Iconos y colores para cambios
+    change_24h_icon = "📈" if price_24h_change_percent >= 0 else "📉"
+    change_24h_color = "#22c55e" if price_24h_change_percent >= 0 else "#ef4444"
+    change_now_icon = "🔼" if price_change_percent >= 0 else "🔽"
+    change_now_color = "#22c55e" if price_change_percent >= 0 else "#ef4444"
+
+    return f"""
+        <tr class="crypto-row" id="row-{symbol}">
             <td class="crypto-cell">
                 <span class="crypto-icon" style="color:{color}">{icon}</span>
                 <span class="crypto-name" style="color:{color}">{name}</span>
@@ -212,7 +217,19 @@ def generate_dashboard_html(market_data, last_signals, signal_count, bot_running
             </td>
         </tr>"""
 
-    return f"""<!DOCTYPE html>
+def generate_dashboard_html(market_data, last_signals, signal_count, bot_running, last_analysis_time, using_simulation, email_status):
+    """Dashboard limpio con diseño profesional"""
+    from version_info import get_version_badge
+
+    # Generar filas de cryptos (fragmentos que la plantilla une en un solo join)
+    crypto_rows = []
+    for symbol, data in market_data.items():
+        crypto_rows.append(render_crypto_row(symbol, data))
+
+    return DASHBOARD_TEMPLATE.render(crypto_rows=crypto_rows, version_badge=get_version_badge())
+
+# Página completa compilada al importar el módulo; por petición solo se rellenan las filas y el badge
+DASHBOARD_TEMPLATE = PageTemplate("""<!DOCTYPE html>
 <html><head>
 <title>🚀 Trading Dashboard</title>
 <meta name="viewport" content="width=device-width, initial-scale=1">
@@ -520,7 +537,7 @@ body {{
     <th></th>
 </tr>
 </thead>
-<tbody>
+<tbody id="cryptoRows">
 {crypto_rows}
 </tbody>
 </table>
@@ -538,24 +555,50 @@ function hideRefreshIndicator() {{
     refreshIndicator.classList.remove('active');
 }}
 
-// Auto-refresh con indicador
-setInterval(() => {{
+// Feed en vivo (/stream): solo llegan las filas que cambian, sin recargar la página
+function applyRow(update) {{
+    const row = document.getElementById('row-' + update.symbol);
+    if (row) {{
+        row.outerHTML = update.row;
+    }} else {{
+        document.getElementById('cryptoRows').insertAdjacentHTML('beforeend', update.row);
+    }}
+}}
+
+function showSignal(signal) {{
+    const text = refreshIndicator.querySelector('.refresh-text');
+    text.textContent = `🔔 ${{signal.symbol}} ${{String(signal.signal_type).toUpperCase()}} (${{signal.score}})`;
     showRefreshIndicator();
-    fetch('/api/data')
-        .then(r => r.json())
-        .then(data => {{
-            if(data.market_data) {{
-                setTimeout(() => {{
-                    location.reload();
-                }}, 1000); // Mostrar indicador por 1 segundo
-            }} else {{
-                hideRefreshIndicator();
-            }}
-        }})
-        .catch(() => {{
-            hideRefreshIndicator();
-        }});
-}}, 30000);
+    setTimeout(() => {{
+        hideRefreshIndicator();
+        text.textContent = 'Actualizando...';
+    }}, 5000);
+}}
+
+function startReloading() {{
+    setInterval(() => {{
+        showRefreshIndicator();
+        setTimeout(() => location.reload(), 1000);
+    }}, 30000);
+}}
+
+if (window.EventSource) {{
+    const feed = new EventSource('/stream?topics=market,signals');
+    feed.addEventListener('snapshot', e => JSON.parse(e.data).forEach(applyRow));
+    feed.addEventListener('market', e => {{
+        showRefreshIndicator();
+        applyRow(JSON.parse(e.data));
+        setTimeout(hideRefreshIndicator, 500);
+    }});
+    feed.addEventListener('signal', e => showSignal(JSON.parse(e.data)));
+    // El servidor rechazó el feed (503 sin hilos): recarga completa como antes
+    feed.onerror = () => {{
+        if (feed.readyState === EventSource.CLOSED) startReloading();
+    }};
+}} else {{
+    // Navegadores sin EventSource: recarga completa como antes
+    startReloading();
+}}
 
 // Mostrar indicador al cargar la página
 window.addEventListener('load', () => {{
@@ -587,6 +630,6 @@ if (tableContainer && scrollIndicator) {{
 </script>
 
 <!-- Badge de versión automático -->
-{get_version_badge()}
+{version_badge}
 
-</body></html>"""
\ No newline at end of file
+</body></html>""")
\ No newline at end of file
@@ -0,0 +1,169 @@
+# db_manager.py - Conexiones SQLite compartidas para la base de datos de rendimiento
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "trading_performance.db"
+
+class ManagedConnection(sqlite3.Connection):
+    """sqlite3.Connection con referencias débiles (el registro de DatabaseManager no la mantiene viva)"""
+
+class DatabaseManager:
+    """Conexiones SQLite persistentes por hilo (WAL, synchronous=NORMAL y busy-timeout)
+
+    Cada hilo reutiliza su propia conexión por base de datos, así que no hay coste de
+    connect por operación y el caché de sentencias de sqlite3 mantiene preparadas las
+    INSERT/UPDATE frecuentes. Con WAL las lecturas del dashboard no bloquean la escritura
+    de señales del hilo de trading (y viceversa). Las conexiones de un hilo se cierran
+    cuando el hilo termina (el servidor de desarrollo usa un hilo por petición).
+    """
+
+    def __init__(self, busy_timeout_ms: int = 5000, cached_statements: int = 256):
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._inherited = []     # Conexiones del proceso padre tras un fork (no se usan ni se cierran)
+        self._reset_state()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset_state(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}   # db_path -> WeakSet de conexiones abiertas (todos los hilos vivos)
+        self._generation = {}    # db_path -> generación; close_all la incrementa
+
+    def _after_fork(self):
+        """Un proceso hijo (p.ej. workers del backtester) abre sus propias conexiones"""
+        for conns in self._connections.values():
+            self._inherited.extend(conns)
+        self._reset_state()
+
+    def _key(self, db_path: str) -> str:
+        return os.path.abspath(db_path)
+
+    def _open(self, db_path: str) -> sqlite3.Connection:
+        """Abre una conexión nueva con los PRAGMAs de rendimiento"""
+        conn = sqlite3.connect(
+            db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,  # Solo la usa su hilo; close_all y el fin del hilo la cierran desde otro
+            factory=ManagedConnection
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ No se pudo activar WAL en {db_path}: {e}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def get_connection(self, db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+        """Conexión del hilo actual para db_path (se crea la primera vez)"""
+        key = self._key(db_path)
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+            weakref.finalize(threading.current_thread(), self._close_thread, conns, os.getpid())
+
+        with self._lock:
+            generation = self._generation.get(key, 0)
+
+        entry = conns.get(key)
+        if entry and entry[0] == generation:
+            return entry[1]
+
+        conn = self._open(db_path)
+        with self._lock:
+            if self._generation.get(key, 0) != generation:
+                # close_all concurrente: reintentar con la nueva generación
+                conn.close()
+                return self.get_connection(db_path)
+            self._connections.setdefault(key, weakref.WeakSet()).add(conn)
+        conns[key] = (generation, conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, db_path: str = DEFAULT_DB_PATH):
+        """Cursor dentro de una transacción: commit al salir, rollback si hay excepción"""
+        conn = self.get_connection(db_path)
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def cursor(self, db_path: str = DEFAULT_DB_PATH):
+        """Cursor de solo lectura (sin transacción abierta al terminar)"""
+        conn = self.get_connection(db_path)
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            if conn.in_transaction:
+                conn.rollback()
+
+    def close_all(self, db_path: str = None):
+        """Cierra las conexiones de todos los hilos (de db_path o de todas las bases)"""
+        with self._lock:
+            keys = [self._key(db_path)] if db_path else list(self._connections)
+            closing = []
+            for key in keys:
+                self._generation[key] = self._generation.get(key, 0) + 1
+                closing.extend(self._connections.pop(key, ()))
+
+        for conn in closing:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error cerrando conexión SQLite: {e}")
+
+    def _close_thread(self, conns: dict, pid: int):
+        """Cierra las conexiones de un hilo que ha terminado"""
+        if os.getpid() != pid:
+            # Hilo del padre descartado tras un fork: sus conexiones no se cierran en el hijo
+            self._inherited.extend(conn for _, conn in conns.values())
+            return
+        with self._lock:
+            for key, (_, conn) in conns.items():
+                if key in self._connections:
+                    self._connections[key].discard(conn)
+        for _, conn in conns.values():
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error cerrando conexión SQLite: {e}")
+        conns.clear()
+
+    def remove_database(self, db_path: str = DEFAULT_DB_PATH):
+        """Cierra las conexiones y borra la base de datos junto con sus ficheros WAL"""
+        self.close_all(db_path)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+# Instancia global
+db_manager = DatabaseManager()
+
+def get_connection(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """Función helper para obtener la conexión del hilo actual"""
+    return db_manager.get_connection(db_path)
+
+def transaction(db_path: str = DEFAULT_DB_PATH):
+    """Función helper para abrir una transacción"""
+    return db_manager.transaction(db_path)
+
+def read_cursor(db_path: str = DEFAULT_DB_PATH):
+    """Función helper para obtener un cursor de lectura"""
+    return db_manager.cursor(db_path)
@@ -1,67 +1,148 @@
 # email_service.py - Servicio de envío de emails
+import time
 import smtplib
 import logging
+import threading
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List
+
+from config import Config
+from page_templates import PageTemplate
 
 logger = logging.getLogger(__name__)
 
+# Errores que no se arreglan reintentando (credenciales, direcciones rechazadas)
+PERMANENT_SMTP_ERRORS = (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
 class EmailService:
-    def __init__(self, email_from: str, email_password: str, email_to: str):
+    """Cliente SMTP con una conexión autenticada persistente (se reabre si el servidor la cierra)"""
+
+    def __init__(self, email_from: str, email_password: str, email_to: str,
+                 smtp_server: str = "smtp.gmail.com", smtp_port: int = 587, security: str = "starttls",
+                 timeout: float = 15):
         self.email_from = email_from
         self.email_password = email_password
         self.email_to = email_to
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
-    
-    def send_email(self, subject: str, plain_text: str, html_text: str = None) -> bool:
-        """Envía un email con texto plano y HTML"""
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.security = security  # ssl (SMTP sobre TLS, puerto 465) | starttls (587) | none
+        self.timeout = timeout
+        self._server = None
+        self._lock = threading.Lock()
+        self.connections = 0  # Handshakes completos (conexión + TLS + login)
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    def build_message(self, subject: str, plain_text: str, html_text: str = None) -> MIMEMultipart:
+        """Mensaje multipart con texto plano y HTML"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.email_from
+        msg['To'] = self.email_to
+
+        # Agregar texto plano
+        part1 = MIMEText(plain_text, 'plain', 'utf-8')
+        msg.attach(part1)
+
+        # Agregar HTML si está disponible
+        if html_text:
+            part2 = MIMEText(html_text, 'html', 'utf-8')
+            msg.attach(part2)
+        return msg
+
+    def connect(self) -> smtplib.SMTP:
+        """Abre y autentica una conexión nueva"""
+        smtp_class = smtplib.SMTP_SSL if self.security == "ssl" else smtplib.SMTP
+        server = smtp_class(self.smtp_server, self.smtp_port, timeout=self.timeout)
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.email_from
-            msg['To'] = self.email_to
-            
-            # Agregar texto plano
-            part1 = MIMEText(plain_text, 'plain', 'utf-8')
-            msg.attach(part1)
-            
-            # Agregar HTML si está disponible
-            if html_text:
-                part2 = MIMEText(html_text, 'html', 'utf-8')
-                msg.attach(part2)
-            
-            # Enviar email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            if self.security == "starttls":
                 server.starttls()
-                server.login(self.email_from, self.email_password)
-                server.send_message(msg)
-            
+            server.login(self.email_from, self.email_password)
+        except Exception:
+            server.close()
+            raise
+        self.connections += 1
+        return server
+
+    def close(self):
+        """Cierra la conexión persistente (se reabre en el próximo envío)"""
+        with self._lock:
+            server, self._server = self._server, None
+        if server:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def deliver(self, msg: MIMEMultipart):
+        """Envía por la conexión persistente; si el servidor la cerró, reconecta una vez. Lanza si falla"""
+        with self._lock:
+            for attempt in range(2):
+                if self._server is None:
+                    self._server = self.connect()
+                try:
+                    self._server.send_message(msg)
+                    return
+                except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                    raise  # El servidor respondió: la sesión sigue siendo válida
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    # Conexión caducada o rota: se descarta y se reintenta una vez con una nueva
+                    self._server.close()
+                    self._server = None
+                    if attempt:
+                        raise
+
+    def send_with_retries(self, subject: str, plain_text: str, html_text: str = None,
+                          max_retries: int = 3, backoff: float = 2.0):
+        """Envía reintentando los fallos temporales con backoff exponencial. Lanza si no se pudo enviar"""
+        msg = self.build_message(subject, plain_text, html_text)
+        for attempt in range(max_retries + 1):
+            try:
+                self.deliver(msg)
+                self.sent += 1
+                logger.info(f"✅ Email enviado: {subject}")
+                return
+            except PERMANENT_SMTP_ERRORS:
+                self.failed += 1
+                raise  # Credenciales o direcciones: reintentar no lo arregla
+            except Exception as e:
+                if attempt == max_retries:
+                    self.failed += 1
+                    raise
+                delay = backoff * 2 ** attempt
+                self.retries += 1
+                logger.warning(f"⚠️ Error enviando email ({e}) - reintento en {delay:g}s")
+                time.sleep(delay)
+
+    def send_email(self, subject: str, plain_text: str, html_text: str = None) -> bool:
+        """Envía un email con texto plano y HTML (síncrono)"""
+        try:
+            self.deliver(self.build_message(subject, plain_text, html_text))
             logger.info(f"✅ Email enviado: {subject}")
             return True
-            
+
         except Exception as e:
             logger.error(f"❌ Error enviando email: {e}")
             return False
-    
+
     def test_connection(self) -> bool:
         """Prueba la conexión SMTP"""
         try:
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_from, self.email_password)
+            self.connect().quit()
             return True
         except:
             return False
 
-def create_professional_email(signal_type: str, symbol: str, price: float,
-                            rsi: float, rsi_15m: float, ema_fast: float,
-                            ema_slow: float, volume: float, vol_avg: float,
-                            confidence_score: int, atr_val: float,
-                            candle_change_percent: float, conditions: Dict,
-                            price_targets: Optional[Dict] = None) -> tuple:
-    """Crea email HTML profesional con los 8 criterios reales"""
+def signal_email_context(signal_type: str, symbol: str, price: float,
+                         rsi: float, rsi_15m: float, ema_fast: float,
+                         ema_slow: float, volume: float, vol_avg: float,
+                         confidence_score: int, atr_val: float,
+                         candle_change_percent: float, conditions: Dict,
+                         price_targets: Optional[Dict] = None) -> Dict:
+    """Valores derivados de una señal comunes al email individual y al resumen (digest)"""
 
     # Colores según el tipo de señal
     if signal_type == "buy":
@@ -129,6 +210,31 @@ def create_professional_email(signal_type: str, symbol: str, price: float,
     else:
         recommendation = "📊 INFORMACIÓN: Señal de venta detectada para análisis."
     
+    return {
+        "color": color, "emoji": emoji, "action": action, "binance_url": binance_url,
+        "criteria_status": criteria_status, "fulfilled_count": fulfilled_count, "total_count": total_count,
+        "market_strength": market_strength, "confidence_level": confidence_level,
+        "recommendation": recommendation
+    }
+
+def create_professional_email(signal_type: str, symbol: str, price: float,
+                            rsi: float, rsi_15m: float, ema_fast: float,
+                            ema_slow: float, volume: float, vol_avg: float,
+                            confidence_score: int, atr_val: float,
+                            candle_change_percent: float, conditions: Dict,
+                            price_targets: Optional[Dict] = None) -> tuple:
+    """Crea email HTML profesional con los 8 criterios reales"""
+
+    context = signal_email_context(
+        signal_type, symbol, price, rsi, rsi_15m, ema_fast, ema_slow, volume, vol_avg,
+        confidence_score, atr_val, candle_change_percent, conditions, price_targets
+    )
+    color, emoji, action = context["color"], context["emoji"], context["action"]
+    binance_url, criteria_status = context["binance_url"], context["criteria_status"]
+    fulfilled_count, total_count = context["fulfilled_count"], context["total_count"]
+    market_strength, confidence_level = context["market_strength"], context["confidence_level"]
+    recommendation = context["recommendation"]
+    
     # Texto plano
     plain_text = f"""
 {emoji} SEÑAL DE {action} - {symbol}
@@ -297,24 +403,274 @@ def create_professional_email(signal_type: str, symbol: str, price: float,
     
     return plain_text, html_text
 
+# Resumen de varias señales en un solo email: cabecera, estilos y pie se compilan una vez al importar
+DIGEST_TEMPLATE = PageTemplate("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; }}
+            .container {{ max-width: 600px; margin: 0 auto; background: white; border-radius: 10px; overflow: hidden; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }}
+            .header {{ background: #343a40; color: white; padding: 20px; text-align: center; }}
+            .header h1 {{ margin: 0; font-size: 24px; }}
+            .content {{ padding: 20px; }}
+            .summary {{ width: 100%; border-collapse: collapse; margin: 10px 0 20px; font-size: 14px; }}
+            .summary th, .summary td {{ padding: 8px; border-bottom: 1px solid #dee2e6; text-align: left; }}
+            .signal {{ border: 2px solid #dee2e6; border-radius: 10px; margin: 20px 0; overflow: hidden; }}
+            .signal h2 {{ margin: 0; padding: 12px 15px; color: white; font-size: 18px; }}
+            .signal .body {{ padding: 15px; }}
+            .metrics {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 10px; margin: 10px 0; }}
+            .metric {{ background: #f8f9fa; padding: 10px; border-radius: 8px; text-align: center; border: 1px solid #dee2e6; }}
+            .metric-value {{ font-size: 16px; font-weight: bold; }}
+            .metric-label {{ font-size: 11px; color: #6c757d; margin-top: 3px; }}
+            .condition {{ margin: 4px 0; padding: 6px; background: #f8f9fa; border-radius: 5px; font-size: 13px; }}
+            .targets {{ margin: 10px 0; font-size: 14px; }}
+            .binance {{ display: inline-block; background: #f0b90b; color: #000; padding: 10px 20px; text-decoration: none; border-radius: 8px; font-weight: bold; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>📬 {signal_count} SEÑALES</h1>
+                <div>{time_range}</div>
+            </div>
+
+            <div class="content">
+                <table class="summary">
+                    <tr><th>Señal</th><th>Precio</th><th>Score</th><th>Fuerza</th></tr>
+                    {summary_rows}
+                </table>
+
+                {signal_cards}
+
+                <div style="background: #fff3cd; border: 1px solid #ffeaa7; padding: 20px; border-radius: 10px; margin: 20px 0;">
+                    <h4 style="margin-top: 0; color: #856404;">⚠️ IMPORTANTE - GESTIÓN DE RIESGO</h4>
+                    <ul style="margin: 10px 0; padding-left: 20px; color: #856404;">
+                        <li><strong>Nunca inviertas más del 2-5%</strong> de tu capital en una sola operación</li>
+                        <li><strong>Usa siempre Stop Loss</strong> según los niveles calculados</li>
+                        <li><strong>Confirma la señal</strong> con tu propio análisis antes de operar</li>
+                        <li><strong>Este sistema es educativo</strong> - No es consejo financiero</li>
+                    </ul>
+                    <div style="text-align: center; margin-top: 15px; font-size: 12px; color: #6c757d;">
+                        📚 Aprende más en: <a href="http://127.0.0.1:8000/instructions">Guía de Trading</a>
+                    </div>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+def create_digest_email(signals: List[Dict], times: List[datetime] = None) -> tuple:
+    """(subject, texto plano, HTML) de un único email con varias señales (kwargs de create_professional_email)"""
+    summary_rows, signal_cards, plain_sections = [], [], []
+    for signal in signals:
+        context = signal_email_context(**signal)
+        color, emoji, action = context["color"], context["emoji"], context["action"]
+        symbol, price, score = signal["symbol"], signal["price"], signal["confidence_score"]
+        targets = signal.get("price_targets")
+        volume_ratio = signal["volume"] / signal["vol_avg"] if signal["vol_avg"] else 0
+        targets_text = (f'🟢 TP ${targets["take_profit"]:,.2f} (+{targets["expected_move_percent"]:.1f}%) · '
+                        f'🔴 SL ${targets["stop_loss"]:,.2f} (-{targets["risk_percent"]:.1f}%) · '
+                        f'⚖️ R/R 1:{targets["risk_reward_ratio"]:.1f}') if targets else "Objetivos no calculados"
+
+        summary_rows.append(
+            f'<tr><td style="color: {color}; font-weight: bold;">{emoji} {action} {symbol}</td>'
+            f'<td>${price:,.2f}</td><td>{score}/100</td>'
+            f'<td>{context["market_strength"]} ({context["fulfilled_count"]}/{context["total_count"]})</td></tr>'
+        )
+        signal_cards.append(f"""
+                <div class="signal" style="border-color: {color};">
+                    <h2 style="background: {color};">{emoji} {action} - {symbol} · ${price:,.2f} ({signal["candle_change_percent"]:+.2f}%)</h2>
+                    <div class="body">
+                        <div class="metrics">
+                            <div class="metric"><div class="metric-value" style="color: {color};">{signal["rsi"]:.1f}</div><div class="metric-label">RSI 1m</div></div>
+                            <div class="metric"><div class="metric-value" style="color: {color};">{signal["rsi_15m"]:.1f}</div><div class="metric-label">RSI 15m</div></div>
+                            <div class="metric"><div class="metric-value" style="color: {color};">{volume_ratio:.1f}x</div><div class="metric-label">Volumen</div></div>
+                            <div class="metric"><div class="metric-value" style="color: {color};">{score}/100</div><div class="metric-label">Score</div></div>
+                        </div>
+                        {''.join(f'<div class="condition">{criterion}</div>' for criterion in context["criteria_status"])}
+                        <p><strong>{context["recommendation"]}</strong></p>
+                        <div class="targets">{targets_text}</div>
+                        <a class="binance" href="{context["binance_url"]}" target="_blank">🔗 Abrir {symbol} en Binance</a>
+                    </div>
+                </div>""")
+        plain_sections.append(f"""{emoji} {action} - {symbol}
+💰 Precio: ${price:,.2f} ({signal["candle_change_percent"]:+.2f}%) · 🎯 Score: {score}/100
+📊 RSI: {signal["rsi"]:.1f} (15m: {signal["rsi_15m"]:.1f}) · 📦 Volumen: {volume_ratio:.1f}x · 🛡️ ATR: {signal["atr_val"]:.2f}
+• Fuerza de señal: {context["market_strength"]} ({context["fulfilled_count"]}/{context["total_count"]} criterios)
+{chr(10).join(context["criteria_status"])}
+{context["recommendation"]}
+🎯 {targets_text}
+🔗 Binance: {context["binance_url"]}""")
+
+    time_range = f"{min(times):%H:%M:%S} - {max(times):%H:%M:%S}" if times else ""
+    best = max(signals, key=lambda signal: signal["confidence_score"])
+    symbols = ", ".join(dict.fromkeys(signal["symbol"] for signal in signals))
+    subject = f"📬 {len(signals)} señales - {symbols} (máx. {best['confidence_score']}/100)"
+
+    plain_text = f"""
+📬 {len(signals)} SEÑALES {time_range}
+
+{(chr(10) * 2).join(plain_sections)}
+
+⚠️ Solo para fines educativos. Gestiona tu riesgo responsablemente.
+    """
+    html_text = DIGEST_TEMPLATE.render(
+        signal_count=len(signals), time_range=time_range, summary_rows=summary_rows, signal_cards=signal_cards
+    )
+    return subject, plain_text, html_text
+
+class SignalDigest:
+    """Agrupa en un solo email las señales aprobadas de un ciclo (window=0) o de una ventana de window segundos
+
+    Una sola sesión SMTP y un solo email del límite diario por grupo; ninguna señal se descarta.
+    Un grupo de una sola señal se envía con el email individual de siempre.
+
+    El grupo de cada señal lo decide quien publica, al publicarla (join/open/close), y viaja con el
+    evento; add, due, end_cycle y flush se llaman desde el hilo del canal smtp. send lanza si el
+    email no se pudo enviar.
+    """
+
+    def __init__(self, send: Callable[[str, str, str], None], window: float = 0):
+        self.send = send
+        self.window = window
+        self._lock = threading.Lock()
+        # Lado del publicador: grupo abierto al que se suman las señales nuevas
+        self._next_group = 0
+        self._open_group = None
+        self._opened_at = 0.0
+        # Lado del canal: señales recibidas del grupo en curso
+        self._group = None
+        self._pending = []  # [(hora, kwargs de create_professional_email)]
+        self._started_at = 0.0
+        self.digests_sent = 0
+        self.signals_sent = 0
+
+    def join(self) -> Optional[int]:
+        """Grupo abierto al que sumar otra señal sin gastar otro email (None si no hay)"""
+        with self._lock:
+            if self._open_group is None:
+                return None
+            if self.window > 0 and time.monotonic() - self._opened_at >= self.window:
+                self._open_group = None  # Ventana terminada
+                return None
+            return self._open_group
+
+    def open(self) -> int:
+        """Abre un grupo nuevo (un email del límite diario) y devuelve su id"""
+        with self._lock:
+            self._next_group += 1
+            self._open_group = self._next_group
+            self._opened_at = time.monotonic()
+            return self._open_group
+
+    def close(self, group: Optional[int] = None):
+        """Cierra el grupo indicado si sigue abierto, o sin grupo el del ciclo (window=0) al terminar el ciclo"""
+        with self._lock:
+            if group is None and self.window > 0:
+                return
+            if group is None or group == self._open_group:
+                self._open_group = None
+
+    def add(self, signal: Dict, group: Optional[int] = None):
+        """Suma la señal a su grupo; si es de un grupo nuevo envía antes el anterior"""
+        previous = []
+        with self._lock:
+            if group is not None and group != self._group:
+                previous, self._pending = self._pending, []
+                self._group = group
+            if not self._pending:
+                self._started_at = time.monotonic()
+            self._pending.append((datetime.now(), signal))
+        if previous:
+            self._send(previous)
+
+    def due(self) -> bool:
+        """True si la ventana del grupo pendiente ya terminó"""
+        with self._lock:
+            return self.window > 0 and bool(self._pending) and time.monotonic() - self._started_at >= self.window
+
+    def end_cycle(self) -> bool:
+        """Fin de un ciclo de análisis: envía el grupo si no se agrupa por ventana"""
+        return self.flush() if self.window <= 0 else False
+
+    def flush(self) -> bool:
+        """Envía el email del grupo pendiente (False si no había nada que enviar)"""
+        with self._lock:
+            signals, self._pending = self._pending, []
+        if not signals:
+            return False
+        self._send(signals)
+        return True
+
+    def _send(self, signals: List):
+        """Renderiza y envía un grupo de [(hora, señal)]"""
+        times, signals = [time for time, _ in signals], [signal for _, signal in signals]
+        if len(signals) == 1:
+            signal = signals[0]
+            subject = signal_subject(signal["signal_type"], signal["symbol"], signal["confidence_score"])
+            plain_text, html_text = create_professional_email(**signal)
+        else:
+            subject, plain_text, html_text = create_digest_email(signals, times)
+            logger.info(f"📬 {len(signals)} señales agrupadas en un email")
+
+        try:
+            self.send(subject, plain_text, html_text)
+        except Exception as e:
+            raise RuntimeError(f"resumen de {len(signals)} señales no enviado: {e}") from e
+        self.digests_sent += 1
+        self.signals_sent += len(signals)
+
+def signal_subject(signal_type: str, symbol: str, confidence_score: int) -> str:
+    """Subject con prioridad basada en score"""
+    action = "COMPRA" if signal_type == "buy" else "VENTA"
+    emoji = "🟢" if signal_type == "buy" else "🔴"
+
+    if confidence_score >= 95:
+        priority = "🔥 PREMIUM"
+    elif confidence_score >= 90:
+        priority = "⭐ EXCELENTE"
+    else:
+        priority = ""
+
+    return f"{emoji} {priority} {action} - {symbol} ({confidence_score}/100)"
+
 # Variables globales para el servicio de email
 email_service = None
+signal_digest = None  # Solo con EMAIL_DIGEST=true
 
-def initialize_email_service(email_from: str, email_password: str, email_to: str):
-    """Inicializa el servicio de email"""
-    global email_service
-    email_service = EmailService(email_from, email_password, email_to)
+def initialize_email_service(email_from: str, email_password: str, email_to: str, **smtp_options):
+    """Inicializa el servicio de email (lo usa el canal smtp de notifier, que envía desde su propio hilo)"""
+    global email_service, signal_digest
+    email_service = EmailService(email_from, email_password, email_to, **smtp_options)
+    if Config.EMAIL_DIGEST:
+        signal_digest = SignalDigest(send_with_retries, Config.EMAIL_DIGEST_WINDOW)
+
+def send_with_retries(subject: str, plain_text: str, html_text: str = None):
+    """Envía un email con los reintentos de Config (EMAIL_MAX_RETRIES, EMAIL_RETRY_BACKOFF). Lanza si falla"""
+    if not email_service:
+        raise RuntimeError("servicio de email no inicializado")
+    email_service.send_with_retries(subject, plain_text, html_text,
+                                    Config.EMAIL_MAX_RETRIES, Config.EMAIL_RETRY_BACKOFF)
 
 def send_signal_email(signal_type: str, symbol: str, price: float, 
                      rsi: float, rsi_15m: float, ema_fast: float, 
                      ema_slow: float, volume: float, vol_avg: float,
                      confidence_score: int, atr_val: float, 
                      candle_change_percent: float, conditions: Dict,
-                     price_targets: Optional[Dict] = None) -> bool:
-    """Envía email de señal de trading"""
-    if not email_service:
-        logger.warning("📧 Servicio de email no inicializado")
-        return False
+                     price_targets: Optional[Dict] = None, digest_group: Optional[int] = None):
+    """Envía el email de señal de trading, o lo suma al resumen digest_group (síncrono, lanza si falla)"""
+    if signal_digest:
+        # Se renderiza y envía junto con las demás señales del grupo
+        signal_digest.add(dict(
+            signal_type=signal_type, symbol=symbol, price=price, rsi=rsi, rsi_15m=rsi_15m,
+            ema_fast=ema_fast, ema_slow=ema_slow, volume=volume, vol_avg=vol_avg,
+            confidence_score=confidence_score, atr_val=atr_val,
+            candle_change_percent=candle_change_percent, conditions=conditions, price_targets=price_targets
+        ), digest_group)
+        return
     
     # Crear contenido del email
     plain_text, html_text = create_professional_email(
@@ -323,20 +679,49 @@ def send_signal_email(signal_type: str, symbol: str, price: float,
         conditions, price_targets
     )
     
-    # Crear subject con prioridad basada en score
-    action = "COMPRA" if signal_type == "buy" else "VENTA"
-    emoji = "🟢" if signal_type == "buy" else "🔴"
+    subject = signal_subject(signal_type, symbol, confidence_score)
+    
+    send_with_retries(subject, plain_text, html_text)
 
-    if confidence_score >= 95:
-        priority = "🔥 PREMIUM"
-    elif confidence_score >= 90:
-        priority = "⭐ EXCELENTE"
-    else:
-        priority = ""
+def join_signal_digest() -> Optional[int]:
+    """Resumen abierto al que se suma la próxima señal sin gastar otro email (None si no hay)"""
+    return signal_digest.join() if signal_digest else None
 
-    subject = f"{emoji} {priority} {action} - {symbol} ({confidence_score}/100)"
-    
-    return email_service.send_email(subject, plain_text, html_text)
+def open_signal_digest() -> Optional[int]:
+    """Abre un resumen nuevo para la próxima señal (None sin EMAIL_DIGEST)"""
+    return signal_digest.open() if signal_digest else None
+
+def close_signal_digest(group: Optional[int] = None):
+    """Cierra el resumen abierto: el del ciclo al terminar el ciclo, o group si su señal no se publicó"""
+    if signal_digest:
+        signal_digest.close(group)
+
+def end_signal_cycle() -> bool:
+    """Fin de un ciclo de análisis: envía el resumen de señales del ciclo (EMAIL_DIGEST sin ventana)"""
+    return signal_digest.end_cycle() if signal_digest else False
+
+def flush_due_signal_digest() -> bool:
+    """Envía el resumen cuya ventana (EMAIL_DIGEST_WINDOW) ya terminó"""
+    return signal_digest.flush() if signal_digest and signal_digest.due() else False
+
+def close_email_connection():
+    """Cierra la conexión SMTP persistente (se reabre con el próximo envío)"""
+    if email_service:
+        email_service.close()
+
+def get_email_stats() -> Optional[Dict]:
+    """Emails enviados, fallidos, reintentos y conexiones abiertas (None si el servicio no está inicializado)"""
+    if not email_service:
+        return None
+    stats = {
+        "sent": email_service.sent,
+        "failed": email_service.failed,
+        "retries": email_service.retries,
+        "connections": email_service.connections
+    }
+    if signal_digest:
+        stats.update(digests_sent=signal_digest.digests_sent, digest_signals=signal_digest.signals_sent)
+    return stats
 
 def test_email_connection() -> bool:
     """Prueba la conexión de email"""
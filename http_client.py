@@ -0,0 +1,117 @@
+# http_client.py - Transporte HTTP compartido: pool de conexiones keep-alive, timeouts, reintentos y HTTP/2 opcional
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import Config
+
+try:
+    import httpx  # httpx[http2], solo con HTTP_HTTP2=true
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Errores de servidor que se reintentan en el transporte (429/418 los gestiona BinanceAPI con su presupuesto de peso)
+RETRY_STATUSES = (500, 502, 503, 504)
+
+class HTTPTransport:
+    """Una sesión HTTP por proceso para Binance, webhooks y scripts
+
+    Cada host mantiene hasta pool_size conexiones abiertas (keep-alive) que se reutilizan entre
+    peticiones e hilos, así que solo la primera petición paga el TCP+TLS. Los GET se reintentan ante
+    errores de conexión y 5xx con backoff; un timeout numérico del llamador es el de lectura y el de
+    conexión es siempre connect_timeout. Con http2=True usa httpx (si está instalado) y multiplexa
+    las peticiones sobre una conexión por host.
+    """
+
+    def __init__(self, pool_size: int = 16, connect_timeout: float = 3.05, read_timeout: float = 10,
+                 retries: int = 2, retry_backoff: float = 0.3, http2: bool = False,
+                 user_agent: str = "ScalpingBot/1.0"):
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.user_agent = user_agent
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("⚠️ HTTP/2 no disponible (pip install 'httpx[http2]') - usando HTTP/1.1 keep-alive")
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """requests.Session (o httpx.Client con HTTP/2), creada en el primer uso"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        headers = {"User-Agent": self.user_agent}
+        if self.http2:
+            return httpx.Client(
+                http2=True, headers=headers,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                transport=httpx.HTTPTransport(http2=True, retries=self.retries)  # Reintenta solo la conexión
+            )
+
+        retry = Retry(
+            total=self.retries, connect=self.retries, read=self.retries, status=self.retries,
+            backoff_factor=self.retry_backoff, status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}), raise_on_status=False,
+            respect_retry_after_header=False  # Sin esto urllib3 reintentaría los 429 a espaldas de BinanceAPI
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(headers)
+        return session
+
+    def _timeout(self, timeout: Optional[float]):
+        read = self.read_timeout if timeout is None else timeout
+        if self.http2:
+            return httpx.Timeout(read, connect=self.connect_timeout)
+        return (self.connect_timeout, read)
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout: Optional[float] = None):
+        return self.session.get(url, params=params, timeout=self._timeout(timeout))
+
+    def post(self, url: str, data: bytes = None, headers: Optional[Dict] = None, timeout: Optional[float] = None):
+        if self.http2:
+            return self.session.post(url, content=data, headers=headers, timeout=self._timeout(timeout))
+        return self.session.post(url, data=data, headers=headers, timeout=self._timeout(timeout))
+
+    def close(self):
+        """Cierra las conexiones del pool (la siguiente petición abre una sesión nueva)"""
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+# Instancia global
+http_transport = HTTPTransport(
+    pool_size=Config.HTTP_POOL_SIZE,
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=Config.HTTP_READ_TIMEOUT,
+    retries=Config.HTTP_RETRIES,
+    retry_backoff=Config.HTTP_RETRY_BACKOFF,
+    http2=Config.HTTP_HTTP2
+)
+
+def http_get(url: str, params: Optional[Dict] = None, timeout: Optional[float] = None):
+    """Función helper para un GET por el transporte compartido"""
+    return http_transport.get(url, params=params, timeout=timeout)
+
+def http_post(url: str, data: bytes = None, headers: Optional[Dict] = None, timeout: Optional[float] = None):
+    """Función helper para un POST por el transporte compartido"""
+    return http_transport.post(url, data=data, headers=headers, timeout=timeout)
@@ -1,63 +1,157 @@
 # indicators.py - Cálculos de indicadores técnicos
+import math
 import numpy as np
+from collections import deque
+
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# === SERIES COMPLETAS (VECTORIZADAS) ===
+
+def _ewm(values, alpha, initial):
+    """Recursión y[t] = alpha * x[t] + (1 - alpha) * y[t-1] con y[-1] = initial, sin bucles por valor"""
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values.copy()
+
+    if SCIPY_AVAILABLE:
+        out, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * initial])
+        return out
+
+    decay = 1.0 - alpha
+    if decay <= 0:
+        return values.copy()
+
+    # Forma cerrada por bloques: y[k] = d^(k+1) * (y_prev + alpha * cumsum(x[j] / d^(j+1)))
+    # El tamaño de bloque evita que d^-k desborde la precisión
+    block = max(1, int(np.log(1e-8) / np.log(decay)))
+    out = np.empty_like(values)
+    prev = float(initial)
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out_chunk = powers * (prev + alpha * np.cumsum(chunk / powers))
+        out[start:start + len(chunk)] = out_chunk
+        prev = out_chunk[-1]
+    return out
+
+def _rolling_mean(values, period):
+    """Media móvil simple por sumas acumuladas; NaN hasta completar el periodo"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    out[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+    return out
+
+def calculate_true_range(highs, lows, closes):
+    """True Range de cada vela (desde la segunda), compartido por ATR y ADX"""
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
 
-def calculate_ema(prices, period):
-    """Calcula la Media Móvil Exponencial"""
-    if len(prices) < period:
-        return 0.0
+    tr1 = highs[1:] - lows[1:]
+    tr2 = np.abs(highs[1:] - closes[:-1])
+    tr3 = np.abs(lows[1:] - closes[:-1])
+    return np.maximum(tr1, np.maximum(tr2, tr3))
 
-    prices_array = np.array(prices, dtype=float)
+def calculate_ema_series(prices, period):
+    """Serie completa de la EMA (sembrada con el primer precio, igual que calculate_ema)"""
+    prices_array = np.asarray(prices, dtype=float)
+    if len(prices_array) == 0:
+        return prices_array.copy()
 
-    # Calcular EMA manualmente sin pandas
     alpha = 2.0 / (period + 1)
-    ema = prices_array[0]  # Primer valor
+    return np.concatenate(([prices_array[0]], _ewm(prices_array[1:], alpha, prices_array[0])))
+
+def calculate_rsi_series(prices, period=14):
+    """Serie completa del RSI de Wilder; NaN hasta tener period + 1 precios"""
+    prices_array = np.asarray(prices, dtype=float)
+    rsi = np.full(len(prices_array), np.nan)
+    if len(prices_array) < period + 1:
+        return rsi
+
+    deltas = np.diff(prices_array)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    # Semilla: media simple del primer periodo; después suavizado de Wilder (alpha = 1/period)
+    seed_gain = np.mean(gains[:period])
+    seed_loss = np.mean(losses[:period])
+    avg_gain = np.concatenate(([seed_gain], _ewm(gains[period:], 1.0 / period, seed_gain)))
+    avg_loss = np.concatenate(([seed_loss], _ewm(losses[period:], 1.0 / period, seed_loss)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - (100 / (1 + avg_gain / avg_loss))
+    rsi[period:] = np.where(avg_loss == 0, 100.0, values)
+    return rsi
+
+def calculate_atr_series(highs, lows, closes, period=14, true_range=None):
+    """Serie completa del ATR (media simple del True Range, igual que calculate_atr)"""
+    if true_range is None:
+        true_range = calculate_true_range(highs, lows, closes)
 
-    for price in prices_array[1:]:
-        ema = alpha * price + (1 - alpha) * ema
+    atr = np.full(len(true_range) + 1, np.nan)
+    atr[1:] = _rolling_mean(true_range, period)
+    return atr
+
+def calculate_adx_series(highs, lows, closes, period=14, true_range=None):
+    """Serie completa del ADX (misma fórmula que calculate_adx en cada vela)"""
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    if true_range is None:
+        true_range = calculate_true_range(highs, lows, closes)
+
+    up_move = highs[1:] - highs[:-1]
+    down_move = lows[:-1] - lows[1:]
+    dm_plus = np.where(up_move > down_move, np.maximum(up_move, 0), 0)
+    dm_minus = np.where(down_move > up_move, np.maximum(down_move, 0), 0)
+
+    tr_smooth = _rolling_mean(true_range, period)
+    dm_plus_smooth = _rolling_mean(dm_plus, period)
+    dm_minus_smooth = _rolling_mean(dm_minus, period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_plus = dm_plus_smooth / tr_smooth * 100
+        di_minus = dm_minus_smooth / tr_smooth * 100
+        dx = np.abs(di_plus - di_minus) / (di_plus + di_minus) * 100
+
+    # Mismo valor neutral (25) que calculate_adx cuando no hay movimiento
+    dx = np.where((tr_smooth == 0) | (di_plus + di_minus == 0), 25.0, dx)
+    dx = np.where(np.isnan(tr_smooth), np.nan, dx)
 
-    return ema
+    adx = np.full(len(true_range) + 1, np.nan)
+    adx[1:] = dx
+    return adx
+
+# === VALORES ACTUALES (ÚLTIMA VELA) ===
+
+def calculate_ema(prices, period):
+    """Calcula la Media Móvil Exponencial"""
+    if len(prices) < period:
+        return 0.0
+
+    return float(calculate_ema_series(prices, period)[-1])
 
 def calculate_rsi(prices, period=14):
     """Calcula el Índice de Fuerza Relativa"""
     if len(prices) < period + 1:
         return 50.0
-    
-    prices_array = np.array(prices, dtype=float)
-    deltas = np.diff(prices_array)
-    
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
-    
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    
-    for i in range(period, len(gains)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-    
-    if avg_loss == 0:
-        return 100.0
-    
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    
-    return rsi
 
-def calculate_atr(highs, lows, closes, period=14):
+    return float(calculate_rsi_series(prices, period)[-1])
+
+def calculate_atr(highs, lows, closes, period=14, true_range=None):
     """Calcula el Average True Range"""
     if len(highs) < period + 1:
         return 0.0
     
-    highs = np.array(highs, dtype=float)
-    lows = np.array(lows, dtype=float)
-    closes = np.array(closes, dtype=float)
-    
-    # True Range calculation
-    tr1 = highs[1:] - lows[1:]
-    tr2 = np.abs(highs[1:] - closes[:-1])
-    tr3 = np.abs(lows[1:] - closes[:-1])
-    
-    true_range = np.maximum(tr1, np.maximum(tr2, tr3))
+    # True Range calculation (se puede reutilizar entre ATR y ADX)
+    if true_range is None:
+        true_range = calculate_true_range(highs, lows, closes)
     
     if len(true_range) < period:
         return np.mean(true_range)
@@ -67,20 +161,17 @@ def calculate_atr(highs, lows, closes, period=14):
     
     return atr
 
-def calculate_adx(highs, lows, closes, period=14):
+def calculate_adx(highs, lows, closes, period=14, true_range=None):
     """Calcula el Average Directional Index"""
     if len(highs) < period + 1:
         return 0.0
     
     highs = np.array(highs, dtype=float)
     lows = np.array(lows, dtype=float)
-    closes = np.array(closes, dtype=float)
     
-    # Calculate True Range
-    tr1 = highs[1:] - lows[1:]
-    tr2 = np.abs(highs[1:] - closes[:-1])
-    tr3 = np.abs(lows[1:] - closes[:-1])
-    true_range = np.maximum(tr1, np.maximum(tr2, tr3))
+    # Calculate True Range (compartido con ATR si se pasa)
+    if true_range is None:
+        true_range = calculate_true_range(highs, lows, closes)
     
     # Calculate Directional Movement
     dm_plus = np.where((highs[1:] - highs[:-1]) > (lows[:-1] - lows[1:]), 
@@ -119,6 +210,219 @@ def calculate_volume_sma(volumes, period=20):
     volumes_array = np.array(volumes, dtype=float)
     return np.mean(volumes_array[-period:])
 
+# === ESTADOS INCREMENTALES (O(1) POR VELA) ===
+# update() consolida una vela cerrada; peek() calcula el valor incluyendo la vela
+# abierta sin modificar el estado. Ambos reproducen las funciones calculate_*.
+
+def _true_range_value(high, low, prev_close):
+    """True Range de una vela respecto al cierre anterior"""
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+class RollingMeanState:
+    """Media móvil simple con suma acumulada"""
+    __slots__ = ("period", "window", "total", "_updates")
+
+    def __init__(self, period):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.window = deque(maxlen=self.period)
+        self.total = 0.0
+        self._updates = 0
+
+    def seed(self, values):
+        """Re-siembra el estado desde un histórico"""
+        self.reset()
+        for value in values:
+            self.update(value)
+        return self
+
+    def update(self, value):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+
+        # Recalcular la suma de vez en cuando para evitar deriva de coma flotante
+        self._updates += 1
+        if self._updates % 1000 == 0:
+            self.total = math.fsum(self.window)
+
+    def peek(self, value):
+        if len(self.window) == self.period:
+            return (self.total - self.window[0] + value) / self.period
+        return (self.total + value) / (len(self.window) + 1)
+
+    @property
+    def count(self):
+        return len(self.window)
+
+class EmaState:
+    """EMA sembrada con el primer precio (igual que calculate_ema)"""
+    __slots__ = ("period", "alpha", "value", "count")
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.count = 0
+
+    def seed(self, prices):
+        """Re-siembra el estado desde un histórico"""
+        self.reset()
+        for price in prices:
+            self.update(price)
+        return self
+
+    def update(self, price):
+        self.value = price if self.value is None else self.alpha * price + (1 - self.alpha) * self.value
+        self.count += 1
+
+    def peek(self, price):
+        if self.count + 1 < self.period:
+            return 0.0
+        if self.value is None:
+            return price
+        return self.alpha * price + (1 - self.alpha) * self.value
+
+class WilderRsiState:
+    """RSI de Wilder (igual que calculate_rsi)"""
+    __slots__ = ("period", "prev_close", "avg_gain", "avg_loss", "count")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prev_close = None
+        self.avg_gain = 0.0  # Suma de ganancias mientras count < period
+        self.avg_loss = 0.0
+        self.count = 0       # Número de variaciones procesadas
+
+    def seed(self, prices):
+        """Re-siembra el estado desde un histórico"""
+        self.reset()
+        for price in prices:
+            self.update(price)
+        return self
+
+    def _next(self, price):
+        """Medias tras añadir un precio (sin modificar el estado)"""
+        delta = price - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        count = self.count + 1
+
+        if count < self.period:
+            return self.avg_gain + gain, self.avg_loss + loss, count
+        if count == self.period:
+            return (self.avg_gain + gain) / self.period, (self.avg_loss + loss) / self.period, count
+        return ((self.avg_gain * (self.period - 1) + gain) / self.period,
+                (self.avg_loss * (self.period - 1) + loss) / self.period, count)
+
+    def update(self, price):
+        if self.prev_close is not None:
+            self.avg_gain, self.avg_loss, self.count = self._next(price)
+        self.prev_close = price
+
+    def peek(self, price):
+        if self.prev_close is None:
+            return 50.0
+        avg_gain, avg_loss, count = self._next(price)
+        if count < self.period:
+            return 50.0
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+class AtrState:
+    """ATR como media simple del True Range (igual que calculate_atr)"""
+    __slots__ = ("period", "prev_close", "tr_mean")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.tr_mean = RollingMeanState(period)
+        self.reset()
+
+    def reset(self):
+        self.prev_close = None
+        self.tr_mean.reset()
+
+    def seed(self, highs, lows, closes):
+        """Re-siembra el estado desde un histórico"""
+        self.reset()
+        for high, low, close in zip(highs, lows, closes):
+            self.update(high, low, close)
+        return self
+
+    def update(self, high, low, close):
+        if self.prev_close is not None:
+            self.tr_mean.update(_true_range_value(high, low, self.prev_close))
+        self.prev_close = close
+
+    def peek(self, high, low, close):
+        if self.prev_close is None or self.tr_mean.count + 1 < self.period:
+            return 0.0
+        return self.tr_mean.peek(_true_range_value(high, low, self.prev_close))
+
+class AdxState:
+    """ADX con medias simples de TR y DM (igual que calculate_adx)"""
+    __slots__ = ("period", "prev_high", "prev_low", "prev_close", "tr_mean", "dm_plus_mean", "dm_minus_mean")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.tr_mean = RollingMeanState(period)
+        self.dm_plus_mean = RollingMeanState(period)
+        self.dm_minus_mean = RollingMeanState(period)
+        self.reset()
+
+    def reset(self):
+        self.prev_high = self.prev_low = self.prev_close = None
+        self.tr_mean.reset()
+        self.dm_plus_mean.reset()
+        self.dm_minus_mean.reset()
+
+    def seed(self, highs, lows, closes):
+        """Re-siembra el estado desde un histórico"""
+        self.reset()
+        for high, low, close in zip(highs, lows, closes):
+            self.update(high, low, close)
+        return self
+
+    def _movements(self, high, low):
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        dm_plus = max(up_move, 0) if up_move > down_move else 0
+        dm_minus = max(down_move, 0) if down_move > up_move else 0
+        return dm_plus, dm_minus
+
+    def update(self, high, low, close):
+        if self.prev_close is not None:
+            dm_plus, dm_minus = self._movements(high, low)
+            self.tr_mean.update(_true_range_value(high, low, self.prev_close))
+            self.dm_plus_mean.update(dm_plus)
+            self.dm_minus_mean.update(dm_minus)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+    def peek(self, high, low, close):
+        if self.prev_close is None or self.tr_mean.count + 1 < self.period:
+            return 0.0
+
+        dm_plus, dm_minus = self._movements(high, low)
+        tr_smooth = self.tr_mean.peek(_true_range_value(high, low, self.prev_close))
+        if tr_smooth == 0:
+            return 25.0
+
+        di_plus = self.dm_plus_mean.peek(dm_plus) / tr_smooth * 100
+        di_minus = self.dm_minus_mean.peek(dm_minus) / tr_smooth * 100
+        if (di_plus + di_minus) == 0:
+            return 25.0
+        return abs(di_plus - di_minus) / (di_plus + di_minus) * 100
+
 def calculate_confidence_score(rsi_1m, rsi_15m, volume_ratio, adx, macro_trend):
     """SISTEMA LEGACY - Mantenido por compatibilidad"""
     score = 0
@@ -244,7 +548,9 @@ def calculate_realistic_scalping_score(data):
 
     # 5. ⏰ TIMING Y LIQUIDEZ (10%) - Horarios óptimos
     try:
-        hour = datetime.now().hour
+        hour = data.get("hour")
+        if hour is None:
+            hour = datetime.now().hour
 
         # Horarios de alta liquidez y actividad
         if 8 <= hour <= 22:  # Horarios principales (Europa + América)
@@ -263,8 +569,8 @@ def calculate_realistic_scalping_score(data):
 
     return final_score
 
-def calculate_price_targets(current_price, atr_value, signal_type, symbol):
-    """Calcula objetivos de precio basados en ATR y volatilidad"""
+def calculate_price_targets(current_price, atr_value, signal_type, symbol, atr_multipliers=None):
+    """Calcula objetivos de precio basados en ATR y volatilidad (atr_multipliers=(tp, sl) los fija)"""
     
     # Multiplicadores según el tipo de par - ULTRA-CONSERVADORES para máximo win rate
     if symbol.startswith('BTC'):
@@ -276,6 +582,11 @@ def calculate_price_targets(current_price, atr_value, signal_type, symbol):
     else:  # SOL y otros
         atr_multiplier_tp = 2.0  # TP ultra-conservador (reducido de 2.5)
         atr_multiplier_sl = 1.0  # SL más ajustado (reducido de 1.2)
+
+    # Multiplicadores explícitos (backtest / optimizador de parámetros); None mantiene el del par
+    if atr_multipliers:
+        atr_multiplier_tp = atr_multipliers[0] or atr_multiplier_tp
+        atr_multiplier_sl = atr_multipliers[1] or atr_multiplier_sl
     
     if signal_type == "buy":
         # Para BUY: esperamos subida
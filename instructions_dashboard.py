@@ -1,9 +1,7 @@
 # instructions_dashboard.py - Dashboard educativo para principiantes
+from page_templates import PageTemplate
 
-def generate_instructions_dashboard():
-    """Genera el dashboard de instrucciones educativas"""
-    
-    return f"""
+INSTRUCTIONS_TEMPLATE = PageTemplate("""
     <!DOCTYPE html>
     <html lang="es">
     <head>
@@ -704,4 +702,11 @@ def generate_instructions_dashboard():
         </div>
     </body>
     </html>
-    """
+    """)
+
+# Página estática: se renderiza una sola vez al arrancar y se sirve desde memoria
+INSTRUCTIONS_HTML = INSTRUCTIONS_TEMPLATE.render()
+
+def generate_instructions_dashboard():
+    """Genera el dashboard de instrucciones educativas"""
+    return INSTRUCTIONS_HTML
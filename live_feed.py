@@ -0,0 +1,181 @@
+# live_feed.py - Feed en vivo por Server-Sent Events: deltas de mercado, señales nuevas y líneas de log
+import json
+import logging
+import math
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from config import Config
+from dashboard import render_crypto_row
+
+# Temas a los que se puede suscribir un cliente de /stream
+MARKET = "market"    # Campos que cambian por símbolo tras cada análisis (+ fila del dashboard ya renderizada)
+SIGNALS = "signals"  # Señales nuevas registradas
+LOGS = "logs"        # Líneas de log según se escriben
+TOPICS = (MARKET, SIGNALS, LOGS)
+
+def format_event(event: str, data) -> str:
+    """Mensaje SSE serializado una sola vez y compartido por todos los suscriptores"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def scalar_fields(data: Dict) -> Dict:
+    """Campos escalares de un símbolo listos para JSON (los criterios anidados viajan en la fila)"""
+    fields = {}
+    for key, value in data.items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            value = None
+        if value is None or isinstance(value, (bool, int, float, str)):
+            fields[key] = value
+    return fields
+
+class Subscription:
+    """Cola de eventos de un cliente de /stream"""
+
+    def __init__(self, topics: Iterable[str], queue_size: int):
+        self.topics = frozenset(topics)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False  # Cliente demasiado lento: se corta y el navegador reconecta con un snapshot
+
+class LiveFeed:
+    """Difunde a los clientes de /stream solo lo que cambia
+
+    Cada evento se serializa una vez por publicación (no por cliente) y se encola sin bloquear
+    al publicador; un cliente que no consume a tiempo se desconecta en lugar de frenar al bot.
+    """
+
+    def __init__(self, max_clients: int = 10, keepalive: float = 15, queue_size: int = 500):
+        self.max_clients = max_clients
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self._market_fields = {}  # símbolo -> últimos campos publicados
+        self.published = 0
+        self.dropped_clients = 0
+
+    def subscribe(self, topics: Iterable[str]) -> Optional[Subscription]:
+        """Nueva suscripción o None si ya hay max_clients conectados"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(topics, self.queue_size)
+            self._subscribers.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return any(topic in subscription.topics for subscription in self._subscribers)
+
+    def publish(self, topic: str, event: str, data):
+        """Encola el evento para los suscriptores del tema (nunca bloquea ni escribe logs)"""
+        with self._lock:
+            subscribers = [s for s in self._subscribers if topic in s.topics and not s.closed]
+        if not subscribers:
+            return
+
+        message = format_event(event, data)
+        self.published += 1
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                subscription.closed = True
+                self.dropped_clients += 1
+
+    def market_rows(self, market_data: Dict, symbols: Iterable[str] = None) -> List[Dict]:
+        """Fila del dashboard y campos actuales de cada símbolo"""
+        symbols = market_data.keys() if symbols is None else symbols
+        return [
+            {"symbol": symbol, "fields": scalar_fields(market_data[symbol]),
+             "row": render_crypto_row(symbol, market_data[symbol])}
+            for symbol in symbols if symbol in market_data
+        ]
+
+    def publish_market(self, market_data: Dict, symbols: Iterable[str] = None):
+        """Publica, por símbolo, solo los campos que cambiaron desde la última publicación"""
+        listening = self.has_subscribers(MARKET)
+        for symbol in (market_data.keys() if symbols is None else symbols):
+            data = market_data.get(symbol)
+            if not data:
+                continue
+
+            fields = scalar_fields(data)
+            previous = self._market_fields.get(symbol, {})
+            changed = {key: value for key, value in fields.items() if previous.get(key) != value}
+            self._market_fields[symbol] = fields
+            if changed and listening:
+                self.publish(MARKET, "market", {
+                    "symbol": symbol, "changed": changed, "row": render_crypto_row(symbol, data)
+                })
+
+    def publish_signal(self, signal_id: int, signal_data: Dict, market_trend: str):
+        """Publica una señal recién registrada"""
+        if not self.has_subscribers(SIGNALS):
+            return
+        self.publish(SIGNALS, "signal", {
+            "id": signal_id,
+            "timestamp": signal_data.get("timestamp"),
+            "symbol": signal_data.get("symbol"),
+            "signal_type": signal_data.get("signal_type"),
+            "score": signal_data.get("score"),
+            "entry_price": signal_data.get("entry_price"),
+            "tp_price": signal_data.get("tp_price"),
+            "sl_price": signal_data.get("sl_price"),
+            "market_trend": market_trend
+        })
+
+    def stream(self, subscription: Subscription, get_market_data: Callable[[], Dict]) -> Iterator[str]:
+        """Cuerpo de la respuesta SSE: snapshot inicial, eventos y keepalives hasta que el cliente se va"""
+        try:
+            yield "retry: 3000\n\n"
+            if MARKET in subscription.topics:
+                yield format_event("snapshot", self.market_rows(get_market_data()))
+
+            while not subscription.closed:
+                try:
+                    yield subscription.queue.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    def get_stats(self) -> Dict:
+        """Clientes conectados, eventos publicados y clientes cortados por lentos"""
+        with self._lock:
+            clients = len(self._subscribers)
+        return {"clients": clients, "published": self.published, "dropped_clients": self.dropped_clients}
+
+class LiveFeedHandler(logging.Handler):
+    """Handler de logging que publica cada línea en el tema LOGS (no hace nada sin suscriptores)"""
+
+    def __init__(self, feed: LiveFeed):
+        super().__init__()
+        self.feed = feed
+
+    def emit(self, record):
+        if not self.feed.has_subscribers(LOGS):
+            return
+        try:
+            self.feed.publish(LOGS, "log", {"level": record.levelname, "line": self.format(record)})
+        except Exception:
+            self.handleError(record)
+
+# Instancia global
+live_feed = LiveFeed(Config.LIVE_FEED_MAX_CLIENTS, Config.LIVE_FEED_KEEPALIVE, Config.LIVE_FEED_QUEUE_SIZE)
+
+def publish_market(market_data: Dict, symbols: Iterable[str] = None):
+    """Función helper para publicar los cambios de mercado tras un análisis"""
+    live_feed.publish_market(market_data, symbols)
+
+def publish_signal(signal_id: int, signal_data: Dict, market_trend: str):
+    """Función helper para publicar una señal nueva"""
+    live_feed.publish_signal(signal_id, signal_data, market_trend)
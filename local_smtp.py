@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# local_smtp.py - Servidor SMTP local para pruebas: acepta cualquier login y guarda los mensajes en memoria
+import argparse
+import socket
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from typing import List
+
+class LocalSMTPHandler(socketserver.StreamRequestHandler):
+    """Una sesión SMTP: EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP y QUIT (sin TLS)"""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def readline(self):
+        """Siguiente línea sin CRLF o None si el cliente cerró la conexión"""
+        raw = self.rfile.readline()
+        return raw.decode("utf-8", "replace").rstrip("\r\n") if raw else None
+
+    def handle(self):
+        server = self.server
+        server.sessions += 1
+        with server.lock:
+            server.connections.add(self.connection)
+        try:
+            self.session(server)
+        finally:
+            with server.lock:
+                server.connections.discard(self.connection)
+
+    def session(self, server):
+        time.sleep(server.delay)  # Simula un handshake lento
+        self.reply("220 local-smtp ESMTP")
+
+        while True:
+            line = self.readline()
+            if line is None:
+                return
+            command = line[:4].upper()
+
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-local-smtp\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif command == "AUTH":
+                if line.upper().startswith("AUTH LOGIN"):
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.readline()
+                server.logins += 1
+                self.reply("235 2.7.0 Authentication successful")
+            elif command in ("MAIL", "RCPT"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    raw = self.rfile.readline()
+                    if raw in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(raw[1:] if raw.startswith(b"..") else raw)
+                time.sleep(server.delay)
+                with server.lock:
+                    if server.fail_next > 0:
+                        server.fail_next -= 1
+                        self.reply("451 4.3.0 Temporary failure")
+                        continue
+                    server.messages.append(message_from_bytes(b"".join(data)))
+                self.reply("250 OK: queued")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Sustituto de Gmail en pruebas: EmailService(..., smtp_server='127.0.0.1', smtp_port=port, security='none')"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        super().__init__((host, port), LocalSMTPHandler)
+        self.delay = delay  # segundos de espera en el saludo y en cada DATA
+        self.fail_next = 0  # Próximos DATA rechazados con 451 (para probar reintentos)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = set()  # Sockets de las sesiones abiertas
+        self.sessions = 0
+        self.logins = 0
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "LocalSMTPServer":
+        threading.Thread(target=self.serve_forever, name="local-smtp", daemon=True).start()
+        return self
+
+    def drop_connections(self):
+        """Corta las sesiones abiertas sin QUIT, como un servidor que cierra conexiones inactivas"""
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def subjects(self) -> List[str]:
+        with self.lock:
+            return [str(make_header(decode_header(message["Subject"] or ""))) for message in self.messages]
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP local para probar el envío de emails")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--delay", type=float, default=0.0, help="Segundos de espera en el saludo y en cada DATA")
+    args = parser.parse_args()
+
+    server = LocalSMTPServer(port=args.port, delay=args.delay)
+    print(f"📭 SMTP local en 127.0.0.1:{server.port} (sin TLS, acepta cualquier usuario y contraseña)")
+    seen = 0
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+            subjects = server.subjects()
+            for subject in subjects[seen:]:
+                print(f"📨 {subject}")
+            seen = len(subjects)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
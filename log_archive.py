@@ -0,0 +1,223 @@
+# log_archive.py - Archivos diarios de logs comprimidos (JSONL por segmentos) con índice para búsquedas
+import bisect
+import gzip
+import json
+import logging
+import os
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Severidad por nivel para filtrar (?level=WARNING devuelve WARNING, ERROR y CRITICAL)
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Inicio de un registro en formato texto; las demás líneas (tracebacks) continúan el registro anterior
+RECORD_START = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} - [A-Z]+ - ")
+
+# bot_logs_YYYYMMDD.txt que dejaba la rotación antigua (o una rotación interrumpida)
+LEGACY_BACKUP = re.compile(r"bot_logs_(\d{8})\.txt$")
+
+def parse_log_line(line: str) -> Dict:
+    """timestamp, nivel y mensaje de una línea 'fecha - NIVEL - mensaje' (un solo split) o JSON"""
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+            return {"timestamp": entry.get("timestamp", ""), "level": entry.get("level", "INFO"),
+                    "message": entry.get("message", "")}
+        except ValueError:
+            pass
+    parts = line.split(" - ", 2)
+    return {
+        "timestamp": parts[0] if len(parts) > 1 else "",
+        "level": parts[1] if len(parts) > 1 else "INFO",
+        "message": parts[2] if len(parts) > 2 else line
+    }
+
+def iter_log_records(lines: Iterable[str]) -> Iterator[Dict]:
+    """Registros {timestamp, level, message} de un fichero de logs en texto o JSON-lines"""
+    current = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        if line.startswith("{") or RECORD_START.match(line):
+            if current and current["timestamp"]:
+                yield current
+            current = parse_log_line(line)
+        elif current is not None:
+            current["message"] += "\n" + line
+    if current and current["timestamp"]:
+        yield current
+
+def time_bound(value: Optional[str]) -> Optional[str]:
+    """'2024-05-01T10:30' -> '2024-05-01 10:30' (comparable como texto con los timestamps)"""
+    return value.strip().replace("T", " ") if value else None
+
+class LogArchive:
+    """Un día de logs = bot_logs_YYYYMMDD.jsonl.gz + bot_logs_YYYYMMDD.idx.json
+
+    El .jsonl.gz es una concatenación de miembros gzip independientes (segmentos de segment_lines
+    registros; zcat lo lee entero). El índice guarda por segmento su offset y longitud comprimida,
+    el primer y último timestamp y cuántos registros hay de cada nivel, así que una búsqueda
+    localiza por bisección los segmentos del rango horario, salta los que no tienen el nivel pedido
+    y solo descomprime los que pueden contener resultados.
+    """
+
+    def __init__(self, directory: str = "log_archive", segment_lines: int = 2000):
+        self.directory = directory
+        self.segment_lines = max(1, segment_lines)
+        self._indexes = {}  # día -> índice (los archivos no cambian una vez escritos)
+
+    def paths(self, day: date):
+        stem = os.path.join(self.directory, f"bot_logs_{day.strftime('%Y%m%d')}")
+        return f"{stem}.jsonl.gz", f"{stem}.idx.json"
+
+    def days(self) -> List[date]:
+        """Días archivados en orden cronológico"""
+        if not os.path.isdir(self.directory):
+            return []
+        days = []
+        for name in os.listdir(self.directory):
+            match = re.fullmatch(r"bot_logs_(\d{8})\.idx\.json", name)
+            if match:
+                value = match.group(1)
+                days.append(date(int(value[:4]), int(value[4:6]), int(value[6:])))
+        return sorted(days)
+
+    def archive(self, source: str, day: date) -> Dict:
+        """Comprime el fichero de logs de un día en segmentos JSONL y escribe su índice"""
+        data_path, index_path = self.paths(day)
+        os.makedirs(self.directory, exist_ok=True)
+
+        segments, batch, total = [], [], 0
+        with open(source, encoding="utf-8", errors="replace") as f, open(data_path + ".tmp", "wb") as out:
+            def write_segment():
+                payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+                blob = gzip.compress(payload.encode("utf-8"), mtime=0)
+                timestamps = [record["timestamp"] for record in batch]
+                segments.append({
+                    "offset": out.tell(), "length": len(blob), "lines": len(batch),
+                    "first": min(timestamps), "last": max(timestamps),
+                    "levels": dict(Counter(record["level"] for record in batch))
+                })
+                out.write(blob)
+
+            for record in iter_log_records(f):
+                batch.append(record)
+                total += 1
+                if len(batch) >= self.segment_lines:
+                    write_segment()
+                    batch = []
+            if batch:
+                write_segment()
+
+        index = {"date": day.isoformat(), "lines": total, "segments": segments}
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(data_path + ".tmp", data_path)
+        os.replace(index_path + ".tmp", index_path)  # El índice último: un día sin índice no está archivado
+        self._indexes.pop(day, None)
+        return index
+
+    def archive_backups(self, log_dir: str = "."):
+        """Archiva los bot_logs_YYYYMMDD.txt pendientes y los borra"""
+        for name in sorted(os.listdir(log_dir or ".")):
+            match = LEGACY_BACKUP.fullmatch(name)
+            if not match:
+                continue
+            value = match.group(1)
+            source = os.path.join(log_dir, name)
+            try:
+                index = self.archive(source, date(int(value[:4]), int(value[4:6]), int(value[6:])))
+                os.remove(source)
+                logger.info(f"🗜️ Logs archivados: {name} ({index['lines']} registros, {len(index['segments'])} segmentos)")
+            except Exception as e:
+                logger.error(f"❌ Error archivando {name}: {e}")
+
+    def load_index(self, day: date) -> Optional[Dict]:
+        index = self._indexes.get(day)
+        if index is None:
+            _, index_path = self.paths(day)
+            if not os.path.exists(index_path):
+                return None
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            index["lasts"] = [segment["last"] for segment in index["segments"]]
+            self._indexes[day] = index
+        return index
+
+    def read_segment(self, day: date, segment: Dict) -> bytes:
+        data_path, _ = self.paths(day)
+        with open(data_path, "rb") as f:
+            f.seek(segment["offset"])
+            return gzip.decompress(f.read(segment["length"]))
+
+    def search(self, since: Optional[str] = None, until: Optional[str] = None, level: Optional[str] = None,
+               q: Optional[str] = None, limit: int = 500) -> Dict:
+        """Registros archivados entre since y until (prefijos de timestamp, inclusivos) con nivel >= level
+        y q en el mensaje (sin distinguir mayúsculas), en orden cronológico y hasta limit"""
+        since, until = time_bound(since), time_bound(until)
+        min_level = LEVELS.get((level or "").upper(), 0)
+        # Prefiltro sobre bytes solo si es exacto (ASCII sin caracteres que json.dumps escapa)
+        needle = q.lower().encode("ascii") if q and q.isascii() and not set('"\\').intersection(q) else None
+        level_tokens = [f'"level": "{name}"'.encode("ascii")
+                        for name, value in LEVELS.items() if min_level and value >= min_level]
+        result = {"records": [], "truncated": False, "days": 0, "segments_read": 0, "segments_skipped": 0}
+
+        for day in self.days():
+            if (since and day.isoformat() < since[:10]) or (until and day.isoformat() > until[:10]):
+                continue
+            index = self.load_index(day)
+            if not index:
+                continue
+            result["days"] += 1
+
+            # Primer segmento cuyo último timestamp alcanza since
+            start = bisect.bisect_left(index["lasts"], since) if since else 0
+            for segment in index["segments"][start:]:
+                if until and segment["first"][:len(until)] > until:
+                    break
+                if min_level and max(LEVELS.get(name, LEVELS["INFO"]) for name in segment["levels"]) < min_level:
+                    result["segments_skipped"] += 1
+                    continue
+
+                result["segments_read"] += 1
+                # Nivel y q se comprueban primero en los bytes sin parsear: solo se decodifican las líneas candidatas
+                lines = self.read_segment(day, segment).splitlines()
+                if level_tokens:
+                    lines = [line for line in lines if any(token in line for token in level_tokens)]
+                if needle:
+                    lines = [line for line in lines if needle in line.lower()]
+                records = (json.loads(line) for line in lines)
+                for record in filter_records(records, since, until, level, q):
+                    if len(result["records"]) >= limit:
+                        result["truncated"] = True
+                        return result
+                    result["records"].append(record)
+        return result
+
+def filter_records(records: Iterable[Dict], since: Optional[str] = None, until: Optional[str] = None,
+                   level: Optional[str] = None, q: Optional[str] = None) -> Iterator[Dict]:
+    """Registros con timestamp entre since y until (prefijos, inclusivos), nivel >= level y q en el mensaje"""
+    since, until = time_bound(since), time_bound(until)
+    min_level = LEVELS.get((level or "").upper(), 0)
+    needle = q.lower() if q else None
+    for record in records:
+        timestamp = record.get("timestamp", "")
+        if since and timestamp < since:
+            continue
+        if until and timestamp[:len(until)] > until:
+            continue
+        if min_level and LEVELS.get(record.get("level"), LEVELS["INFO"]) < min_level:
+            continue
+        if needle and needle not in record.get("message", "").lower():
+            continue
+        yield record
+
+# Instancia global
+log_archive = LogArchive(Config.LOG_ARCHIVE_DIR, Config.LOG_ARCHIVE_SEGMENT_LINES)
@@ -1,27 +1,270 @@
 # log_manager.py - Sistema de logs centralizado
 import os
+import html
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, date
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 from flask import jsonify
 
+from config import Config
+from live_feed import live_feed, LiveFeedHandler
+from log_archive import LEVELS, log_archive, filter_records, iter_log_records, parse_log_line, time_bound
+
+# Bytes leídos por bloque al recorrer el fichero
+LOG_READ_BLOCK = 64 * 1024
+
+# Formato de las líneas de texto (fichero, consola y feed en vivo)
+LOG_TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+class JsonLineFormatter(logging.Formatter):
+    """Un objeto JSON por línea con las mismas claves que devuelve parse_log_line (+ logger)"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["message"] += "\n" + self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class BatchedFileHandler(logging.FileHandler):
+    """FileHandler que no hace flush por registro: LogListener vuelca el fichero una vez por lote"""
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class LogSampler(logging.Filter):
+    """Conserva 1 de cada every registros emitidos desde la misma línea de código
+
+    Pensado para los mensajes que se repiten en cada ciclo (📡 Conectando, 🔍 BUY...). Solo muestrea
+    hasta level; WARNING, ERROR y CRITICAL pasan siempre. El primer registro de cada línea siempre pasa.
+    """
+
+    def __init__(self, every: int = 1, level: int = logging.INFO):
+        super().__init__()
+        self.every = every
+        self.level = level
+        self.dropped = 0
+        self._seen = {}  # (fichero, línea) -> registros vistos
+
+    def filter(self, record):
+        if self.every <= 1 or record.levelno > self.level:
+            return True
+        key = (record.pathname, record.lineno)
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if seen % self.every:
+            self.dropped += 1
+            return False
+        return True
+
+class FanOutHandler(logging.Handler):
+    """Reparte cada registro entre varios handlers (modo síncrono)
+
+    Sus filtros se evalúan una sola vez por registro antes de repartirlo, así que un filtro con
+    estado como LogSampler decide igual para fichero, consola y feed.
+    """
+
+    def __init__(self, *handlers):
+        super().__init__()
+        self.handlers = handlers
+
+    def handle(self, record):
+        keep = self.filter(record)
+        if keep:
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        return keep
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+class LogListener(QueueListener):
+    """QueueListener que agrupa las escrituras
+
+    Formatea y escribe en su propio hilo y hace flush de los handlers cuando acumula batch_size
+    registros, cuando pasa flush_interval desde el primer registro pendiente o ante un ERROR.
+    """
+
+    def __init__(self, log_queue, *handlers, batch_size: int = 200, flush_interval: float = 1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.flushes = 0
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+        self.flushes += 1
+
+    def _monitor(self):
+        pending, deadline = 0, None
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self.flush()
+                pending, deadline = 0, None
+                continue
+
+            if record is self._sentinel:
+                break
+            self.handle(record)
+
+            pending += 1
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if pending >= self.batch_size or record.levelno >= logging.ERROR:
+                self.flush()
+                pending, deadline = 0, None
+
+        self.flush()
+
+def log_line_filter(level: Optional[str] = None) -> Callable[[bytes], bool]:
+    """Función que acepta las líneas visibles con nivel >= level (sin decodificar la línea)"""
+    min_level = LEVELS.get((level or "").upper(), 0)
+
+    def accept(line: bytes) -> bool:
+        if not line.strip() or line.startswith(b"#"):  # Ignorar vacías y comentarios
+            return False
+        if not min_level:
+            return True
+        if line.startswith(b"{"):
+            line_level = parse_log_line(line.decode("utf-8", "replace"))["level"]
+        else:
+            parts = line.split(b" - ", 2)
+            line_level = parts[1].decode("ascii", "replace") if len(parts) > 1 else "INFO"
+        return LEVELS.get(line_level, LEVELS["INFO"]) >= min_level
+
+    return accept
+
+def log_line_text(line: str) -> str:
+    """Línea lista para mostrar: las líneas JSON se muestran como 'fecha - NIVEL - mensaje'"""
+    if not line.startswith("{"):
+        return line
+    entry = parse_log_line(line)
+    return f"{entry['timestamp']} - {entry['level']} - {entry['message']}"
+
+def tail_log_lines(f, end: int, limit: int, accept: Callable[[bytes], bool],
+                   block_size: int = LOG_READ_BLOCK) -> Tuple[List[Tuple[int, bytes]], int, int]:
+    """Últimas limit líneas aceptadas antes del offset end, leyendo el fichero hacia atrás por bloques
+
+    Retorna (líneas [(offset, línea)] en orden cronológico, offset desde el que seguir hacia atrás
+    (0 = inicio del fichero), offset tras la última línea completa). Una línea final sin salto de
+    línea todavía se está escribiendo y se deja para la siguiente lectura.
+    """
+    pos, buffer, lines = end, b"", []
+    complete_end = None
+    while pos > 0 and len(lines) < limit:
+        size = min(block_size, pos)
+        pos -= size
+        f.seek(pos)
+        buffer = f.read(size) + buffer
+
+        if complete_end is None:
+            newline = buffer.rfind(b"\n")
+            if newline < 0:
+                continue
+            complete_end = pos + newline + 1
+            buffer = buffer[:newline + 1]
+
+        # Sacar líneas completas del final del buffer; la primera puede seguir en el bloque anterior
+        while len(lines) < limit:
+            cut = buffer.rfind(b"\n", 0, len(buffer) - 1)
+            if cut < 0:
+                break
+            if accept(buffer[cut + 1:-1]):
+                lines.append((pos + cut + 1, buffer[cut + 1:-1]))
+            buffer = buffer[:cut + 1]
+
+    # Primera línea del fichero
+    if pos == 0 and buffer and complete_end is not None and len(lines) < limit:
+        if accept(buffer[:-1]):
+            lines.append((0, buffer[:-1]))
+        buffer = b""
+
+    lines.reverse()
+    return lines, pos + len(buffer) if complete_end is not None else 0, complete_end or 0
+
+def read_log_lines_after(f, start: int, limit: int, accept: Callable[[bytes], bool],
+                         block_size: int = LOG_READ_BLOCK) -> Tuple[List[Tuple[int, bytes]], int]:
+    """Hasta limit líneas aceptadas desde el offset start hacia delante
+
+    Retorna (líneas [(offset, línea)], offset tras la última línea completa leída).
+    """
+    f.seek(start)
+    offset, buffer, lines = start, b"", []
+    while len(lines) < limit:
+        chunk = f.read(block_size)
+        if not chunk:
+            break
+        buffer += chunk
+        line_start = 0
+        while len(lines) < limit:
+            newline = buffer.find(b"\n", line_start)
+            if newline < 0:
+                break
+            if accept(buffer[line_start:newline]):
+                lines.append((offset + line_start, buffer[line_start:newline]))
+            line_start = newline + 1
+        offset += line_start
+        buffer = buffer[line_start:]
+    return lines, offset
+
 class LogManager:
     def __init__(self, log_file="bot_logs.txt"):
         self.log_file = log_file
         self.current_date = date.today()
+        self.listener = None  # LogListener en modo async (LOG_ASYNC)
+        self.file_handler = None
+        self._rotation_lock = threading.Lock()
+        self.sampler = LogSampler(Config.LOG_SAMPLE_EVERY,
+                                  LEVELS.get(Config.LOG_SAMPLE_LEVEL.upper(), LEVELS["INFO"]))
         self.setup_logging()
     
     def check_and_clean_daily_logs(self):
         """Limpia logs si ha cambiado el día"""
         try:
             today = date.today()
-            if today != self.current_date:
+            if today == self.current_date:
+                return
+
+            with self._rotation_lock:
+                if today == self.current_date:
+                    return  # Otro hilo ya rotó
+
                 # Ha cambiado el día, limpiar logs
+                backup_file = None
                 if os.path.exists(self.log_file):
                     # Hacer backup del día anterior
-                    backup_file = f"bot_logs_{self.current_date.strftime('%Y%m%d')}.txt"
-                    if os.path.exists(self.log_file):
-                        os.rename(self.log_file, backup_file)
-                        print(f"📁 Logs del día anterior guardados en: {backup_file}")
+                    backup_file = os.path.join(self.log_dir, f"bot_logs_{self.current_date.strftime('%Y%m%d')}.txt")
+                    os.rename(self.log_file, backup_file)
+                    print(f"📁 Logs del día anterior guardados en: {backup_file}")
 
                 # Actualizar fecha actual
                 self.current_date = today
@@ -31,6 +274,16 @@ class LogManager:
                 with open(self.log_file, 'w', encoding='utf-8') as f:
                     f.write(f"# Logs del día {today.strftime('%Y-%m-%d')}\n")
 
+                # El handler seguía escribiendo en el fichero renombrado: reabrirlo sobre el nuevo
+                if self.file_handler:
+                    previous = self.file_handler.setStream(self.file_handler._open())
+                    if previous:
+                        previous.close()
+
+            if backup_file:
+                # Comprimir e indexar el día anterior sin bloquear al hilo que rota
+                self.archive_backups()
+
         except Exception as e:
             print(f"Error limpiando logs diarios: {e}")
 
@@ -38,45 +291,156 @@ class LogManager:
         """Verifica cambio de día y limpia si es necesario"""
         self.check_and_clean_daily_logs()
     
+    @property
+    def log_dir(self):
+        return os.path.dirname(self.log_file) or "."
+
+    def archive_backups(self):
+        """Archiva en segundo plano los bot_logs_YYYYMMDD.txt pendientes (ver log_archive.py)"""
+        threading.Thread(target=log_archive.archive_backups, args=(self.log_dir,),
+                         name="log-archive", daemon=True).start()
+
     def setup_logging(self):
         """Configura el sistema de logging"""
         # Verificar cambio de día al inicio
         self.rotate_logs()
 
         # Configurar handlers
-        file_handler = logging.FileHandler(self.log_file, mode='a', encoding='utf-8')
+        file_handler_class = BatchedFileHandler if Config.LOG_ASYNC else logging.FileHandler
+        file_handler = file_handler_class(self.log_file, mode='a', encoding='utf-8')
         console_handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
+        feed_handler = LiveFeedHandler(live_feed)  # Líneas en vivo para /logs vía /stream
+        formatter = logging.Formatter(LOG_TEXT_FORMAT)
+        file_handler.setFormatter(JsonLineFormatter() if Config.LOG_FORMAT == "json" else formatter)
+        self.file_handler = file_handler
         console_handler.setFormatter(formatter)
+        feed_handler.setFormatter(formatter)
+        handlers = [file_handler, console_handler, feed_handler]
+
+        if Config.LOG_ASYNC:
+            # El hilo que loguea solo encola; formato, disco y consola van en el hilo del listener
+            log_queue = queue.SimpleQueue()
+            self.listener = LogListener(log_queue, *handlers, batch_size=Config.LOG_BATCH_SIZE,
+                                        flush_interval=Config.LOG_FLUSH_INTERVAL)
+            self.listener.start()
+            atexit.register(self.stop)
+            queue_handler = QueueHandler(log_queue)
+            queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Solo une msg y args antes de encolar
+            root_handler = queue_handler
+        else:
+            root_handler = FanOutHandler(*handlers)
+
+        # Muestreo una vez por registro, antes de encolar/formatear: un registro descartado no cuesta nada más
+        root_handler.addFilter(self.sampler)
 
         # Configurar logger
-        logging.basicConfig(level=logging.INFO, handlers=[file_handler, console_handler])
+        logging.basicConfig(level=logging.INFO, handlers=[root_handler])
 
         # Log inicial
         logger = logging.getLogger(__name__)
         logger.info("🚀 SISTEMA DE LOGS INICIADO")
         logger.info(f"📝 Archivo: {self.log_file} (Todos los logs del día {self.current_date.strftime('%Y-%m-%d')})")
         logger.info(f"🗓️ Limpieza automática: Al cambiar de día")
+        logger.info(f"⚙️ Modo: {'async' if Config.LOG_ASYNC else 'síncrono'}, formato {Config.LOG_FORMAT}"
+                    f"{f', muestreo 1/{Config.LOG_SAMPLE_EVERY}' if Config.LOG_SAMPLE_EVERY > 1 else ''}")
+
+        # Días anteriores que quedaron sin archivar (rotación antigua o proceso reiniciado a medias)
+        self.archive_backups()
+
+    def stop(self):
+        """Vacía la cola y detiene el listener (al salir del proceso)"""
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
     
-    def get_logs_html(self, limit=None):
-        """Retorna logs en formato HTML - Muestra todos los logs del día actual"""
+    def read_logs(self, limit=None, level=None, after=None, before=None) -> Dict:
+        """Página de logs sin leer el fichero entero: O(líneas pedidas), no O(tamaño del fichero)
+
+        - after: líneas nuevas desde ese offset (cursor devuelto en 'after' de la página anterior)
+        - before: líneas anteriores a ese offset (cursor 'before' para paginar hacia atrás)
+        - sin cursores: las últimas limit líneas del fichero
+        """
+        limit = max(1, min(limit or Config.LOG_VIEW_LINES, Config.LOG_VIEW_MAX_LINES))
+        accept = log_line_filter(level)
+        page = {"lines": [], "after": 0, "before": 0, "size": 0, "reset": False}
+
+        if not os.path.exists(self.log_file):
+            return page
+
+        with open(self.log_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            page["size"] = size
+
+            if after is not None:
+                if after > size:
+                    # El fichero se rotó desde la última lectura: empezar desde el principio
+                    after, page["reset"] = 0, True
+                lines, page["after"] = read_log_lines_after(f, after, limit, accept)
+                page["before"] = after
+            else:
+                end = size if before is None else min(before, size)
+                lines, page["before"], complete_end = tail_log_lines(f, end, limit, accept)
+                page["after"] = complete_end if before is None else end
+
+        page["lines"] = [(offset, line.decode("utf-8", "replace")) for offset, line in lines]
+        return page
+
+    def search_logs(self, day=None, since=None, until=None, level=None, q=None, limit=None) -> Dict:
+        """Busca en los días archivados y en el fichero de hoy
+
+        - day: un día completo (YYYY-MM-DD); since/until: rango de timestamps (prefijos, p.ej. 2024-05-01T10)
+        - level: nivel mínimo; q: texto en el mensaje (sin distinguir mayúsculas)
+        """
+        limit = max(1, min(limit or Config.LOG_VIEW_LINES, Config.LOG_VIEW_MAX_LINES))
+        since, until = time_bound(since or day), time_bound(until or day)
+        result = log_archive.search(since, until, level, q, limit)
+
+        # El día en curso aún no está archivado: se recorre su fichero
+        today = self.current_date.isoformat()
+        in_range = (not since or since[:10] <= today) and (not until or until[:10] >= today)
+        if in_range and not result["truncated"] and os.path.exists(self.log_file):
+            with open(self.log_file, encoding="utf-8", errors="replace") as f:
+                for record in filter_records(iter_log_records(f), since, until, level, q):
+                    if len(result["records"]) >= limit:
+                        result["truncated"] = True
+                        break
+                    result["records"].append(record)
+        return result
+
+    def get_logs_html(self, limit=None, level=None, after=None, before=None, day=None, since=None, until=None, q=None):
+        """Retorna logs en formato HTML - Últimas líneas del día, paginables hacia atrás"""
         try:
             self.rotate_logs()
 
-            if not os.path.exists(self.log_file):
-                return "<p>No hay logs disponibles</p>"
+            level_text = f" con nivel ≥ {level.upper()}" if level and level.upper() in LEVELS else ""
+            searching = any((day, since, until, q))
+            if searching:
+                # Búsqueda en el histórico: sin paginación ni líneas en vivo
+                result = self.search_logs(day, since, until, level, q, limit)
+                lines = [f"{record['timestamp']} - {record['level']} - {record['message']}" for record in result["records"]]
+                search_text = f" con '{q}'" if q else ""
+                showing_text = (f"{len(lines)}{'+' if result['truncated'] else ''} registros{level_text}{search_text} "
+                                f"({result['days']} días archivados, {result['segments_read']} segmentos leídos, "
+                                f"{result['segments_skipped']} descartados por índice)")
+                older_link = ""
+            else:
+                page = self.read_logs(limit, level, after, before)
+                if not page["size"]:
+                    return "<p>No hay logs disponibles</p>"
 
-            with open(self.log_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+                lines = [log_line_text(line) for _, line in page["lines"]]
+                showing_text = f"{len(lines)} líneas{level_text} ({page['size'] / 1024:.0f} KB en el fichero del día {self.current_date.strftime('%Y-%m-%d')})"
 
-            # Mostrar todos los logs del día (sin límite) o aplicar límite si se especifica
-            if limit and len(lines) > limit:
-                recent_lines = lines[-limit:]
-                showing_text = f"últimas {len(recent_lines)} líneas de {len(lines)} totales"
-            else:
-                recent_lines = lines
-                showing_text = f"todas las {len(lines)} líneas del día {self.current_date.strftime('%Y-%m-%d')}"
+                # Solo se repiten en el enlace un nivel conocido y un límite numérico
+                query = {"before": page["before"]}
+                if level and level.upper() in LEVELS:
+                    query["level"] = level.upper()
+                if isinstance(limit, int) and limit > 0:
+                    query["limit"] = limit
+                older_href = html.escape(f"/logs?{urlencode(query)}", quote=True)
+                older_link = (f'<a class="refresh-btn" href="{older_href}">⬅️ Anteriores</a>'
+                              if page["before"] > 0 else "")
+            min_level = LEVELS.get((level or "").upper(), 0)
 
             html_content = f"""
             <!DOCTYPE html>
@@ -93,26 +457,49 @@ class LogManager:
                     .warning {{ color: #ffaa00; }}
                     .error {{ color: #ff0000; }}
                     .debug {{ color: #00aaff; }}
-                    .refresh-btn {{ background: #28a745; color: white; padding: 10px 20px; border: none; border-radius: 5px; cursor: pointer; margin: 10px 0; }}
+                    .refresh-btn {{ background: #28a745; color: white; padding: 10px 20px; border: none; border-radius: 5px; cursor: pointer; margin: 10px 0; text-decoration: none; display: inline-block; }}
                     .refresh-btn:hover {{ background: #218838; }}
                 </style>
                 <script>
+                    const LEVELS = {{"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}};
+                    const MIN_LEVEL = {min_level};
+                    const LIVE = {'false' if searching else 'true'};
                     function refreshLogs() {{
                         location.reload();
                     }}
-                    // Auto-refresh cada 30 segundos
-                    setInterval(refreshLogs, 30000);
+                    // Líneas nuevas en vivo (/stream) en lugar de recargar la página cada 30 segundos
+                    window.addEventListener('DOMContentLoaded', () => {{
+                        if (!LIVE) return;
+                        if (!window.EventSource) {{
+                            setInterval(refreshLogs, 30000);
+                            return;
+                        }}
+                        const logs = document.getElementById('logLines');
+                        const feed = new EventSource('/stream?topics=logs');
+                        feed.addEventListener('log', e => {{
+                            const entry = JSON.parse(e.data);
+                            if ((LEVELS[entry.level] || 20) < MIN_LEVEL) return;
+                            const atBottom = logs.scrollTop + logs.clientHeight >= logs.scrollHeight - 20;
+                            logs.appendChild(document.createTextNode(entry.line + '\\n'));
+                            if (atBottom) logs.scrollTop = logs.scrollHeight;
+                        }});
+                        // El servidor rechazó el feed (503 sin hilos): recargar como antes
+                        feed.onerror = () => {{
+                            if (feed.readyState === EventSource.CLOSED) setInterval(refreshLogs, 30000);
+                        }};
+                    }});
                 </script>
             </head>
             <body>
                 <div class="container">
                     <div class="header">
                         <h1>🤖 Scalping Bot - Logs del Sistema</h1>
-                        <p>📊 Mostrando {showing_text}</p>
+                        <p>📊 Mostrando {html.escape(showing_text)}</p>
                         <p>🗓️ Fecha actual: {self.current_date.strftime('%Y-%m-%d')} | 🔄 Auto-limpieza: Al cambiar de día</p>
                         <button class="refresh-btn" onclick="refreshLogs()">🔄 Actualizar Logs</button>
+                        {older_link}
                     </div>
-                    <div class="logs">{''.join(recent_lines)}</div>
+                    <div class="logs" id="logLines">{''.join(html.escape(line) + chr(10) for line in lines)}</div>
                 </div>
             </body>
             </html>
@@ -120,40 +507,34 @@ class LogManager:
             return html_content
 
         except Exception as e:
-            return f"<p>Error cargando logs: {e}</p>"
-    
-    def get_logs_json(self, limit=None):
-        """Retorna logs en formato JSON - Muestra todos los logs del día actual"""
+            return f"<p>Error cargando logs: {html.escape(str(e))}</p>"
+
+    def get_logs_json(self, limit=None, level=None, after=None, before=None, day=None, since=None, until=None, q=None):
+        """Retorna logs en formato JSON - Últimas líneas del día con cursores para paginar"""
         try:
             self.rotate_logs()
 
-            if not os.path.exists(self.log_file):
-                return {"logs": [], "total": 0, "date": self.current_date.strftime('%Y-%m-%d')}
+            if any((day, since, until, q)):
+                result = self.search_logs(day, since, until, level, q, limit)
+                return {
+                    "logs": result["records"],
+                    "showing": len(result["records"]),
+                    "truncated": result["truncated"],
+                    "days": result["days"],
+                    "segments_read": result["segments_read"],
+                    "segments_skipped": result["segments_skipped"]
+                }
 
-            with open(self.log_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            # Mostrar todos los logs del día o aplicar límite si se especifica
-            if limit and len(lines) > limit:
-                recent_lines = lines[-limit:]
-            else:
-                recent_lines = lines
-
-            # Procesar líneas
-            processed_logs = []
-            for line in recent_lines:
-                line = line.strip()
-                if line and not line.startswith('#'):  # Ignorar comentarios
-                    processed_logs.append({
-                        "timestamp": line.split(" - ")[0] if " - " in line else "",
-                        "level": line.split(" - ")[1] if " - " in line and len(line.split(" - ")) > 1 else "INFO",
-                        "message": " - ".join(line.split(" - ")[2:]) if " - " in line and len(line.split(" - ")) > 2 else line
-                    })
+            page = self.read_logs(limit, level, after, before)
+            processed_logs = [dict(parse_log_line(line), offset=offset) for offset, line in page["lines"]]
 
             return {
                 "logs": processed_logs,
-                "total": len(lines),
-                "showing": len(recent_lines),
+                "showing": len(processed_logs),
+                "after": page["after"],    # ?after= para pedir solo las líneas nuevas
+                "before": page["before"],  # ?before= para la página anterior (0 = no hay más)
+                "reset": page["reset"],
+                "size": page["size"],
                 "date": self.current_date.strftime('%Y-%m-%d'),
                 "auto_cleanup": "Al cambiar de día"
             }
@@ -172,10 +553,10 @@ def rotate_logs():
     """Función helper para rotar logs"""
     log_manager.rotate_logs()
 
-def get_logs_html_response(limit=None):
-    """Función helper para Flask - Muestra todos los logs del día por defecto"""
-    return log_manager.get_logs_html(limit)
+def get_logs_html_response(limit=None, level=None, after=None, before=None, day=None, since=None, until=None, q=None):
+    """Función helper para Flask - Últimas líneas del día por defecto, búsqueda en el histórico con day/since/until/q"""
+    return log_manager.get_logs_html(limit, level, after, before, day, since, until, q)
 
-def get_logs_json_response(limit=None):
-    """Función helper para Flask - Muestra todos los logs del día por defecto"""
-    return jsonify(log_manager.get_logs_json(limit))
+def get_logs_json_response(limit=None, level=None, after=None, before=None, day=None, since=None, until=None, q=None):
+    """Función helper para Flask - Últimas líneas del día por defecto, búsqueda en el histórico con day/since/until/q"""
+    return jsonify(log_manager.get_logs_json(limit, level, after, before, day, since, until, q))
@@ -1,21 +1,95 @@
 # market_analyzer.py - Análisis de mercado y datos
 import numpy as np
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from config import Config
 from binance_api import get_multi_timeframe_data, extract_prices, binance_api
+from response_cache import invalidate_responses, MARKET
+from live_feed import publish_market
 from indicators import (
-    calculate_ema, calculate_rsi, calculate_atr, calculate_adx,
-    calculate_volume_sma, calculate_confidence_score, calculate_price_targets
+    calculate_ema, calculate_price_targets,
+    EmaState, WilderRsiState, AtrState, AdxState, RollingMeanState
 )
 
 logger = logging.getLogger(__name__)
 
+# Parámetros adaptativos por tipo de par
+ADAPTIVE_PARAMS = {
+    "BTC": {"ema_fast": 10, "ema_slow": 21, "rsi_low": 50, "rsi_high": 65, "vol_multiplier": 1.8},
+    "ETH": {"ema_fast": 9, "ema_slow": 23, "rsi_low": 47, "rsi_high": 63, "vol_multiplier": 1.6},
+    "SOL": {"ema_fast": 7, "ema_slow": 20, "rsi_low": 45, "rsi_high": 68, "vol_multiplier": 1.4},
+    "OTHER": {"ema_fast": 10, "ema_slow": 21, "rsi_low": 50, "rsi_high": 65, "vol_multiplier": 1.5}
+}
+
+# Columnas de la fila de vela que consume cada tipo de indicador incremental
+CLOSE_FIELDS = (4,)
+HLC_FIELDS = (2, 3, 4)
+VOLUME_FIELDS = (5,)
+
+class TimeframeState:
+    """Indicadores incrementales de un símbolo/timeframe sincronizados con su ventana de velas"""
+    __slots__ = ("indicators", "last_open_time", "lock")
+
+    def __init__(self, indicators):
+        self.indicators = indicators  # nombre -> (estado, columnas de la vela)
+        self.last_open_time = None    # open_time de la última vela cerrada consolidada
+        self.lock = threading.Lock()
+
+    def _commit(self, klines):
+        for state, fields in self.indicators.values():
+            for k in klines:
+                state.update(*[float(k[i]) for i in fields])
+        if klines:
+            self.last_open_time = klines[-1][0]
+
+    def sync(self, klines):
+        """Consolida las velas cerradas nuevas y retorna los valores con la vela abierta"""
+        with self.lock:
+            closed = klines[:-1]
+
+            # Buscar la última vela consolidada desde el final (normalmente 0-1 velas nuevas)
+            start = None
+            if self.last_open_time is not None:
+                for i in range(len(closed) - 1, -1, -1):
+                    if closed[i][0] == self.last_open_time:
+                        start = i + 1
+                        break
+
+            if start is None:
+                # Sin estado o con hueco: re-sembrar desde la ventana
+                for state, _ in self.indicators.values():
+                    state.reset()
+                self.last_open_time = None
+                start = 0
+
+            self._commit(closed[start:])
+
+            current = klines[-1]
+            return {
+                name: state.peek(*[float(current[i]) for i in fields])
+                for name, (state, fields) in self.indicators.items()
+            }
+
 class MarketAnalyzer:
     def __init__(self, symbols=None):
         self.symbols = symbols or ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
         self.market_data = self._initialize_market_data()
         self.using_simulation = False
         self.binance_api = binance_api  # Referencia a la instancia de BinanceAPI
+        self.pair_params = {pair: dict(params) for pair, params in ADAPTIVE_PARAMS.items()}  # Ajustable por backtest
+
+        # Motor de análisis concurrente (un worker por símbolo hasta el máximo configurado)
+        self.max_workers = max(1, min(len(self.symbols), Config.ANALYSIS_MAX_WORKERS))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analyzer")
+        self.symbol_timings = {}  # Segundos que tardó cada símbolo en el último ciclo
+        self.last_cycle_duration = 0.0
+
+        # Indicadores incrementales por (símbolo, intervalo): O(1) por vela nueva
+        self.indicator_states = {}
+        self._states_lock = threading.Lock()
     
     def _initialize_market_data(self):
         """Inicializa estructura de datos del mercado"""
@@ -32,7 +106,8 @@ class MarketAnalyzer:
                 "expected_move_sell": 0.0, "risk_reward_sell": 0.0,
                 # Nuevos campos para cambios de precio
                 "price_24h_change_percent": 0.0, "price_24h_change_amount": 0.0,
-                "previous_price": 0.0, "price_change_percent": 0.0, "price_change_amount": 0.0
+                "previous_price": 0.0, "price_change_percent": 0.0, "price_change_amount": 0.0,
+                "analysis_time_ms": 0.0
             }
         return data
     
@@ -50,26 +125,50 @@ class MarketAnalyzer:
     
     def get_adaptive_params(self, pair_type):
         """Parámetros adaptativos por par"""
-        params = {
-            "BTC": {"ema_fast": 10, "ema_slow": 21, "rsi_low": 50, "rsi_high": 65, "vol_multiplier": 1.8},
-            "ETH": {"ema_fast": 9, "ema_slow": 23, "rsi_low": 47, "rsi_high": 63, "vol_multiplier": 1.6},
-            "SOL": {"ema_fast": 7, "ema_slow": 20, "rsi_low": 45, "rsi_high": 68, "vol_multiplier": 1.4},
-            "OTHER": {"ema_fast": 10, "ema_slow": 21, "rsi_low": 50, "rsi_high": 65, "vol_multiplier": 1.5}
-        }
-        return params.get(pair_type, params["OTHER"])
+        return self.pair_params.get(pair_type, self.pair_params["OTHER"])
     
     def is_valid_trading_hour(self):
         """Filtro de horarios (8-18 UTC)"""
         current_hour = datetime.now(timezone.utc).hour
         return 8 <= current_hour <= 18
     
-    def analyze_symbol(self, symbol):
-        """Analiza un símbolo específico"""
+    def _create_timeframe_state(self, symbol, interval):
+        """Crea los indicadores incrementales que se usan en cada timeframe"""
+        if interval != "1m":
+            return TimeframeState({"rsi": (WilderRsiState(14), CLOSE_FIELDS)})
+
+        params = self.get_adaptive_params(self.detect_pair_type(symbol))
+        return TimeframeState({
+            "ema_fast": (EmaState(params["ema_fast"]), CLOSE_FIELDS),
+            "ema_slow": (EmaState(params["ema_slow"]), CLOSE_FIELDS),
+            "rsi": (WilderRsiState(14), CLOSE_FIELDS),
+            "atr": (AtrState(14), HLC_FIELDS),
+            "adx": (AdxState(14), HLC_FIELDS),
+            "vol_avg": (RollingMeanState(20), VOLUME_FIELDS)
+        })
+
+    def get_timeframe_indicators(self, symbol, interval, klines):
+        """Actualiza los indicadores incrementales con las velas y retorna sus valores"""
+        key = (symbol, interval)
+        with self._states_lock:
+            state = self.indicator_states.get(key)
+            if state is None:
+                state = self.indicator_states[key] = self._create_timeframe_state(symbol, interval)
+        return state.sync(klines)
+
+    def analyze_symbol(self, symbol, timeframe_data=None, symbol_info=None):
+        """Analiza un símbolo específico (con datos propios o ya recibidos por stream)"""
         try:
             logger.info(f"🔍 Analizando {symbol}...")
             
+            # Info 24h en paralelo con la descarga de velas
+            symbol_info_future = None
+            if symbol_info is None:
+                symbol_info_future = self.binance_api.executor.submit(self.binance_api.get_symbol_info, symbol)
+
             # Obtener datos multi-timeframe
-            timeframe_data = get_multi_timeframe_data(symbol)
+            if timeframe_data is None:
+                timeframe_data = get_multi_timeframe_data(symbol)
             if not timeframe_data or "1m" not in timeframe_data:
                 logger.error(f"❌ No se pudieron obtener datos para {symbol}")
                 return False
@@ -79,23 +178,13 @@ class MarketAnalyzer:
             data_15m = timeframe_data.get("15m", [])
             data_1h = timeframe_data.get("1h", [])
             
-            # Extraer precios
-            prices_1m = extract_prices(data_1m)
-            if not prices_1m or "closes" not in prices_1m:
-                logger.error(f"❌ Error extrayendo precios de {symbol}")
-                return False
-            
-            # Datos básicos
-            closes_1m = np.array(prices_1m["closes"])
-            highs_1m = np.array(prices_1m["highs"])
-            lows_1m = np.array(prices_1m["lows"])
-            volumes_1m = np.array(prices_1m["volumes"])
-            
-            close_now = prices_1m["current_price"]
-            vol_now = prices_1m["current_volume"]
+            # Datos básicos (vela actual)
+            close_now = float(data_1m[-1][4])
+            vol_now = float(data_1m[-1][5])
 
             # Obtener datos de 24h para cambios de precio
-            symbol_info = self.binance_api.get_symbol_info(symbol)
+            if symbol_info_future is not None:
+                symbol_info = symbol_info_future.result()
             price_24h_change_percent = float(symbol_info.get('priceChangePercent', 0)) if symbol_info else 0
             price_24h_change_amount = float(symbol_info.get('priceChange', 0)) if symbol_info else 0
 
@@ -108,29 +197,26 @@ class MarketAnalyzer:
             pair_type = self.detect_pair_type(symbol)
             params = self.get_adaptive_params(pair_type)
             
-            # Calcular indicadores
-            ema_fast_val = calculate_ema(closes_1m, params["ema_fast"])
-            ema_slow_val = calculate_ema(closes_1m, params["ema_slow"])
-            rsi_1m = calculate_rsi(closes_1m)
-            atr_val = calculate_atr(highs_1m, lows_1m, closes_1m)
-            adx_val = calculate_adx(highs_1m, lows_1m, closes_1m)
+            # Calcular indicadores (incrementales: solo se procesan las velas nuevas)
+            indicators_1m = self.get_timeframe_indicators(symbol, "1m", data_1m)
+            ema_fast_val = indicators_1m["ema_fast"]
+            ema_slow_val = indicators_1m["ema_slow"]
+            rsi_1m = indicators_1m["rsi"]
+            atr_val = indicators_1m["atr"]
+            adx_val = indicators_1m["adx"]
             
             # Volumen promedio
-            vol_avg = calculate_volume_sma(volumes_1m, 20)
+            vol_avg = indicators_1m["vol_avg"]
             
             # RSI 5m para confirmación rápida
             if data_5m and len(data_5m) >= 14:
-                prices_5m = extract_prices(data_5m)
-                closes_5m = np.array(prices_5m["closes"])
-                rsi_5m = calculate_rsi(closes_5m)
+                rsi_5m = self.get_timeframe_indicators(symbol, "5m", data_5m)["rsi"]
             else:
                 rsi_5m = rsi_1m
 
             # RSI 15m para tendencia general
             if data_15m and len(data_15m) >= 14:
-                prices_15m = extract_prices(data_15m)
-                closes_15m = np.array(prices_15m["closes"])
-                rsi_15m = calculate_rsi(closes_15m)
+                rsi_15m = self.get_timeframe_indicators(symbol, "15m", data_15m)["rsi"]
             else:
                 rsi_15m = rsi_5m
             
@@ -156,7 +242,8 @@ class MarketAnalyzer:
                 "ema_slow": ema_slow_val,
                 "price": close_now,
                 "candle_change_percent": candle_change_percent,
-                "atr": atr_val
+                "atr": atr_val,
+                "hour": datetime.fromtimestamp(data_1m[-1][0] / 1000).hour  # Hora de la vela actual
             }
 
             confidence_score = calculate_realistic_scalping_score(scoring_data)
@@ -209,15 +296,39 @@ class MarketAnalyzer:
             logger.error(f"❌ Error analizando {symbol}: {e}")
             return False
     
+    def _analyze_symbol_timed(self, symbol):
+        """Analiza un símbolo y mide el tiempo empleado"""
+        start = time.perf_counter()
+        success = self.analyze_symbol(symbol)
+        return success, time.perf_counter() - start
+
     def analyze_all_symbols(self):
-        """Analiza todos los símbolos"""
+        """Analiza todos los símbolos en paralelo"""
+        cycle_start = time.perf_counter()
+        futures = {
+            symbol: self.executor.submit(self._analyze_symbol_timed, symbol)
+            for symbol in self.symbols
+        }
+
         success_count = 0
-        for symbol in self.symbols:
-            if self.analyze_symbol(symbol):
+        for symbol, future in futures.items():
+            success, elapsed = future.result()
+            self.symbol_timings[symbol] = elapsed
+            self.market_data[symbol]["analysis_time_ms"] = elapsed * 1000
+            if success:
                 success_count += 1
-        
-        logger.info(f"📊 Análisis completado: {success_count}/{len(self.symbols)} símbolos")
+
+        self.last_cycle_duration = time.perf_counter() - cycle_start
+        invalidate_responses(MARKET)
+        publish_market(self.market_data)
+        timings = ", ".join(f"{s} {t * 1000:.0f}ms" for s, t in self.symbol_timings.items())
+        logger.info(f"⏱️ Tiempos por símbolo: {timings}")
+        logger.info(f"📊 Análisis completado: {success_count}/{len(self.symbols)} símbolos en {self.last_cycle_duration:.2f}s")
         return success_count > 0
+
+    def get_symbol_timings(self):
+        """Retorna los tiempos de análisis por símbolo del último ciclo (segundos)"""
+        return dict(self.symbol_timings)
     
     def get_market_data(self):
         """Retorna los datos del mercado"""
@@ -0,0 +1,310 @@
+# market_stream.py - Ingesta de velas en streaming (alternativa al polling REST)
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from binance_api import binance_api, TIMEFRAMES
+from config import Config
+from response_cache import invalidate_responses, MARKET
+from live_feed import publish_market
+
+logger = logging.getLogger(__name__)
+
+try:
+    import websocket  # websocket-client
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+    logger.warning("websocket-client no disponible - solo replay local (tcp://)")
+
+def kline_event_to_row(k: Dict) -> List:
+    """Convierte el payload 'k' de un evento kline al formato de fila REST"""
+    return [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"],
+            k.get("q", "0"), k.get("n", 0), k.get("V", "0"), k.get("Q", "0"), "0"]
+
+def kline_to_message(symbol: str, interval: str, kline: List, closed: bool = True) -> Dict:
+    """Convierte una fila REST de velas en un mensaje de stream combinado de Binance"""
+    return {
+        "stream": f"{symbol.lower()}@kline_{interval}",
+        "data": {
+            "e": "kline",
+            "E": kline[6],
+            "s": symbol,
+            "k": {
+                "t": kline[0], "T": kline[6], "s": symbol, "i": interval,
+                "o": kline[1], "h": kline[2], "l": kline[3], "c": kline[4], "v": kline[5],
+                "q": kline[7] if len(kline) > 7 else "0",
+                "n": kline[8] if len(kline) > 8 else 0,
+                "x": closed
+            }
+        }
+    }
+
+class MarketStream:
+    """Mantiene el estado de velas en vivo por símbolo/intervalo y dispara el análisis"""
+
+    def __init__(self, analyzer, url: str = None, on_analysis: Optional[Callable] = None,
+                 intracandle: bool = False, min_analysis_interval: float = 1.0,
+                 record_path: Optional[str] = None):
+        self.analyzer = analyzer
+        self.url = url or Config.STREAM_URL
+        self.on_analysis = on_analysis
+        self.intracandle = intracandle
+        self.min_analysis_interval = min_analysis_interval
+        self.record_path = record_path
+
+        self.kline_cache = binance_api.kline_cache
+        self.symbol_info = {}          # symbol -> datos 24h del stream @ticker
+        self.last_analysis = {}        # symbol -> time.monotonic() del último análisis
+        self.messages_received = 0
+        self.running = False
+        self.thread = None
+        self._connection = None
+
+    def stream_names(self) -> List[str]:
+        """Nombres de streams a suscribir (velas de todos los timeframes + ticker 24h)"""
+        names = []
+        for symbol in self.analyzer.symbols:
+            lower = symbol.lower()
+            names.extend(f"{lower}@kline_{interval}" for interval, _ in TIMEFRAMES)
+            names.append(f"{lower}@ticker")
+        return names
+
+    def seed_from_rest(self):
+        """Rellena los buffers de velas con la ventana histórica vía REST"""
+        for symbol in self.analyzer.symbols:
+            if not binance_api.get_multi_timeframe_data(symbol):
+                logger.warning(f"⚠️ Stream: no se pudo precargar historial de {symbol}")
+
+    def get_timeframe_data(self, symbol: str) -> Optional[Dict]:
+        """Construye timeframe_data desde los buffers en vivo"""
+        data = {}
+        for interval, limit in TIMEFRAMES:
+            klines = self.kline_cache.get(symbol, interval, limit)
+            if klines is None:
+                return None
+            data[interval] = klines
+        return data
+
+    def handle_message(self, message: Dict):
+        """Procesa un mensaje del stream combinado"""
+        self.messages_received += 1
+        data = message.get("data", message)
+        event = data.get("e")
+
+        if event == "24hrTicker":
+            self.symbol_info[data["s"]] = {
+                "priceChangePercent": data.get("P", 0),
+                "priceChange": data.get("p", 0)
+            }
+            return
+
+        if event != "kline":
+            return
+
+        k = data["k"]
+        symbol = k["s"]
+        interval = k["i"]
+        if self.kline_cache.merge(symbol, interval, [kline_event_to_row(k)]) is None:
+            return  # Sin historial precargado para este símbolo/intervalo
+
+        # Analizar al cerrar vela de 1m (o en cada actualización si intracandle)
+        if interval != "1m" or not (k["x"] or self.intracandle):
+            return
+
+        now = time.monotonic()
+        if not k["x"] and now - self.last_analysis.get(symbol, 0) < self.min_analysis_interval:
+            return
+        self.last_analysis[symbol] = now
+        self.analyze(symbol)
+
+    def analyze(self, symbol: str) -> bool:
+        """Ejecuta el análisis de un símbolo con los datos del stream"""
+        timeframe_data = self.get_timeframe_data(symbol)
+        if not timeframe_data:
+            return False
+
+        start = time.perf_counter()
+        success = self.analyzer.analyze_symbol(
+            symbol, timeframe_data=timeframe_data, symbol_info=self.symbol_info.get(symbol, {})
+        )
+        self.analyzer.market_data[symbol]["analysis_time_ms"] = (time.perf_counter() - start) * 1000
+        invalidate_responses(MARKET)
+        publish_market(self.analyzer.market_data, (symbol,))
+
+        if success and self.on_analysis:
+            try:
+                self.on_analysis(symbol)
+            except Exception as e:
+                logger.error(f"❌ Stream: error en callback de análisis para {symbol}: {e}")
+        return success
+
+    def _connect(self):
+        """Abre la conexión y retorna una función que lee el siguiente mensaje"""
+        parsed = urlparse(self.url)
+
+        if parsed.scheme == "tcp":
+            # Servidor de replay local: JSON por línea
+            sock = socket.create_connection((parsed.hostname, parsed.port), timeout=30)
+            self._connection = sock
+            reader = sock.makefile("r", encoding="utf-8")
+            return lambda: reader.readline()
+
+        if not WEBSOCKET_AVAILABLE:
+            raise RuntimeError("websocket-client no instalado")
+
+        url = f"{self.url}?streams={'/'.join(self.stream_names())}"
+        ws = websocket.create_connection(url, timeout=30)
+        self._connection = ws
+        return ws.recv
+
+    def _run(self):
+        """Bucle de lectura con reconexión automática"""
+        backoff = 1
+        record_file = open(self.record_path, "a", encoding="utf-8") if self.record_path else None
+
+        try:
+            while self.running:
+                try:
+                    read = self._connect()
+                    logger.info(f"📡 Stream conectado: {self.url}")
+                    backoff = 1
+
+                    while self.running:
+                        raw = read()
+                        if not raw:
+                            break  # Conexión cerrada por el servidor
+                        if record_file:
+                            record_file.write(raw.strip() + "\n")
+                        self.handle_message(json.loads(raw))
+
+                except Exception as e:
+                    if self.running:
+                        logger.error(f"❌ Stream desconectado: {e} - reintentando en {backoff}s")
+                finally:
+                    self._close_connection()
+
+                if self.running:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 60)
+        finally:
+            if record_file:
+                record_file.close()
+
+    def _close_connection(self):
+        """Cierra la conexión actual si existe"""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def start(self, seed: bool = True) -> bool:
+        """Inicia el stream en un hilo separado"""
+        if self.running:
+            return True
+        if urlparse(self.url).scheme != "tcp" and not WEBSOCKET_AVAILABLE:
+            logger.warning("⚠️ Stream no disponible (falta websocket-client) - usando polling REST")
+            return False
+
+        if seed:
+            self.seed_from_rest()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="market-stream")
+        self.thread.start()
+        logger.info(f"🚀 Stream de mercado iniciado ({len(self.stream_names())} streams)")
+        return True
+
+    def stop(self):
+        """Detiene el stream"""
+        self.running = False
+        self._close_connection()
+
+    def is_alive(self) -> bool:
+        """Indica si el hilo del stream sigue activo"""
+        return bool(self.thread and self.thread.is_alive())
+
+class _ReplayHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for message in self.server.messages:
+            try:
+                self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            if self.server.delay:
+                time.sleep(self.server.delay)
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    """Servidor local que reproduce mensajes grabados (sustituto del stream de Binance)"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, messages: List[Dict], host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        super().__init__((host, port), _ReplayHandler)
+        self.messages = messages
+        self.delay = delay
+        self.thread = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs):
+        """Crea el servidor desde un fichero JSONL grabado con record_path"""
+        with open(path, "r", encoding="utf-8") as f:
+            messages = [json.loads(line) for line in f if line.strip()]
+        return cls(messages, **kwargs)
+
+    @classmethod
+    def from_klines(cls, klines_by_symbol: Dict[str, List], interval: str = "1m", **kwargs):
+        """Crea el servidor desde velas REST (una vela cerrada por mensaje)"""
+        messages = []
+        for symbol, klines in klines_by_symbol.items():
+            messages.extend(kline_to_message(symbol, interval, k) for k in klines)
+        messages.sort(key=lambda m: m["data"]["E"])
+        return cls(messages, **kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"tcp://{host}:{port}"
+
+    def start(self):
+        """Sirve en un hilo en segundo plano"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True, name="replay-server")
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor"""
+        self.shutdown()
+        self.server_close()
+
+# Instancia global (se crea al iniciar el modo stream)
+market_stream = None
+
+def start_market_stream(analyzer, on_analysis=None) -> bool:
+    """Función helper para iniciar el stream con la configuración global"""
+    global market_stream
+    market_stream = MarketStream(
+        analyzer,
+        url=Config.STREAM_URL,
+        on_analysis=on_analysis,
+        intracandle=Config.STREAM_INTRACANDLE,
+        min_analysis_interval=Config.STREAM_MIN_ANALYSIS_INTERVAL
+    )
+    return market_stream.start()
+
+def stop_market_stream():
+    """Función helper para detener el stream"""
+    if market_stream:
+        market_stream.stop()
+
+def is_market_stream_alive() -> bool:
+    """Función helper para saber si el stream está activo"""
+    return bool(market_stream and market_stream.is_alive())
@@ -0,0 +1,364 @@
+# notifier.py - Notificación de señales en abanico: SMTP, webhook y fichero, cada canal con sus propios hilos
+import json
+import queue
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from config import Config
+from http_client import http_post
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de ciclo de análisis que recorre la cola de cada canal (sin límite de ritmo)
+CYCLE_END = object()
+
+def plain_value(value):
+    """Escalares de numpy a tipos de Python (serializables en JSON)"""
+    return value.item() if hasattr(value, "item") else value
+
+def signal_event(**signal) -> Dict:
+    """Evento de señal con los argumentos de create_professional_email"""
+    signal = {key: plain_value(value) for key, value in signal.items()}
+    signal["conditions"] = {key: plain_value(value) for key, value in (signal.get("conditions") or {}).items()}
+    return {"event": "signal", "timestamp": datetime.now().isoformat(), "signal": signal}
+
+class Sink:
+    """Destino de notificaciones: send() entrega un evento o lanza una excepción"""
+
+    name = "sink"
+    tick_interval = None  # Segundos entre llamadas a tick() con la cola vacía (None = nunca)
+
+    def send(self, event: Dict):
+        raise NotImplementedError
+
+    def end_cycle(self) -> bool:
+        """Fin de un ciclo de análisis (por defecto no hace nada). True si entregó algo"""
+        return False
+
+    def tick(self) -> bool:
+        """Trabajo periódico del canal sin eventos pendientes. True si entregó algo"""
+        return False
+
+class SMTPSink(Sink):
+    """Email de la señal enviado desde el hilo del canal (conexión persistente, reintentos y resumen por ciclo)
+
+    send() lanza si el email no se pudo enviar tras los reintentos, así que los fallos SMTP llegan al
+    circuit breaker del canal. Con la cola vacía cierra la conexión tras idle_timeout segundos sin
+    enviar y envía los resúmenes cuya ventana terminó.
+    """
+
+    name = "smtp"
+    tick_interval = 1
+
+    def __init__(self, idle_timeout: float = 60):
+        self.idle_timeout = idle_timeout
+        self._last_used = None  # Último envío con la conexión aún abierta
+
+    def send(self, event: Dict):
+        from email_service import send_signal_email
+        try:
+            send_signal_email(digest_group=event.get("digest_group"), **event["signal"])
+        finally:
+            self._last_used = time.monotonic()
+
+    def end_cycle(self) -> bool:
+        from email_service import end_signal_cycle
+        try:
+            return end_signal_cycle()
+        finally:
+            self._last_used = time.monotonic()
+
+    def tick(self) -> bool:
+        from email_service import flush_due_signal_digest, close_email_connection
+        try:
+            sent = flush_due_signal_digest()
+        finally:
+            if self._last_used is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+                close_email_connection()
+                self._last_used = None
+        if sent:
+            self._last_used = time.monotonic()
+        return sent
+
+class WebhookSink(Sink):
+    """POST del evento en JSON a una URL (conexiones keep-alive del transporte compartido)"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, event: Dict):
+        response = http_post(self.url, data=json.dumps(event, ensure_ascii=False, default=str).encode("utf-8"),
+                             headers={"Content-Type": "application/json"}, timeout=self.timeout)
+        response.raise_for_status()
+
+class FileSink(Sink):
+    """Añade cada evento como una línea JSON a un fichero local (para otros procesos o auditoría)"""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, event: Dict):
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+class QueueSink(Sink):
+    """Deja los eventos en una cola en memoria (consumidores del mismo proceso y pruebas)"""
+
+    name = "queue"
+
+    def __init__(self, maxsize: int = 0):
+        self.events = queue.Queue(maxsize=maxsize)
+
+    def send(self, event: Dict):
+        self.events.put_nowait(event)
+
+class RateLimiter:
+    """Token bucket: rate eventos por segundo con ráfagas de hasta burst (rate <= 0 = sin límite)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Espera hasta que haya un token disponible"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """Tras failure_threshold fallos seguidos deja de llamar al destino durante reset_timeout segundos
+
+    Pasado ese tiempo deja pasar un intento (semiabierto): si sale bien se cierra, si falla vuelve a abrirse.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial:
+                self._trial = True  # Un único intento de prueba
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+class NotifierChannel:
+    """Un destino con su cola acotada, sus hilos, su límite de ritmo y su circuit breaker
+
+    submit() nunca bloquea: si la cola está llena el evento se descarta y se cuenta. Un destino
+    lento o caído solo llena su propia cola.
+    """
+
+    def __init__(self, sink: Sink, workers: int = 1, rate: float = 0, burst: int = 1, queue_size: int = 100,
+                 failure_threshold: int = 5, reset_timeout: float = 60):
+        self.sink = sink
+        self.name = sink.name
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.limiter = RateLimiter(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self.delivered = 0
+        self.failed = 0
+        self.rejected = 0  # Descartados con el circuito abierto
+        self.dropped = 0   # Descartados por cola llena
+
+    def start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"notify-{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, event) -> bool:
+        self.start()
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"📣 Cola del canal {self.name} llena - notificación descartada")
+            return False
+
+    def _run(self):
+        while True:
+            try:
+                event = self.queue.get(timeout=self.sink.tick_interval)
+            except queue.Empty:
+                self._maintain(self.sink.tick)
+                continue
+            try:
+                if event is CYCLE_END:
+                    self._maintain(self.sink.end_cycle)
+                else:
+                    self._deliver(event)
+            except Exception as e:
+                logger.error(f"❌ Canal {self.name}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _maintain(self, task):
+        """Fin de ciclo o tick: se ejecuta aunque el circuito esté abierto (envía lo ya aceptado)"""
+        try:
+            delivered = task()
+        except Exception as e:
+            self.failed += 1
+            self.breaker.record_failure()
+            logger.error(f"❌ Notificación {self.name} fallida ({e})"
+                         f"{' - circuito abierto' if self.breaker.state != 'closed' else ''}")
+            return
+        if delivered:
+            self.breaker.record_success()
+
+    def _deliver(self, event: Dict):
+        if not self.breaker.allow():
+            self.rejected += 1
+            return
+        self.limiter.acquire()
+        try:
+            self.sink.send(event)
+        except Exception as e:
+            self.failed += 1
+            self.breaker.record_failure()
+            state = self.breaker.state
+            logger.error(f"❌ Notificación {self.name} fallida ({e})"
+                         f"{' - circuito abierto' if state != 'closed' else ''}")
+            return
+        self.breaker.record_success()
+        self.delivered += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            "queued": self.queue.qsize(), "delivered": self.delivered, "failed": self.failed,
+            "rejected": self.rejected, "dropped": self.dropped, "circuit": self.breaker.state
+        }
+
+class Notifier:
+    """Publica cada evento en todos los canales sin esperar a ninguno"""
+
+    def __init__(self, channels: List[NotifierChannel] = None):
+        self.channels = channels or []
+
+    def publish(self, event: Dict) -> Dict[str, bool]:
+        """Si cada canal aceptó el evento, por nombre de canal"""
+        return {channel.name: channel.submit(event) for channel in self.channels}
+
+    def end_cycle(self):
+        """Avisa a los canales del fin del ciclo, en orden tras las señales ya publicadas"""
+        for channel in self.channels:
+            if type(channel.sink).end_cycle is not Sink.end_cycle:
+                channel.submit(CYCLE_END)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Espera a que los canales vacíen sus colas (pruebas y apagado)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for channel in self.channels:
+            while channel.queue.unfinished_tasks:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.02)
+        return True
+
+    def get_stats(self) -> Dict:
+        return {channel.name: channel.get_stats() for channel in self.channels}
+
+def build_notifier(channel_names: str = None) -> Notifier:
+    """Canales de NOTIFY_CHANNELS (smtp, webhook, file) con la configuración de Config"""
+    sinks = {
+        "smtp": lambda: SMTPSink(Config.SMTP_IDLE_TIMEOUT),
+        "webhook": lambda: WebhookSink(Config.NOTIFY_WEBHOOK_URL, Config.NOTIFY_WEBHOOK_TIMEOUT),
+        "file": lambda: FileSink(Config.NOTIFY_FILE)
+    }
+    channels = []
+    for name in (channel_names if channel_names is not None else Config.NOTIFY_CHANNELS).split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in sinks:
+            logger.warning(f"⚠️ Canal de notificación desconocido: {name}")
+            continue
+        if name == "smtp" and not (Config.EMAIL_FROM and Config.EMAIL_PASSWORD and Config.EMAIL_TO):
+            logger.warning("⚠️ Canal smtp sin EMAIL_FROM/EMAIL_PASSWORD/EMAIL_TO - desactivado")
+            continue
+        if name == "webhook" and not Config.NOTIFY_WEBHOOK_URL:
+            logger.warning("⚠️ Canal webhook sin NOTIFY_WEBHOOK_URL - desactivado")
+            continue
+        channels.append(NotifierChannel(
+            sinks[name](),
+            workers=1 if name == "smtp" else Config.NOTIFY_WORKERS,  # SMTP: el orden importa para el resumen por ciclo
+            rate=Config.NOTIFY_RATE, burst=Config.NOTIFY_BURST,
+            queue_size=Config.EMAIL_QUEUE_SIZE if name == "smtp" else Config.NOTIFY_QUEUE_SIZE,
+            failure_threshold=Config.NOTIFY_BREAKER_FAILURES, reset_timeout=Config.NOTIFY_BREAKER_RESET
+        ))
+    return Notifier(channels)
+
+# Instancia global
+notifier = build_notifier()
+
+def notify_signal(digest_group: int = None, **signal) -> Dict[str, bool]:
+    """Función helper para publicar una señal en todos los canales (no bloquea)
+
+    digest_group es el resumen de email (EMAIL_DIGEST) al que va la señal.
+    """
+    event = signal_event(**signal)
+    if digest_group is not None:
+        event["digest_group"] = digest_group
+    return notifier.publish(event)
+
+def end_notification_cycle():
+    """Función helper para marcar el fin de un ciclo de análisis"""
+    notifier.end_cycle()
+
+def get_notifier_stats() -> Dict:
+    """Función helper con las estadísticas de cada canal"""
+    return notifier.get_stats()
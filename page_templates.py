@@ -0,0 +1,32 @@
+# page_templates.py - Plantillas HTML precompiladas para los dashboards
+from string import Formatter
+from typing import List, Tuple
+
+class PageTemplate:
+    """Página HTML compilada una sola vez al importar el módulo
+
+    Usa la sintaxis de str.format ({campo}, {campo:.1f} y llaves literales como {{ }}), así que el
+    CSS y el JavaScript se copian tal cual desde los antiguos f-strings. El texto estático se trocea
+    en literales al compilar; cada petición solo formatea los campos y hace un único join.
+    Un campo con una lista de fragmentos (filas) se inserta tal cual, sin un join intermedio.
+    """
+
+    def __init__(self, source: str):
+        self._parts: List[Tuple[str, str, str]] = []  # (literal, campo, formato)
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if conversion or (field is not None and not field.isidentifier()):
+                raise ValueError(f"Campo no soportado en plantilla: {field!r}")
+            self._parts.append((literal, field, spec or ""))
+
+    def render(self, **context) -> str:
+        """HTML de la página con los campos de context"""
+        chunks = []
+        for literal, field, spec in self._parts:
+            chunks.append(literal)
+            if field:
+                value = context[field]
+                if isinstance(value, list):
+                    chunks.extend(value)
+                else:
+                    chunks.append(format(value, spec))
+        return "".join(chunks)
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# parameter_optimizer.py - Barrido de parámetros (grid / aleatorio / bayesiano) validado con backtests
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backtester import (
+    TUNABLE_PARAMS, backtest_symbol, load_symbol_files, parse_timeframes, symbol_from_path
+)
+from binance_api import TIMEFRAMES
+from config import Config
+from indicators import calculate_price_targets
+from market_analyzer import market_analyzer
+from trading_logic import TradingLogic
+
+logger = logging.getLogger(__name__)
+
+# Espacio de búsqueda por defecto (valores discretos por parámetro)
+DEFAULT_SEARCH_SPACE = {
+    "ema_fast": [5, 7, 9, 10, 12],
+    "ema_slow": [18, 20, 21, 23, 26],
+    "tp_multiplier": [1.5, 1.8, 2.0, 2.5],
+    "sl_multiplier": [0.8, 0.9, 1.0, 1.2],
+    "required_buy": [4, 5, 6],
+    "required_sell": [4, 5, 6]
+}
+
+OBJECTIVES = ("total_return", "win_rate", "return_over_drawdown")
+
+# Módulos cuyo código decide el resultado de un backtest (si cambian, la cache deja de valer)
+BACKTEST_MODULES = ("backtester", "indicators", "market_analyzer", "performance_tracker", "trading_logic")
+
+# Velas cargadas una sola vez por proceso del pool
+_worker_klines = {}
+
+def _init_worker(paths_by_symbol: Dict[str, List[str]]):
+    """Inicializador del pool: carga los datos históricos en el proceso"""
+    for symbol, paths in paths_by_symbol.items():
+        _worker_klines[symbol] = load_symbol_files(paths)
+
+def _evaluate_task(symbol: str, params: Dict, timeframes) -> Dict:
+    """Backtest de un candidato sobre un símbolo (se ejecuta en el pool)"""
+    return summarize_trades(backtest_symbol(symbol, _worker_klines[symbol], timeframes, params))
+
+def summarize_trades(trades: List[Dict]) -> Dict:
+    """Resumen compacto (y serializable) de las operaciones de un backtest"""
+    resolved = sorted(
+        (t["outcome"]["exit_timestamp"], t["outcome"]["result"], t["outcome"]["actual_return"])
+        for t in trades if t["outcome"]
+    )
+    return {
+        "signals": len(trades),
+        "pending": len(trades) - len(resolved),
+        "closed": resolved  # (exit_timestamp, result, actual_return) en orden de cierre
+    }
+
+def combine_summaries(summaries: List[Dict]) -> Dict:
+    """Métricas de uno o varios símbolos (drawdown sobre la curva combinada)"""
+    closed = sorted(itertools.chain.from_iterable(s["closed"] for s in summaries))
+    results = [c[1] for c in closed]
+    returns = np.array([c[2] for c in closed], dtype=float)
+
+    wins = sum(1 for r in results if r.startswith("WIN"))
+    losses = sum(1 for r in results if r.startswith("LOSS"))
+
+    max_drawdown = 0.0
+    if len(returns):
+        equity = np.cumsum(returns)
+        peaks = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+        max_drawdown = float(np.max(peaks - equity))
+
+    total_return = float(returns.sum()) if len(returns) else 0.0
+    return {
+        "total_signals": sum(s["signals"] for s in summaries),
+        "wins": wins,
+        "losses": losses,
+        "expired": results.count("EXPIRED"),
+        "pending": sum(s["pending"] for s in summaries),
+        "win_rate": (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0,
+        "avg_return": float(returns.mean()) if len(returns) else 0,
+        "total_return": total_return,
+        "max_drawdown": max_drawdown,
+        "return_over_drawdown": total_return / max_drawdown if max_drawdown > 0 else total_return
+    }
+
+def current_params(symbol: str) -> Dict:
+    """Valores actuales en vivo de los parámetros optimizables para un símbolo"""
+    analyzer_params = market_analyzer.get_adaptive_params(market_analyzer.detect_pair_type(symbol))
+    required = TradingLogic().required_criteria
+
+    # Con precio 1 y ATR 1 la distancia a TP/SL es directamente el multiplicador
+    targets = calculate_price_targets(1.0, 1.0, "buy", symbol)
+    return {
+        "ema_fast": analyzer_params["ema_fast"],
+        "ema_slow": analyzer_params["ema_slow"],
+        "tp_multiplier": round(targets["take_profit"] - 1.0, 6),
+        "sl_multiplier": round(1.0 - targets["stop_loss"], 6),
+        "required_buy": required["buy_trend"],
+        "required_sell": required["sell_trend"]
+    }
+
+class ParameterOptimizer:
+    """Evalúa candidatos de parámetros con backtests en paralelo y los ordena por un objetivo"""
+
+    def __init__(self, paths_by_symbol: Dict[str, List[str]], search_space: Optional[Dict] = None,
+                 timeframes=TIMEFRAMES, objective: str = "total_return", min_signals: int = 10,
+                 max_workers: Optional[int] = None, cache_path: Optional[str] = None, seed: int = 42):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Objetivo desconocido: {objective} (opciones: {', '.join(OBJECTIVES)})")
+
+        self.paths_by_symbol = {s: sorted(p) for s, p in sorted(paths_by_symbol.items())}
+        self.symbols = list(self.paths_by_symbol)
+        self.search_space = {k: list(v) for k, v in (search_space or DEFAULT_SEARCH_SPACE).items()}
+        unknown = set(self.search_space) - set(TUNABLE_PARAMS)
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+
+        self.timeframes = tuple(timeframes)
+        self.objective = objective
+        self.min_signals = min_signals
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed = seed
+        self.fingerprint = self.data_fingerprint()
+
+        # Cache de resultados: (candidato, símbolo, datos) -> resumen del backtest
+        self.cache_path = cache_path
+        self.cache = self._load_cache()
+        self.cache_hits = 0
+        self.evaluations = 0
+        self._pool = None
+
+    def data_fingerprint(self) -> str:
+        """Huella de los datos, timeframes, parámetros en vivo y código del backtest (invalida la cache si cambian)
+
+        El candidato {} y los parciales heredan los valores en vivo, así que estos forman parte de la huella.
+        """
+        digest = hashlib.sha1()
+        for symbol, paths in self.paths_by_symbol.items():
+            for path in paths:
+                stat = os.stat(path)
+                digest.update(f"{symbol}|{os.path.basename(path)}|{stat.st_size}|{int(stat.st_mtime)}".encode())
+            sell_targets = calculate_price_targets(1.0, 1.0, "sell", symbol)
+            digest.update(json.dumps([current_params(symbol), sell_targets], sort_keys=True, default=str).encode())
+        digest.update(json.dumps(self.timeframes).encode())
+        digest.update(json.dumps(TradingLogic().required_criteria, sort_keys=True).encode())
+        digest.update(json.dumps([Config.TIMEOUT_HOURS, Config.WIN_THRESHOLD_PERCENT,
+                                  Config.LOSS_THRESHOLD_PERCENT]).encode())
+        for module in BACKTEST_MODULES:
+            with open(sys.modules[module].__file__, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def _load_cache(self) -> Dict:
+        if self.cache_path and os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Cache de optimización ilegible ({e}) - se ignora")
+        return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def candidate_key(candidate: Dict) -> str:
+        return json.dumps(candidate, sort_keys=True)
+
+    def _cache_key(self, candidate: Dict, symbol: str) -> str:
+        return f"{self.fingerprint}|{symbol}|{self.candidate_key(candidate)}"
+
+    @staticmethod
+    def is_valid(candidate: Dict) -> bool:
+        return candidate.get("ema_fast", 0) < candidate.get("ema_slow", float("inf"))
+
+    def grid_candidates(self) -> List[Dict]:
+        """Todas las combinaciones válidas del espacio de búsqueda"""
+        names = sorted(self.search_space)
+        combos = itertools.product(*(self.search_space[n] for n in names))
+        return [c for c in (dict(zip(names, values)) for values in combos) if self.is_valid(c)]
+
+    def random_candidates(self, n_iter: int, rng: random.Random) -> List[Dict]:
+        """Muestra aleatoria (sin repetición) del grid"""
+        grid = self.grid_candidates()
+        return rng.sample(grid, min(n_iter, len(grid)))
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker, initargs=(self.paths_by_symbol,)
+            )
+        return self._pool
+
+    def close(self):
+        """Cierra el pool de procesos"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def evaluate(self, candidates: List[Dict]) -> Dict[str, Dict]:
+        """Evalúa candidatos en todos los símbolos reutilizando la cache"""
+        pending = {}
+        for candidate in candidates:
+            for symbol in self.symbols:
+                key = self._cache_key(candidate, symbol)
+                if key in self.cache:
+                    self.cache_hits += 1
+                elif key not in pending:
+                    pending[key] = (symbol, candidate)
+
+        if pending:
+            if self.max_workers > 1:
+                pool = self._get_pool()
+                futures = {key: pool.submit(_evaluate_task, symbol, candidate, self.timeframes)
+                           for key, (symbol, candidate) in pending.items()}
+                for key, future in futures.items():
+                    self.cache[key] = future.result()
+            else:
+                if not _worker_klines:
+                    _init_worker(self.paths_by_symbol)
+                for key, (symbol, candidate) in pending.items():
+                    self.cache[key] = _evaluate_task(symbol, candidate, self.timeframes)
+
+            self.evaluations += len(pending)
+            self._save_cache()
+
+        return {self.candidate_key(c): self.candidate_metrics(c) for c in candidates}
+
+    def candidate_metrics(self, candidate: Dict, symbols: Optional[List[str]] = None) -> Dict:
+        """Métricas (ya evaluadas) de un candidato sobre uno o varios símbolos"""
+        summaries = [self.cache[self._cache_key(candidate, s)] for s in (symbols or self.symbols)]
+        metrics = combine_summaries(summaries)
+        metrics["score"] = self.score(metrics)
+        return metrics
+
+    def score(self, metrics: Dict) -> Optional[float]:
+        """Valor del objetivo (None si no hay señales suficientes para ser fiable)"""
+        if metrics["wins"] + metrics["losses"] + metrics["expired"] < self.min_signals:
+            return None
+        return metrics[self.objective]
+
+    def _suggest_bayesian(self, history: List, evaluated: set, batch_size: int, rng: random.Random,
+                          gamma: float = 0.25, n_samples: int = 64) -> List[Dict]:
+        """Propone candidatos con un estimador de Parzen (TPE) sobre los valores discretos"""
+        ranked = sorted(history, key=lambda h: (h[1] is None, -(h[1] or 0)))
+        n_good = max(1, math.ceil(gamma * len(ranked)))
+        good = [c for c, _ in ranked[:n_good]]
+        bad = [c for c, _ in ranked[n_good:]]
+
+        def density(group, name, value):
+            values = self.search_space[name]
+            return (sum(1 for c in group if c[name] == value) + 1) / (len(group) + len(values))
+
+        scored = {}
+        names = sorted(self.search_space)
+        for _ in range(n_samples):
+            candidate = {}
+            for name in names:
+                values = self.search_space[name]
+                weights = [density(good, name, v) for v in values]
+                candidate[name] = rng.choices(values, weights=weights)[0]
+
+            key = self.candidate_key(candidate)
+            if key in evaluated or key in scored or not self.is_valid(candidate):
+                continue
+            ratio = 1.0
+            for name in names:
+                ratio *= density(good, name, candidate[name]) / density(bad, name, candidate[name])
+            scored[key] = (ratio, candidate)
+
+        best = sorted(scored.items(), key=lambda item: (-item[1][0], item[0]))[:batch_size]
+        return [candidate for _, (_, candidate) in best]
+
+    def search(self, method: str = "random", n_iter: int = 30, n_initial: int = 10) -> Dict:
+        """Ejecuta la búsqueda y retorna el informe ordenado"""
+        start = time.perf_counter()
+        rng = random.Random(self.seed)
+
+        try:
+            self.evaluate([{}])  # Línea base: parámetros actuales en vivo
+
+            if method == "grid":
+                candidates = self.grid_candidates()
+                results = self.evaluate(candidates)
+            elif method == "random":
+                candidates = self.random_candidates(n_iter, rng)
+                results = self.evaluate(candidates)
+            elif method == "bayesian":
+                candidates = self.random_candidates(min(n_initial, n_iter), rng)
+                results = self.evaluate(candidates)
+                batch_size = max(1, self.max_workers)
+
+                while len(candidates) < n_iter:
+                    history = [(c, results[self.candidate_key(c)]["score"]) for c in candidates]
+                    batch = self._suggest_bayesian(history, set(results), min(batch_size, n_iter - len(candidates)), rng)
+                    if not batch:
+                        break  # Espacio agotado
+                    results.update(self.evaluate(batch))
+                    candidates.extend(batch)
+            else:
+                raise ValueError(f"Método desconocido: {method} (grid | random | bayesian)")
+        finally:
+            self.close()
+
+        return self.build_report(method, candidates, time.perf_counter() - start)
+
+    def _rank(self, candidates: List[Dict], symbols: Optional[List[str]] = None) -> List[Dict]:
+        rows = []
+        for candidate in candidates:
+            metrics = self.candidate_metrics(candidate, symbols)
+            if metrics["score"] is not None:
+                rows.append({"params": candidate, **metrics})
+        rows.sort(key=lambda r: (-r["score"], self.candidate_key(r["params"])))
+        for rank, row in enumerate(rows, 1):
+            row["rank"] = rank
+        return rows
+
+    def build_report(self, method: str, candidates: List[Dict], elapsed: float, top_n: int = 10) -> Dict:
+        """Informe reproducible: ranking global, mejor candidato por símbolo y recomendaciones"""
+        baseline = self.candidate_metrics({})
+        ranking = self._rank(candidates)
+        per_symbol = {}
+        for symbol in self.symbols:
+            symbol_ranking = self._rank(candidates, [symbol])
+            per_symbol[symbol] = {
+                "current": current_params(symbol),
+                "baseline": self.candidate_metrics({}, [symbol]),
+                "best": symbol_ranking[0] if symbol_ranking else None
+            }
+
+        report = {
+            "method": method,
+            "objective": self.objective,
+            "seed": self.seed,
+            "data_fingerprint": self.fingerprint,
+            "symbols": self.symbols,
+            "timeframes": dict(self.timeframes),
+            "search_space": self.search_space,
+            "candidates": len(candidates),
+            "backtests_run": self.evaluations,
+            "cache_hits": self.cache_hits,
+            "elapsed_seconds": elapsed,
+            "baseline": baseline,
+            "ranking": ranking[:top_n],
+            "per_symbol": per_symbol,
+            "timestamp": datetime.now().isoformat()
+        }
+        report["recommendations"] = self.build_recommendations(report)
+
+        best = ranking[0] if ranking else None
+        logger.info(f"🔧 Barrido {method}: {len(candidates)} candidatos, {self.evaluations} backtests, "
+                    f"{self.cache_hits} desde cache ({elapsed:.1f}s)")
+        if best:
+            logger.info(f"🏆 Mejor {self.objective}: {best['score']:.2f} (base {baseline['score']}) con {best['params']}")
+        return report
+
+    def build_recommendations(self, report: Dict) -> List[Dict]:
+        """Recomendaciones con el mismo formato que AdaptiveOptimizer.get_optimization_recommendations"""
+        recommendations = []
+        for symbol, info in report["per_symbol"].items():
+            best = info["best"]
+            baseline_score = info["baseline"]["score"]
+            if not best or (baseline_score is not None and best["score"] <= baseline_score):
+                continue
+            baseline_text = f"{baseline_score:.2f}" if baseline_score is not None else "N/A"
+
+            for name, suggested in sorted(best["params"].items()):
+                current = info["current"][name]
+                if suggested == current:
+                    continue
+                recommendations.append({
+                    'type': name.upper(),
+                    'symbol': symbol,
+                    'action': 'INCREASE' if suggested > current else 'DECREASE',
+                    'current': current,
+                    'suggested': suggested,
+                    'reason': f"{symbol}: {self.objective} {best['score']:.2f} vs {baseline_text} actual "
+                              f"en backtest ({best['total_signals']} señales, WR {best['win_rate']:.1f}%)"
+                })
+        return recommendations
+
+def group_paths(paths: List[str]) -> Dict[str, List[str]]:
+    """Agrupa ficheros de velas por símbolo"""
+    paths_by_symbol = {}
+    for path in paths:
+        paths_by_symbol.setdefault(symbol_from_path(path), []).append(path)
+    return paths_by_symbol
+
+def run_parameter_sweep(paths: List[str], method: str = "random", n_iter: int = 30, n_initial: int = 10,
+                        **kwargs) -> Dict:
+    """Función helper para lanzar un barrido de parámetros desde ficheros"""
+    optimizer = ParameterOptimizer(group_paths(paths), **kwargs)
+    return optimizer.search(method=method, n_iter=n_iter, n_initial=n_initial)
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimización de parámetros con backtests en paralelo")
+    parser.add_argument("paths", nargs="+", help="Ficheros de velas de 1m (p.ej. BTCUSDT-1m-2024-01.csv)")
+    parser.add_argument("--method", choices=("grid", "random", "bayesian"), default="random")
+    parser.add_argument("--iterations", type=int, default=30, help="Candidatos a evaluar (random / bayesian)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="total_return")
+    parser.add_argument("--min-signals", type=int, default=10, help="Señales resueltas mínimas para puntuar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--cache", default="optimizer_cache.json", help="Fichero de cache de resultados")
+    parser.add_argument("--space", default=None, help="JSON con el espacio de búsqueda (parámetro -> lista de valores)")
+    parser.add_argument("--timeframe", action="append", default=[], metavar="INTERVALO=VELAS")
+    parser.add_argument("--output", default="optimization_report.json", help="Informe JSON de salida")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    search_space = None
+    if args.space:
+        with open(args.space, "r") as f:
+            search_space = json.load(f)
+
+    report = run_parameter_sweep(
+        args.paths, method=args.method, n_iter=args.iterations, search_space=search_space,
+        timeframes=parse_timeframes(args.timeframe), objective=args.objective,
+        min_signals=args.min_signals, max_workers=args.workers, cache_path=args.cache, seed=args.seed
+    )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("🔧 RANKING DE PARÁMETROS")
+    print("=" * 40)
+    for row in report["ranking"]:
+        print(f"#{row['rank']} {args.objective}={row['score']:.2f} WR={row['win_rate']:.1f}% "
+              f"señales={row['total_signals']} DD={row['max_drawdown']:.2f}% {row['params']}")
+    print("\n💡 RECOMENDACIONES:")
+    for rec in report["recommendations"] or [{"reason": "Los parámetros actuales son los mejores del barrido"}]:
+        print(f"   • {rec.get('type', '')} {rec.get('current', '')} → {rec.get('suggested', '')} {rec['reason']}")
+    print(f"\n💾 Informe guardado en {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 # performance_analyzer.py - Análisis profundo del rendimiento del sistema
 
-import sqlite3
 import logging
 from datetime import datetime, timedelta
 import numpy as np
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ class PerformanceAnalyzer:
     def analyze_comprehensive_performance(self):
         """Análisis comprehensivo del rendimiento"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = db_manager.get_connection(self.db_path)
             cursor = conn.cursor()
             
             print("🔍 ANÁLISIS PROFUNDO DEL RENDIMIENTO DEL SISTEMA")
@@ -41,7 +41,7 @@ class PerformanceAnalyzer:
             # 6. RECOMENDACIONES
             self._generate_recommendations(cursor)
             
-            conn.close()
+            cursor.close()
             
         except Exception as e:
             print(f"❌ Error en análisis: {e}")
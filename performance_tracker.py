@@ -1,86 +1,217 @@
 # performance_tracker.py - Sistema de análisis de rendimiento de señales
+import calendar
 import json
+import os
 import sqlite3
 import logging
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-import requests
+import threading
 import time
+from binance_api import binance_api
+from config import Config
+from db_manager import db_manager
+from response_cache import invalidate_responses, SIGNALS
+from live_feed import publish_signal
+from stats_engine import init_rollups, rollup_store, compute_performance_stats
 
 logger = logging.getLogger(__name__)
 
+# Condición de señal pendiente (debe coincidir con el índice parcial idx_signals_pending)
+PENDING_CONDITION = "(result IS NULL OR result = 'None' OR result = '')"
+
+def timestamp_to_epoch(timestamp: str) -> int:
+    """Segundos epoch del timestamp ISO de una señal (igual que strftime('%s', timestamp) en SQLite)"""
+    return calendar.timegm(datetime.fromisoformat(timestamp).utctimetuple())
+
+def epoch_cutoff(days: float = 0, hours: float = 0) -> int:
+    """Epoch de hace N días/horas (equivale a datetime('now', '-N days') sobre la columna ts)"""
+    return int(time.time() - days * 86400 - hours * 3600)
+
+def resolve_path_outcome(signal_type: str, entry_price: float, entry_ms: int, tp_price: float, sl_price: float,
+                         highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                         close_times: np.ndarray) -> Optional[Dict]:
+    """Primer toque de TP/SL (o regla de tiempo) en las velas de 1m posteriores a la entrada
+
+    Retorna None si la señal sigue abierta con los datos disponibles.
+    """
+    if len(closes) == 0:
+        return None
+
+    if signal_type == "buy":
+        tp_hit = highs >= tp_price
+        sl_hit = lows <= sl_price
+        returns = (closes - entry_price) / entry_price * 100
+    else:
+        tp_hit = lows <= tp_price
+        sl_hit = highs >= sl_price
+        returns = (entry_price - closes) / entry_price * 100
+
+    # Igual que check_signal_outcomes: tras 1h se evalúa por movimiento de precio y a las 3h expira
+    minutes = (close_times + 1 - entry_ms) / 60000
+    time_hit = (minutes >= 60) & ((returns >= Config.WIN_THRESHOLD_PERCENT) |
+                                  (returns <= -Config.LOSS_THRESHOLD_PERCENT))
+    expired = minutes >= Config.TIMEOUT_HOURS * 60
+
+    # (índice de la primera vela, prioridad en la misma vela): SL antes que TP (caso pesimista)
+    events = [
+        (int(np.argmax(hit)), priority, result)
+        for priority, (hit, result) in enumerate(((sl_hit, "LOSS_SL"), (tp_hit, "WIN_TP"),
+                                                  (time_hit, "TIME"), (expired, "EXPIRED")))
+        if hit.any()
+    ]
+    if not events:
+        return None
+
+    k, _, result = min(events)
+    if result == "LOSS_SL":
+        exit_price = sl_price
+    elif result == "WIN_TP":
+        exit_price = tp_price
+    else:
+        exit_price = float(closes[k])
+        if result == "TIME":
+            result = "WIN_TIME" if returns[k] > 0 else "LOSS_TIME"
+
+    if signal_type == "buy":
+        actual_return = (exit_price - entry_price) / entry_price * 100
+    else:
+        actual_return = (entry_price - exit_price) / entry_price * 100
+
+    return {
+        "result": result,
+        "exit_price": exit_price,
+        "exit_time_ms": int(close_times[k]),
+        "actual_return": actual_return,
+        "time_to_resolution": max(1, int(round(minutes[k])))
+    }
+
+# Sentencias frecuentes: texto constante para reutilizar la sentencia preparada de cada conexión
+INSERT_SIGNAL_SQL = '''
+    INSERT INTO signals (
+        timestamp, symbol, signal_type, entry_price, score,
+        conditions_met, total_conditions, rsi_1m, rsi_15m,
+        ema_fast, ema_slow, volume_ratio, atr, candle_change,
+        tp_price, sl_price, expected_move, risk_reward, market_conditions,
+        market_trend, ts
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_MARKET_DATA_SQL = '''
+    INSERT INTO market_analysis (
+        timestamp, symbol, price, rsi_1m, rsi_15m, score,
+        volume_ratio, trend_direction, volatility, conditions_met
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPDATE_OUTCOME_SQL = '''
+    UPDATE signals SET
+    result = ?,
+    exit_price = ?,
+    exit_timestamp = ?,
+    actual_return = ?,
+    time_to_resolution = ?,
+    notes = ?
+    WHERE id = ?
+'''
+
+# Bases de datos ya inicializadas en este proceso: crear un PerformanceTracker por petición no
+# repite las migraciones ni la comprobación de los rollups (que recorre toda la tabla signals)
+_initialized_databases = set()
+_init_lock = threading.Lock()
+
 class PerformanceTracker:
     def __init__(self, db_path="trading_performance.db"):
         self.db_path = db_path
-        self.init_database()
+        with _init_lock:
+            if os.path.abspath(db_path) not in _initialized_databases:
+                self.init_database()
     
     def init_database(self):
-        """Inicializa la base de datos SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabla de señales enviadas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                signal_type TEXT NOT NULL,
-                entry_price REAL NOT NULL,
-                score INTEGER NOT NULL,
-                conditions_met INTEGER NOT NULL,
-                total_conditions INTEGER NOT NULL,
-                rsi_1m REAL,
-                rsi_15m REAL,
-                ema_fast REAL,
-                ema_slow REAL,
-                volume_ratio REAL,
-                atr REAL,
-                candle_change REAL,
-                tp_price REAL,
-                sl_price REAL,
-                expected_move REAL,
-                risk_reward REAL,
-                market_conditions TEXT,
-                market_trend TEXT DEFAULT 'SIDEWAYS',
-                status TEXT DEFAULT 'PENDING',
-                result TEXT,
-                exit_price REAL,
-                exit_timestamp TEXT,
-                actual_return REAL,
-                time_to_resolution INTEGER,
-                notes TEXT
-            )
-        ''')
+        """Inicializa la base de datos SQLite (siempre; el constructor solo la primera vez por proceso)"""
+        with db_manager.transaction(self.db_path) as cursor:
+            # Tabla de señales enviadas
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS signals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    signal_type TEXT NOT NULL,
+                    entry_price REAL NOT NULL,
+                    score INTEGER NOT NULL,
+                    conditions_met INTEGER NOT NULL,
+                    total_conditions INTEGER NOT NULL,
+                    rsi_1m REAL,
+                    rsi_15m REAL,
+                    ema_fast REAL,
+                    ema_slow REAL,
+                    volume_ratio REAL,
+                    atr REAL,
+                    candle_change REAL,
+                    tp_price REAL,
+                    sl_price REAL,
+                    expected_move REAL,
+                    risk_reward REAL,
+                    market_conditions TEXT,
+                    market_trend TEXT DEFAULT 'SIDEWAYS',
+                    status TEXT DEFAULT 'PENDING',
+                    result TEXT,
+                    exit_price REAL,
+                    exit_timestamp TEXT,
+                    actual_return REAL,
+                    time_to_resolution INTEGER,
+                    notes TEXT,
+                    ts INTEGER
+                )
+            ''')
         
-        # Tabla de análisis de mercado (para correlaciones)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS market_analysis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                price REAL NOT NULL,
-                rsi_1m REAL,
-                rsi_15m REAL,
-                score INTEGER,
-                volume_ratio REAL,
-                trend_direction TEXT,
-                volatility REAL,
-                conditions_met INTEGER
-            )
-        ''')
+            # Tabla de análisis de mercado (para correlaciones)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS market_analysis (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    rsi_1m REAL,
+                    rsi_15m REAL,
+                    score INTEGER,
+                    volume_ratio REAL,
+                    trend_direction TEXT,
+                    volatility REAL,
+                    conditions_met INTEGER
+                )
+            ''')
         
-        # Migración: Añadir columna market_trend si no existe
-        try:
-            cursor.execute("ALTER TABLE signals ADD COLUMN market_trend TEXT DEFAULT 'SIDEWAYS'")
-            logger.info("📊 Columna market_trend añadida a la base de datos")
-        except sqlite3.OperationalError:
-            # La columna ya existe
-            pass
-
-        conn.commit()
-        conn.close()
+            # Migración: Añadir columna market_trend si no existe
+            try:
+                cursor.execute("ALTER TABLE signals ADD COLUMN market_trend TEXT DEFAULT 'SIDEWAYS'")
+                logger.info("📊 Columna market_trend añadida a la base de datos")
+            except sqlite3.OperationalError:
+                # La columna ya existe
+                pass
+
+            # Migración: columna ts (segundos epoch) para filtrar por fecha usando índices
+            try:
+                cursor.execute("ALTER TABLE signals ADD COLUMN ts INTEGER")
+                logger.info("📊 Columna ts añadida a la base de datos")
+            except sqlite3.OperationalError:
+                # La columna ya existe
+                pass
+
+            # Rellenar ts de señales antiguas o insertadas sin ella
+            cursor.execute("UPDATE signals SET ts = CAST(strftime('%s', timestamp) AS INTEGER) WHERE ts IS NULL")
+
+            # Índices para las consultas por ventana de tiempo, símbolo, resultado y pendientes
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals (ts)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_symbol_ts ON signals (symbol, ts)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_result_ts ON signals (result, ts)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_signals_pending ON signals (ts) WHERE {PENDING_CONDITION}")
+
+            # Rollups por (día, hora, símbolo, tipo, score, tendencia) mantenidos por triggers
+            init_rollups(cursor)
+
+        _initialized_databases.add(os.path.abspath(self.db_path))
         logger.info("📊 Base de datos de rendimiento inicializada")
     
     def detect_market_trend(self, symbol_data):
@@ -121,164 +252,267 @@ class PerformanceTracker:
 
     def record_signal(self, signal_data: Dict):
         """Registra una nueva señal enviada con detección de tendencia"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         # Detectar tendencia del mercado (usar datos del signal_data si están disponibles)
         market_trend = signal_data.get('market_trend', 'SIDEWAYS')
 
-        cursor.execute('''
-            INSERT INTO signals (
-                timestamp, symbol, signal_type, entry_price, score,
-                conditions_met, total_conditions, rsi_1m, rsi_15m,
-                ema_fast, ema_slow, volume_ratio, atr, candle_change,
-                tp_price, sl_price, expected_move, risk_reward, market_conditions,
-                market_trend
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            signal_data['timestamp'],
-            signal_data['symbol'],
-            signal_data['signal_type'],
-            signal_data['entry_price'],
-            signal_data['score'],
-            signal_data['conditions_met'],
-            signal_data['total_conditions'],
-            signal_data.get('rsi_1m'),
-            signal_data.get('rsi_15m'),
-            signal_data.get('ema_fast'),
-            signal_data.get('ema_slow'),
-            signal_data.get('volume_ratio'),
-            signal_data.get('atr'),
-            signal_data.get('candle_change'),
-            signal_data.get('tp_price'),
-            signal_data.get('sl_price'),
-            signal_data.get('expected_move'),
-            signal_data.get('risk_reward'),
-            json.dumps(signal_data.get('market_conditions', {})),
-            market_trend
-        ))
-
-        signal_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with db_manager.transaction(self.db_path) as cursor:
+            cursor.execute(INSERT_SIGNAL_SQL, (
+                signal_data['timestamp'],
+                signal_data['symbol'],
+                signal_data['signal_type'],
+                signal_data['entry_price'],
+                signal_data['score'],
+                signal_data['conditions_met'],
+                signal_data['total_conditions'],
+                signal_data.get('rsi_1m'),
+                signal_data.get('rsi_15m'),
+                signal_data.get('ema_fast'),
+                signal_data.get('ema_slow'),
+                signal_data.get('volume_ratio'),
+                signal_data.get('atr'),
+                signal_data.get('candle_change'),
+                signal_data.get('tp_price'),
+                signal_data.get('sl_price'),
+                signal_data.get('expected_move'),
+                signal_data.get('risk_reward'),
+                json.dumps(signal_data.get('market_conditions', {})),
+                market_trend,
+                timestamp_to_epoch(signal_data['timestamp'])
+            ))
+            signal_id = cursor.lastrowid
 
+        invalidate_responses(SIGNALS)
+        publish_signal(signal_id, signal_data, market_trend)
         logger.info(f"📊 Señal registrada: {signal_data['symbol']} {signal_data['signal_type']} (ID: {signal_id}) Tendencia: {market_trend}")
         return signal_id
     
     def record_market_data(self, market_data: Dict):
         """Registra datos de mercado para análisis"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for symbol, data in market_data.items():
-            cursor.execute('''
-                INSERT INTO market_analysis (
-                    timestamp, symbol, price, rsi_1m, rsi_15m, score,
-                    volume_ratio, trend_direction, volatility, conditions_met
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now().isoformat(),
-                symbol,
-                data.get('price'),
-                data.get('rsi_1m'),
-                data.get('rsi_15m'),
-                data.get('score'),
-                data.get('volume', 0) / data.get('vol_avg', 1) if data.get('vol_avg') else 0,
-                'bullish' if data.get('ema_fast', 0) > data.get('ema_slow', 0) else 'bearish',
-                data.get('atr', 0) / data.get('price', 1) * 100 if data.get('price') else 0,
-                0  # Se actualizará con las condiciones reales
-            ))
-        
-        conn.commit()
-        conn.close()
+        rows = [(
+            datetime.now().isoformat(),
+            symbol,
+            data.get('price'),
+            data.get('rsi_1m'),
+            data.get('rsi_15m'),
+            data.get('score'),
+            data.get('volume', 0) / data.get('vol_avg', 1) if data.get('vol_avg') else 0,
+            'bullish' if data.get('ema_fast', 0) > data.get('ema_slow', 0) else 'bearish',
+            data.get('atr', 0) / data.get('price', 1) * 100 if data.get('price') else 0,
+            0  # Se actualizará con las condiciones reales
+        ) for symbol, data in market_data.items()]
+
+        with db_manager.transaction(self.db_path) as cursor:
+            cursor.executemany(INSERT_MARKET_DATA_SQL, rows)
     
-    def check_signal_outcomes(self):
-        """Verifica el resultado de señales pendientes"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_pending_signals(self, cursor, order="DESC"):
+        """Señales pendientes con las columnas necesarias para evaluarlas"""
+        cursor.execute('''
+            SELECT id, timestamp, symbol, signal_type, entry_price, tp_price, sl_price
+            FROM signals
+            WHERE {}
+            ORDER BY ts {order}, id {order}
+        '''.format(PENDING_CONDITION, order=order))
+        return cursor.fetchall()
+
+    def evaluate_outcome(self, signal_type, entry_price, current_price, tp_price, sl_price, hours_elapsed):
+        """Resultado de una señal pendiente según TP/SL y tiempo transcurrido (None si sigue abierta)"""
+        result = None
+        actual_return = self.calculate_return(signal_type, entry_price, current_price)
+
+        # Verificar TP/SL primero
+        tp_sl_result = self.check_tp_sl_hit(signal_type, entry_price, current_price, tp_price, sl_price)
+
+        if tp_sl_result:
+            result = tp_sl_result
+        elif hours_elapsed >= 1:  # Evaluar después de 1 hora (optimizado)
+            # Lógica basada en movimiento de precio - MÁS AGRESIVA
+            if signal_type.upper() == 'BUY':
+                if actual_return >= 1.2:  # +1.2% = WIN (reducido de 1.5%)
+                    result = 'WIN_TIME'
+                elif actual_return <= -0.8:  # -0.8% = LOSS (reducido de -1%)
+                    result = 'LOSS_TIME'
+                elif hours_elapsed >= 3:  # 3 horas = EXPIRED (reducido de 8h)
+                    result = 'EXPIRED'
+            elif signal_type.upper() == 'SELL':
+                if actual_return >= 1.2:  # Precio bajó 1.2% = WIN (reducido de 1.5%)
+                    result = 'WIN_TIME'
+                elif actual_return <= -0.8:  # Precio subió 0.8% = LOSS (reducido de -1%)
+                    result = 'LOSS_TIME'
+                elif hours_elapsed >= 3:  # 3 horas = EXPIRED (reducido de 8h)
+                    result = 'EXPIRED'
+
+        return result, actual_return, tp_sl_result
+
+    def evaluate_forced_outcome(self, signal_type, actual_return, hours_elapsed):
+        """Resultado de la evaluación forzada (criterios más flexibles por tiempo)"""
+        result = None
+
+        # Si han pasado más de 2 horas, marcar como EXPIRED automáticamente - OPTIMIZADO
+        if hours_elapsed >= 2:
+            result = 'EXPIRED'
+        elif signal_type.upper() in ('BUY', 'SELL'):
+            # BUY y SELL usan el retorno ya orientado según la dirección de la señal
+            if actual_return >= 1.2:  # +1.2% = WIN claro (reducido de 1.5%)
+                result = 'WIN_TIME'
+            elif actual_return <= -0.8:  # -0.8% = LOSS claro (reducido de -1%)
+                result = 'LOSS_TIME'
+            elif hours_elapsed >= 1:  # Evaluar después de 1 hora con criterios más flexibles
+                if actual_return >= 0.4:  # +0.4% = WIN después de 1h (más flexible)
+                    result = 'WIN_TIME'
+                elif actual_return <= -0.3:  # -0.3% = LOSS después de 1h (más flexible)
+                    result = 'LOSS_TIME'
+            # Menos de 1 hora sin movimiento claro: mantener como PENDING
+
+        return result
+
+    def get_price_paths(self, pending_signals) -> Dict[str, Dict]:
+        """Velas de 1m por símbolo que cubren la vida de sus señales pendientes
+
+        Cada señal solo necesita de su entrada a entrada + TIMEOUT_HOURS; las ventanas de un símbolo
+        que se solapan se piden juntas. Las señales cuya ventana terminó hace más de
+        PENDING_MAX_AGE_HOURS no descargan velas (se cierran con el precio actual).
+        """
+        now_ms = int(time.time() * 1000)
+        timeout_ms = Config.TIMEOUT_HOURS * 3600 * 1000
+        stale_ms = now_ms - Config.PENDING_MAX_AGE_HOURS * 3600 * 1000
+
+        windows = {}
+        for signal in pending_signals:
+            entry_ms = int(datetime.fromisoformat(signal[1]).timestamp() * 1000)
+            end_ms = min(now_ms, entry_ms + timeout_ms)
+            if end_ms < stale_ms:
+                continue
+            windows.setdefault(signal[2], []).append((entry_ms - entry_ms % 60000, end_ms))
+
+        paths = {}
+        for symbol, symbol_windows in windows.items():
+            merged = []
+            for start, end in sorted(symbol_windows):
+                if merged and start <= merged[-1][1] + 60000:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+
+            rows = []
+            for start, end_ms in merged:
+                # Normalmente una sola página (TIMEOUT_HOURS de velas); límite justo para no pagar peso de más
+                while start <= end_ms:
+                    limit = min(1000, (end_ms - start) // 60000 + 1)
+                    batch = binance_api.get_klines(symbol, "1m", limit, start_time=start)
+                    if not batch:
+                        break
+                    rows.extend(batch)
+                    if len(batch) < limit:
+                        break
+                    start = batch[-1][0] + 60000
+
+            if rows:
+                paths[symbol] = {
+                    "open_times": np.array([k[0] for k in rows], dtype=np.int64),
+                    "highs": np.array([float(k[2]) for k in rows]),
+                    "lows": np.array([float(k[3]) for k in rows]),
+                    "closes": np.array([float(k[4]) for k in rows]),
+                    # La última vela sigue abierta: su cierre no puede ser posterior a ahora
+                    "close_times": np.minimum(np.array([k[6] for k in rows], dtype=np.int64), now_ms)
+                }
+
+        return paths
+
+    def get_path_prices(self, pending_signals, paths) -> Dict[str, float]:
+        """Precio actual por símbolo: el último cierre si sus velas llegan hasta ahora, si no el ticker"""
+        recent_ms = int(time.time() * 1000) - 60000
+        prices = {symbol: float(path["closes"][-1]) for symbol, path in paths.items()
+                  if path["close_times"][-1] >= recent_ms}
+        prices.update(self.get_current_prices(signal[2] for signal in pending_signals if signal[2] not in prices))
+        return prices
+
+    def resolve_from_path(self, path, signal_type, entry_price, entry_ms, tp_price, sl_price):
+        """Resuelve una señal con las velas posteriores a su entrada
 
+        Retorna (cubierta, resultado): cubierta=False si no hay velas para evaluarla.
+        """
+        if path is None or tp_price is None or sl_price is None:
+            return False, None
+
+        # Solo velas abiertas después de la entrada (la vela de entrada incluye precios previos)
+        start = int(np.searchsorted(path["open_times"], entry_ms, "left"))
+        if start >= len(path["open_times"]) or path["open_times"][start] > entry_ms + 60000:
+            return False, None  # Sin la vela siguiente a la entrada (señal antigua sin ventana descargada)
+
+        return True, resolve_path_outcome(
+            signal_type, entry_price, entry_ms, tp_price, sl_price,
+            path["highs"][start:], path["lows"][start:], path["closes"][start:], path["close_times"][start:]
+        )
+
+    def apply_outcomes(self, cursor, updates):
+        """Aplica todos los resultados con un único executemany (misma transacción)"""
+        if updates:
+            cursor.executemany(UPDATE_OUTCOME_SQL, updates)
+
+    def check_signal_outcomes(self):
+        """Verifica el resultado de señales pendientes con el recorrido de precio desde su entrada"""
         # Obtener TODAS las señales pendientes (sin límite de tiempo para verificación más agresiva)
-        cursor.execute('''
-            SELECT * FROM signals
-            WHERE result IS NULL OR result = 'None' OR result = ''
-            ORDER BY timestamp DESC
-        ''')
+        with db_manager.cursor(self.db_path) as cursor:
+            pending_signals = self.get_pending_signals(cursor, "DESC")
 
-        pending_signals = cursor.fetchall()
-        updated_count = 0
+        # Velas de 1m por símbolo; precio actual para las señales que no cubren
+        paths = self.get_price_paths(pending_signals)
+        prices = self.get_path_prices(pending_signals, paths)
+        now = datetime.now()
+        updates = []
 
-        for signal in pending_signals:
-            signal_id = signal[0]
-            symbol = signal[2]
-            signal_type = signal[3]
-            entry_price = signal[4]
-            tp_price = signal[15]
-            sl_price = signal[16]
-            entry_time = datetime.fromisoformat(signal[1])
+        for signal_id, timestamp, symbol, signal_type, entry_price, tp_price, sl_price in pending_signals:
+            entry_time = datetime.fromisoformat(timestamp)
 
-            # Verificar tiempo transcurrido
-            hours_elapsed = (datetime.now() - entry_time).total_seconds() / 3600
-            minutes_elapsed = int(hours_elapsed * 60)
+            # Primer toque de TP/SL (o regla de tiempo) según máximos/mínimos de 1m
+            covered, outcome = self.resolve_from_path(
+                paths.get(symbol), signal_type, entry_price, int(entry_time.timestamp() * 1000), tp_price, sl_price
+            )
+            if covered:
+                if outcome:
+                    result = outcome["result"]
+                    updates.append((
+                        result, outcome["exit_price"],
+                        datetime.fromtimestamp(outcome["exit_time_ms"] / 1000).isoformat(),
+                        outcome["actual_return"], outcome["time_to_resolution"],
+                        f'Resuelto con velas de 1m tras {outcome["time_to_resolution"]} min',
+                        signal_id
+                    ))
+                    win_emoji = "🎯" if "WIN" in result else "❌" if "LOSS" in result else "⏰"
+                    logger.info(f"📊 {win_emoji} {symbol} {signal_type}: {result} ({outcome['actual_return']:+.2f}%) "
+                                f"en {outcome['time_to_resolution']} min")
+                continue
 
-            # Obtener precio actual
-            current_price = self.get_current_price(symbol)
+            # Sin velas disponibles: evaluación con el precio actual
+            current_price = prices.get(symbol)
             if not current_price:
                 continue
 
-            # Lógica de evaluación más agresiva y realista
-            result = None
-            actual_return = self.calculate_return(signal_type, entry_price, current_price)
-
-            # Verificar TP/SL primero
-            tp_sl_result = self.check_tp_sl_hit(signal_type, entry_price, current_price, tp_price, sl_price)
-
-            if tp_sl_result:
-                result = tp_sl_result
-            elif hours_elapsed >= 1:  # Evaluar después de 1 hora (optimizado)
-                # Lógica basada en movimiento de precio - MÁS AGRESIVA
-                if signal_type.upper() == 'BUY':
-                    if actual_return >= 1.2:  # +1.2% = WIN (reducido de 1.5%)
-                        result = 'WIN_TIME'
-                    elif actual_return <= -0.8:  # -0.8% = LOSS (reducido de -1%)
-                        result = 'LOSS_TIME'
-                    elif hours_elapsed >= 3:  # 3 horas = EXPIRED (reducido de 8h)
-                        result = 'EXPIRED'
-                elif signal_type.upper() == 'SELL':
-                    if actual_return >= 1.2:  # Precio bajó 1.2% = WIN (reducido de 1.5%)
-                        result = 'WIN_TIME'
-                    elif actual_return <= -0.8:  # Precio subió 0.8% = LOSS (reducido de -1%)
-                        result = 'LOSS_TIME'
-                    elif hours_elapsed >= 3:  # 3 horas = EXPIRED (reducido de 8h)
-                        result = 'EXPIRED'
+            # Verificar tiempo transcurrido
+            hours_elapsed = (now - entry_time).total_seconds() / 3600
+            minutes_elapsed = int(hours_elapsed * 60)
+
+            result, actual_return, tp_sl_result = self.evaluate_outcome(
+                signal_type, entry_price, current_price, tp_price, sl_price, hours_elapsed
+            )
 
             # Si hay resultado, actualizar
             if result:
-                cursor.execute('''
-                    UPDATE signals SET
-                    result = ?,
-                    exit_price = ?,
-                    exit_timestamp = ?,
-                    actual_return = ?,
-                    time_to_resolution = ?,
-                    notes = ?
-                    WHERE id = ?
-                ''', (
-                    result, current_price, datetime.now().isoformat(),
+                updates.append((
+                    result, current_price, now.isoformat(),
                     actual_return, minutes_elapsed,
                     f'Evaluado por {"TP/SL" if tp_sl_result else "tiempo"} después de {hours_elapsed:.1f}h',
                     signal_id
                 ))
-                updated_count += 1
                 win_emoji = "🎯" if "WIN" in result else "❌" if "LOSS" in result else "⏰"
                 logger.info(f"📊 {win_emoji} {symbol} {signal_type}: {result} ({actual_return:+.2f}%) en {hours_elapsed:.1f}h")
-                continue
-
-
 
-        conn.commit()
-        conn.close()
+        with db_manager.transaction(self.db_path) as cursor:
+            self.apply_outcomes(cursor, updates)
 
+        updated_count = len(updates)
         if updated_count > 0:
+            invalidate_responses(SIGNALS)
             logger.info(f"📊 Actualizadas {updated_count} señales")
 
         return updated_count
@@ -286,117 +520,66 @@ class PerformanceTracker:
     def force_evaluate_all_pending(self):
         """Fuerza la evaluación de TODAS las señales pendientes inmediatamente"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
             # Obtener todas las señales pendientes (incluyendo result NULL)
-            cursor.execute('''
-                SELECT * FROM signals
-                WHERE result IS NULL OR result = 'None' OR result = ''
-                ORDER BY timestamp ASC
-            ''')
-            pending_signals = cursor.fetchall()
+            with db_manager.cursor(self.db_path) as cursor:
+                pending_signals = self.get_pending_signals(cursor, "ASC")
 
             logger.info(f"🔍 Evaluando {len(pending_signals)} señales pendientes...")
 
-            updated_count = 0
-            for signal in pending_signals:
-                signal_id = signal[0]
-                symbol = signal[2]
-                signal_type = signal[3]
-                entry_price = signal[4]
-                entry_time = datetime.fromisoformat(signal[1])
+            # Velas de 1m por símbolo (el último cierre es el precio actual); ticker solo como respaldo
+            paths = self.get_price_paths(pending_signals)
+            prices = self.get_path_prices(pending_signals, paths)
+            now = datetime.now()
+            updates = []
+
+            for signal_id, timestamp, symbol, signal_type, entry_price, tp_price, sl_price in pending_signals:
+                entry_time = datetime.fromisoformat(timestamp)
+
+                # Un toque de TP/SL ya ocurrido tiene prioridad sobre los criterios forzados
+                _, outcome = self.resolve_from_path(
+                    paths.get(symbol), signal_type, entry_price, int(entry_time.timestamp() * 1000), tp_price, sl_price
+                )
+                if outcome and outcome["result"] in ("WIN_TP", "LOSS_SL"):
+                    updates.append((
+                        outcome["result"], outcome["exit_price"],
+                        datetime.fromtimestamp(outcome["exit_time_ms"] / 1000).isoformat(),
+                        outcome["actual_return"], outcome["time_to_resolution"],
+                        'Evaluación forzada: TP/SL tocado en velas de 1m', signal_id
+                    ))
+                    logger.info(f"📊 {'🎯' if outcome['result'] == 'WIN_TP' else '❌'} {symbol} {signal_type}: "
+                                f"{outcome['result']} ({outcome['actual_return']:+.2f}%)")
+                    continue
 
-                # Obtener precio actual
-                current_price = self.get_current_price(symbol)
+                current_price = prices.get(symbol)
                 if not current_price:
                     continue
 
                 # Calcular tiempo transcurrido
-                hours_elapsed = (datetime.now() - entry_time).total_seconds() / 3600
+                hours_elapsed = (now - entry_time).total_seconds() / 3600
                 minutes_elapsed = int(hours_elapsed * 60)
 
-                # Calcular retorno actual
+                # Calcular retorno actual y determinar resultado por tiempo y movimiento de precio
                 actual_return = self.calculate_return(signal_type, entry_price, current_price)
-
-                # Determinar resultado basado en tiempo y movimiento de precio
-                result = None
-
-                # Si han pasado más de 2 horas, marcar como EXPIRED automáticamente - OPTIMIZADO
-                if hours_elapsed >= 2:
-                    result = 'EXPIRED'
-                    logger.info(f"📊 ⏰ {symbol} {signal_type}: EXPIRED (2+ horas)")
-                elif signal_type.upper() == 'BUY':
-                    if actual_return >= 1.2:  # +1.2% = WIN claro (reducido de 1.5%)
-                        result = 'WIN_TIME'
-                    elif actual_return <= -0.8:  # -0.8% = LOSS claro (reducido de -1%)
-                        result = 'LOSS_TIME'
-                    elif hours_elapsed >= 1:  # Evaluar después de 1 hora con criterios más flexibles
-                        if actual_return >= 0.4:  # +0.4% = WIN después de 1h (más flexible)
-                            result = 'WIN_TIME'
-                        elif actual_return <= -0.3:  # -0.3% = LOSS después de 1h (más flexible)
-                            result = 'LOSS_TIME'
-                        elif hours_elapsed >= 2:  # Solo EXPIRED después de 2 horas
-                            if actual_return >= 0.2:  # Movimiento mínimo positivo = WIN
-                                result = 'WIN_TIME'
-                            elif actual_return <= -0.2:  # Movimiento mínimo negativo = LOSS
-                                result = 'LOSS_TIME'
-                            else:
-                                result = 'EXPIRED'  # Verdaderamente neutral = EXPIRED
-                    else:
-                        # Menos de 1 hora, mantener PENDING solo si no hay movimiento claro
-                        if actual_return >= 1.2 or actual_return <= -0.8:
-                            result = 'WIN_TIME' if actual_return >= 1.2 else 'LOSS_TIME'
-                        # Si no hay movimiento claro, mantener como PENDING
-                elif signal_type.upper() == 'SELL':
-                    if actual_return >= 1.2:  # Precio bajó 1.2% = WIN claro (reducido de 1.5%)
-                        result = 'WIN_TIME'
-                    elif actual_return <= -0.8:  # Precio subió 0.8% = LOSS claro (reducido de -1%)
-                        result = 'LOSS_TIME'
-                    elif hours_elapsed >= 1:  # Evaluar después de 1 hora con criterios más flexibles
-                        if actual_return >= 0.4:  # Precio bajó 0.4% = WIN después de 1h (más flexible)
-                            result = 'WIN_TIME'
-                        elif actual_return <= -0.3:  # Precio subió 0.3% = LOSS después de 1h (más flexible)
-                            result = 'LOSS_TIME'
-                        elif hours_elapsed >= 2:  # Solo EXPIRED después de 2 horas
-                            if actual_return >= 0.2:  # Movimiento mínimo positivo = WIN
-                                result = 'WIN_TIME'
-                            elif actual_return <= -0.2:  # Movimiento mínimo negativo = LOSS
-                                result = 'LOSS_TIME'
-                            else:
-                                result = 'EXPIRED'  # Verdaderamente neutral = EXPIRED
-                    else:
-                        # Menos de 1 hora, mantener PENDING solo si no hay movimiento claro
-                        if actual_return >= 1.2 or actual_return <= -0.8:
-                            result = 'WIN_TIME' if actual_return >= 1.2 else 'LOSS_TIME'
-                        # Si no hay movimiento claro, mantener como PENDING
+                result = self.evaluate_forced_outcome(signal_type, actual_return, hours_elapsed)
 
                 # Actualizar señal solo si hay un resultado definido
                 if result:
-                    cursor.execute('''
-                        UPDATE signals SET
-                        result = ?,
-                        exit_price = ?,
-                        exit_timestamp = ?,
-                        actual_return = ?,
-                        time_to_resolution = ?,
-                        notes = 'Evaluación forzada para análisis'
-                        WHERE id = ?
-                    ''', (
-                        result, current_price, datetime.now().isoformat(),
-                        actual_return, minutes_elapsed, signal_id
+                    updates.append((
+                        result, current_price, now.isoformat(),
+                        actual_return, minutes_elapsed, 'Evaluación forzada para análisis', signal_id
                     ))
-
-                    updated_count += 1
                     win_emoji = "🎯" if "WIN" in result else "❌" if "LOSS" in result else "⏰"
                     logger.info(f"📊 {win_emoji} {symbol} {signal_type}: {result} ({actual_return:+.2f}%)")
                 else:
                     # Mantener como PENDING si no hay resultado claro
                     logger.info(f"📊 🔄 {symbol} {signal_type}: Mantener PENDING ({actual_return:+.2f}%)")
 
-            conn.commit()
-            conn.close()
+            with db_manager.transaction(self.db_path) as cursor:
+                self.apply_outcomes(cursor, updates)
 
+            updated_count = len(updates)
+            if updated_count > 0:
+                invalidate_responses(SIGNALS)
             logger.info(f"✅ Evaluación forzada completada: {updated_count} señales actualizadas")
             return updated_count
 
@@ -407,12 +590,12 @@ class PerformanceTracker:
     def get_recent_signals(self, limit=50):
         """Obtiene las señales recientes con el mismo formato que usa get_performance_stats"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = db_manager.get_connection(self.db_path)
             cursor = conn.cursor()
 
             cursor.execute('''
                 SELECT * FROM signals
-                ORDER BY timestamp DESC
+                ORDER BY ts DESC, id DESC
                 LIMIT ?
             ''', (limit,))
 
@@ -442,7 +625,7 @@ class PerformanceTracker:
                     'today': signal[1][:10] == datetime.now().strftime('%Y-%m-%d') if signal[1] else False
                 })
 
-            conn.close()
+            cursor.close()
             return recent_signals
 
         except Exception as e:
@@ -577,16 +760,25 @@ class PerformanceTracker:
             }
         }
 
+    def get_current_prices(self, symbols) -> Dict[str, float]:
+        """Obtiene el precio actual de varios símbolos con una sola petición a Binance"""
+        symbols = sorted(set(symbols))
+        if not symbols:
+            return {}
+
+        prices = binance_api.get_prices(symbols)
+
+        # Respaldo símbolo a símbolo si la petición agrupada falla (p.ej. un símbolo inválido)
+        for symbol in symbols:
+            if symbol not in prices:
+                price = self.get_current_price(symbol)
+                if price:
+                    prices[symbol] = price
+        return prices
+
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Obtiene el precio actual de Binance"""
-        try:
-            url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                return float(response.json()['price'])
-        except Exception as e:
-            logger.error(f"Error obteniendo precio de {symbol}: {e}")
-        return None
+        return binance_api.get_price(symbol)
     
     def check_tp_sl_hit(self, signal_type: str, entry_price: float, 
                        current_price: float, tp_price: float, sl_price: float) -> Optional[str]:
@@ -612,7 +804,7 @@ class PerformanceTracker:
     
     def get_performance_stats(self, days: int = 30) -> Dict:
         """Obtiene estadísticas de rendimiento completas"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_manager.get_connection(self.db_path)
         cursor = conn.cursor()
 
         # Debug: Verificar si hay datos
@@ -620,314 +812,21 @@ class PerformanceTracker:
         total_count = cursor.fetchone()[0]
         logger.info(f"📊 Total señales en BD: {total_count}")
 
-        cursor.execute('SELECT COUNT(*) FROM signals WHERE result IS NULL OR result = \'None\' OR result = \'\'')
+        cursor.execute(f'SELECT COUNT(*) FROM signals WHERE {PENDING_CONDITION}')
         pending_count = cursor.fetchone()[0]
         logger.info(f"📊 Señales pendientes: {pending_count}")
 
-        # Estadísticas básicas - SOLO SEÑALES EXCELENTES (Score ≥85)
-        cursor.execute('''
-            SELECT
-                COUNT(*) as total_signals,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN result LIKE 'LOSS%' THEN 1 ELSE 0 END) as losses,
-                SUM(CASE WHEN result = 'EXPIRED' THEN 1 ELSE 0 END) as expired,
-                SUM(CASE WHEN result IS NULL OR result = 'None' OR result = '' THEN 1 ELSE 0 END) as pending,
-                AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
-                AVG(score) as avg_score,
-                AVG(CASE WHEN time_to_resolution IS NOT NULL THEN time_to_resolution END) as avg_time_minutes,
-                MAX(actual_return) as best_return,
-                MIN(actual_return) as worst_return,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN actual_return ELSE 0 END) as total_profit,
-                SUM(CASE WHEN result LIKE 'LOSS%' THEN actual_return ELSE 0 END) as total_loss
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-        '''.format(days))
-
-        basic_stats = cursor.fetchone()
-
-        # Estadísticas por score - CORREGIDO PARA MOSTRAR TODOS LOS RANGOS
-        cursor.execute('''
-            SELECT
-                CASE
-                    WHEN score >= 90 THEN 'ULTRA-PREMIUM (90-100)'
-                    WHEN score >= 85 THEN 'PREMIUM (85-89)'
-                    WHEN score >= 80 THEN 'EXCELENTE (80-84)'
-                    WHEN score >= 70 THEN 'FUERTE (70-79)'
-                    WHEN score >= 60 THEN 'BUENA (60-69)'
-                    ELSE 'REGULAR (<60)'
-                END as score_range,
-                COUNT(*) as count,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END) as wins,
-                AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
-                MAX(actual_return) as best_return,
-                MIN(actual_return) as worst_return
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-            GROUP BY score_range
-            ORDER BY
-                CASE
-                    WHEN score_range = 'ULTRA-PREMIUM (90-100)' THEN 1
-                    WHEN score_range = 'PREMIUM (85-89)' THEN 2
-                    WHEN score_range = 'EXCELENTE (80-84)' THEN 3
-                    WHEN score_range = 'FUERTE (70-79)' THEN 4
-                    WHEN score_range = 'BUENA (60-69)' THEN 5
-                    ELSE 6
-                END
-        '''.format(days))
-
-        score_stats = cursor.fetchall()
-
-        # 🚀 NUEVO: Estadísticas por TENDENCIA DE MERCADO
-        cursor.execute('''
-            SELECT
-                COALESCE(market_trend, 'SIDEWAYS') as trend,
-                signal_type,
-                COUNT(*) as count,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END) as wins,
-                AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
-                AVG(score) as avg_score,
-                MAX(actual_return) as best_return,
-                MIN(actual_return) as worst_return
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-            GROUP BY trend, signal_type
-            ORDER BY trend, signal_type
-        '''.format(days))
-
-        trend_stats = cursor.fetchall()
+        # Desgloses sumando los rollups de la ventana (solo se releen de SQLite los días modificados)
+        rollups, streaks = rollup_store.load(cursor, self.db_path, epoch_cutoff(days=days))
+        cursor.close()
 
-        # 🎯 NUEVO: Análisis de Score por Tendencia (Score ≥80 solamente)
-        cursor.execute('''
-            SELECT
-                COALESCE(market_trend, 'SIDEWAYS') as trend,
-                CASE
-                    WHEN score >= 90 THEN 'ULTRA-PREMIUM (90-100)'
-                    WHEN score >= 85 THEN 'PREMIUM (85-89)'
-                    WHEN score >= 80 THEN 'EXCELENTE (80-84)'
-                    ELSE 'OTROS (<80)'
-                END as score_range,
-                COUNT(*) as count,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END) as wins,
-                AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
-                AVG(score) as avg_score
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-            AND score >= 80
-            GROUP BY trend, score_range
-            ORDER BY trend,
-                CASE
-                    WHEN score_range = 'ULTRA-PREMIUM (90-100)' THEN 1
-                    WHEN score_range = 'PREMIUM (85-89)' THEN 2
-                    WHEN score_range = 'EXCELENTE (80-84)' THEN 3
-                    ELSE 4
-                END
-        '''.format(days))
-
-        score_by_trend_stats = cursor.fetchall()
-
-        # Estadísticas por símbolo (INCLUIR TODAS las señales)
-        cursor.execute('''
-            SELECT
-                symbol,
-                COUNT(*) as count,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN result LIKE 'LOSS%' THEN 1 ELSE 0 END) as losses,
-                SUM(CASE WHEN result = 'EXPIRED' THEN 1 ELSE 0 END) as expired,
-                SUM(CASE WHEN result IS NULL OR result = 'None' OR result = '' THEN 1 ELSE 0 END) as pending,
-                AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
-                AVG(score) as avg_score
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-            GROUP BY symbol
-            ORDER BY count DESC
-        '''.format(days))
-
-        symbol_stats = cursor.fetchall()
-
-        # Estadísticas por horario (INCLUIR TODAS las señales)
-        cursor.execute('''
-            SELECT
-                strftime('%H', timestamp) as hour,
-                COUNT(*) as count,
-                SUM(CASE WHEN result LIKE 'WIN%' THEN 1 ELSE 0 END) as wins,
-                AVG(CASE WHEN actual_return IS NOT NULL THEN actual_return END) as avg_return,
-                AVG(score) as avg_score
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-            GROUP BY hour
-            HAVING count >= 2
-            ORDER BY count DESC
-        '''.format(days))
-
-        hourly_stats = cursor.fetchall()
-
-        # Análisis de volatilidad por símbolo (usar ATR como proxy)
-        cursor.execute('''
-            SELECT
-                symbol,
-                AVG(atr) as avg_atr,
-                MAX(atr) as max_atr,
-                AVG(ABS(candle_change)) as avg_candle_volatility,
-                COUNT(*) as count
-            FROM signals
-            WHERE datetime(timestamp) > datetime('now', '-{} days')
-            AND atr IS NOT NULL
-            GROUP BY symbol
-        '''.format(days))
-
-        volatility_stats = cursor.fetchall()
-
-        # Análisis de streaks (rachas) - GENERAL
-        cursor.execute('''
-            SELECT
-                result,
-                timestamp,
-                symbol
-            FROM signals
-            WHERE result IS NOT NULL AND result != 'None'
-            AND datetime(timestamp) > datetime('now', '-{} days')
-            ORDER BY timestamp DESC
-        '''.format(days))
-
-        streak_data = cursor.fetchall()
-        current_streak, max_win_streak, max_loss_streak = self.calculate_streaks(streak_data)
-
-        # Análisis de streaks POR SÍMBOLO
-        symbol_streaks = {}
-        for symbol in ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']:
-            cursor.execute('''
-                SELECT
-                    result,
-                    timestamp,
-                    symbol
-                FROM signals
-                WHERE result IS NOT NULL AND result != 'None'
-                AND symbol = ?
-                AND datetime(timestamp) > datetime('now', '-{} days')
-                ORDER BY timestamp DESC
-            '''.format(days), (symbol,))
-
-            symbol_data = cursor.fetchall()
-            if symbol_data:
-                current, max_win, max_loss = self.calculate_streaks(symbol_data)
-                symbol_streaks[symbol] = {
-                    'current_streak': current,
-                    'max_win_streak': max_win,
-                    'max_loss_streak': max_loss,
-                    'last_signal_time': symbol_data[0][1] if symbol_data else None
-                }
-
-        conn.close()
-
-        total_signals = basic_stats[0] or 0
-        wins = basic_stats[1] or 0
-        losses = basic_stats[2] or 0
-        expired = basic_stats[3] or 0
-        pending = basic_stats[4] or 0
-        win_rate = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0
+        stats = compute_performance_stats(rollups, streaks)
 
         # Si no hay datos, mostrar mensaje informativo
-        if total_signals == 0:
+        if stats['total_signals'] == 0:
             logger.info("📊 No hay señales registradas aún. Esperando primera señal...")
 
-        return {
-            'total_signals': total_signals,
-            'wins': wins,
-            'losses': losses,
-            'expired': expired,
-            'pending': pending,
-            'win_rate': win_rate,
-            'avg_return': basic_stats[5] or 0,
-            'avg_score': basic_stats[6] or 0,
-            'avg_time_minutes': basic_stats[7] or 0,
-            'best_return': basic_stats[8] or 0,
-            'worst_return': basic_stats[9] or 0,
-            'total_profit': basic_stats[10] or 0,
-            'total_loss': basic_stats[11] or 0,
-            'net_profit': (basic_stats[10] or 0) + (basic_stats[11] or 0),
-            'score_breakdown': [
-                {
-                    'range': row[0],
-                    'count': row[1],
-                    'wins': row[2],
-                    'win_rate': (row[2] / row[1] * 100) if row[1] > 0 else 0,
-                    'avg_return': row[3] or 0,
-                    'best_return': row[4] or 0,
-                    'worst_return': row[5] or 0
-                }
-                for row in score_stats
-            ],
-            'symbol_breakdown': [
-                {
-                    'symbol': row[0],
-                    'count': row[1],
-                    'wins': row[2],
-                    'losses': row[3],
-                    'expired': row[4],
-                    'pending': row[5],
-                    'win_rate': (row[2] / (row[2] + row[3]) * 100) if (row[2] + row[3]) > 0 else 0,
-                    'avg_return': row[6] or 0,
-                    'avg_score': row[7] or 0
-                }
-                for row in symbol_stats
-            ],
-            'hourly_breakdown': [
-                {
-                    'hour': f"{int(row[0]):02d}:00",
-                    'count': row[1],
-                    'wins': row[2],
-                    'win_rate': (row[2] / row[1] * 100) if row[1] > 0 else 0,
-                    'avg_return': row[3] or 0,
-                    'avg_score': row[4] or 0
-                }
-                for row in hourly_stats
-            ],
-            # 🚀 NUEVO: Análisis por Tendencia de Mercado
-            'trend_breakdown': [
-                {
-                    'trend': row[0],
-                    'signal_type': row[1],
-                    'count': row[2],
-                    'wins': row[3],
-                    'win_rate': (row[3] / row[2] * 100) if row[2] > 0 else 0,
-                    'avg_return': row[4] or 0,
-                    'avg_score': row[5] or 0,
-                    'best_return': row[6] or 0,
-                    'worst_return': row[7] or 0
-                }
-                for row in trend_stats
-            ],
-            # 🎯 NUEVO: Score por Tendencia (Solo Score ≥80)
-            'score_by_trend_breakdown': [
-                {
-                    'trend': row[0],
-                    'score_range': row[1],
-                    'count': row[2],
-                    'wins': row[3],
-                    'win_rate': (row[3] / row[2] * 100) if row[2] > 0 else 0,
-                    'avg_return': row[4] or 0,
-                    'avg_score': row[5] or 0
-                }
-                for row in score_by_trend_stats
-            ],
-            'volatility_breakdown': [
-                {
-                    'symbol': row[0],
-                    'avg_atr': row[1] or 0,
-                    'max_atr': row[2] or 0,
-                    'avg_candle_volatility': row[3] or 0,
-                    'count': row[4]
-                }
-                for row in volatility_stats
-            ],
-            'streak_analysis': {
-                'current_streak': current_streak,
-                'max_win_streak': max_win_streak,
-                'max_loss_streak': max_loss_streak,
-                'streak_status': 'WIN' if current_streak > 0 else 'LOSS' if current_streak < 0 else 'NEUTRAL'
-            },
-            'symbol_streaks': symbol_streaks
-        }
+        return stats
 
 # Instancia global
 performance_tracker = PerformanceTracker()
@@ -0,0 +1,121 @@
+# response_cache.py - Caché de respuestas del dashboard con TTL, invalidación por escritura y ETag
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Etiquetas de invalidación: de qué datos depende cada respuesta cacheada
+SIGNALS = "signals"  # Tabla signals: record_signal, evaluación de resultados, resets y reparaciones
+MARKET = "market"    # Datos de mercado en memoria: analyze_all_symbols y análisis del stream
+STATUS = "status"    # Estado del bot: /start, /stop, hora del último análisis y contador de señales
+
+class ResponseCache:
+    """Respuestas ya serializadas por clave, válidas hasta su TTL o hasta que se invalide una de sus etiquetas
+
+    Con muchos visitantes solo una petición por clave reconstruye la respuesta (lock por clave);
+    el resto reutiliza el mismo cuerpo y su ETag, y un navegador con la versión vigente recibe 304.
+    """
+
+    def __init__(self, default_ttl: float = 30):
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = {}      # clave -> (cuerpo, mimetype, status, etag, caducidad, etiquetas)
+        self._build_locks = {}  # clave -> lock de reconstrucción
+        self._generations = {}  # etiqueta -> número de invalidaciones
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _lookup(self, key: str) -> Optional[Tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[4] > time.monotonic():
+                self.hits += 1
+                return entry
+        return None
+
+    def get_or_build(self, key: str, builder: Callable[[], Tuple[bytes, str, int]],
+                     tags: Tuple[str, ...] = (), ttl: float = None) -> Tuple[bytes, str, int, str]:
+        """(cuerpo, mimetype, status, etag) de key; builder() -> (cuerpo, mimetype, status)
+
+        Solo se guardan respuestas 200 que no se invalidaron mientras se construían.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = self._lookup(key)
+        if entry:
+            return entry[:4]
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            # Otro hilo pudo reconstruirla mientras esperábamos
+            entry = self._lookup(key)
+            if entry:
+                return entry[:4]
+
+            with self._lock:
+                self.misses += 1
+                generation = self._generation(tags)
+
+            body, mimetype, status = builder()
+            etag = hashlib.sha1(body).hexdigest()
+            entry = (body, mimetype, status, etag, time.monotonic() + ttl, tags)
+
+            if status == 200 and ttl > 0:
+                with self._lock:
+                    if self._generation(tags) == generation:
+                        self._entries[key] = entry
+            return entry[:4]
+
+    def invalidate(self, *tags: str):
+        """Descarta las respuestas que dependen de alguna de las etiquetas"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._entries = {key: entry for key, entry in self._entries.items()
+                             if not set(entry[5]) & set(tags)}
+
+    def clear(self):
+        """Descarta todas las respuestas cacheadas"""
+        with self._lock:
+            self._entries = {}
+
+    def get_stats(self) -> Dict:
+        """Aciertos, fallos y respuestas cacheadas"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+# Instancia global
+response_cache = ResponseCache(Config.RESPONSE_CACHE_TTL)
+
+def invalidate_responses(*tags: str):
+    """Función helper para invalidar respuestas cacheadas tras una escritura"""
+    response_cache.invalidate(*tags)
+
+def cached_response(key: str, view: Callable, tags: Tuple[str, ...] = (), ttl: float = None):
+    """Respuesta Flask cacheada con ETag (304 si el navegador ya la tiene)
+
+    view() devuelve lo mismo que una vista de Flask (str, Response o tupla con status).
+    """
+    from flask import Response, make_response, request
+
+    def build():
+        response = make_response(view())
+        return response.get_data(), response.mimetype, response.status_code
+
+    body, mimetype, status, etag = response_cache.get_or_build(key, build, tags, ttl)
+    response = Response(body, status=status, mimetype=mimetype)
+    if status != 200:
+        return response
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # El navegador revalida siempre con If-None-Match
+    return response.make_conditional(request)
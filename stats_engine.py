@@ -0,0 +1,524 @@
+# stats_engine.py - Estadísticas de rendimiento desde rollups materializados (NumPy)
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STREAK_SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+
+# Rangos de score en el orden de presentación (mismos cortes que las consultas SQL originales)
+SCORE_RANGES = (
+    (90, "ULTRA-PREMIUM (90-100)"),
+    (85, "PREMIUM (85-89)"),
+    (80, "EXCELENTE (80-84)"),
+    (70, "FUERTE (70-79)"),
+    (60, "BUENA (60-69)"),
+    (None, "REGULAR (<60)")
+)
+TREND_SCORE_RANGES = SCORE_RANGES[:3]  # Score por tendencia: solo score ≥80
+
+# === ROLLUPS MATERIALIZADOS ===
+# Una fila por (día, hora, símbolo, tipo, rango de score, tendencia) con agregados sumables.
+# Los triggers de signals suman/restan la aportación de cada fila en INSERT/UPDATE/DELETE, así
+# que cualquier escritor (bot, endpoints de reparación, scripts, backtester) los mantiene.
+# Además cambian la revisión del día tocado en signal_rollup_days: RollupStore solo vuelve
+# a leer de SQLite los días cuya revisión cambió desde la última consulta.
+
+ROLLUP_KEYS = ("day", "hour", "symbol", "signal_type", "score_bucket", "trend")
+ROLLUP_TEXT_KEYS = ("symbol", "signal_type", "trend")
+
+# Mismos cortes que SCORE_RANGES (NULL cae en el último rango)
+SCORE_BUCKET_SQL = """CASE
+            WHEN {score} >= 90 THEN 0
+            WHEN {score} >= 85 THEN 1
+            WHEN {score} >= 80 THEN 2
+            WHEN {score} >= 70 THEN 3
+            WHEN {score} >= 60 THEN 4
+            ELSE 5
+        END"""
+
+# Aportación de una fila ({row} = prefijo NEW./OLD. o vacío) con la semántica de las consultas originales
+ROLLUP_SUMS = (
+    ("signals", "1"),
+    ("wins", "CASE WHEN {row}result LIKE 'WIN%' THEN 1 ELSE 0 END"),
+    ("losses", "CASE WHEN {row}result LIKE 'LOSS%' THEN 1 ELSE 0 END"),
+    ("expired", "CASE WHEN {row}result = 'EXPIRED' THEN 1 ELSE 0 END"),
+    ("pending", "CASE WHEN {row}result IS NULL OR {row}result = 'None' OR {row}result = '' THEN 1 ELSE 0 END"),
+    ("return_sum", "COALESCE({row}actual_return, 0)"),
+    ("return_count", "{row}actual_return IS NOT NULL"),
+    ("win_return_sum", "CASE WHEN {row}result LIKE 'WIN%' THEN COALESCE({row}actual_return, 0) ELSE 0 END"),
+    ("loss_return_sum", "CASE WHEN {row}result LIKE 'LOSS%' THEN COALESCE({row}actual_return, 0) ELSE 0 END"),
+    ("score_sum", "COALESCE({row}score, 0)"),
+    ("score_count", "{row}score IS NOT NULL"),
+    ("time_sum", "COALESCE({row}time_to_resolution, 0)"),
+    ("time_count", "{row}time_to_resolution IS NOT NULL"),
+    ("atr_sum", "COALESCE({row}atr, 0)"),
+    ("atr_count", "{row}atr IS NOT NULL"),
+    ("candle_sum", "CASE WHEN {row}atr IS NOT NULL THEN COALESCE(ABS({row}candle_change), 0) ELSE 0 END"),
+    ("candle_count", "{row}atr IS NOT NULL AND {row}candle_change IS NOT NULL")
+)
+# Extremos (no se pueden restar: se recalculan del tramo solo si la fila borrada era el extremo)
+ROLLUP_EXTREMES = (
+    ("return_max", "MAX", "{row}actual_return"),
+    ("return_min", "MIN", "{row}actual_return"),
+    ("atr_max", "MAX", "{row}atr")
+)
+ROLLUP_METRICS = tuple(name for name, _ in ROLLUP_SUMS) + tuple(name for name, _, _ in ROLLUP_EXTREMES)
+
+ROLLUP_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS signal_rollups (
+        day INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        symbol TEXT NOT NULL,
+        signal_type TEXT NOT NULL,
+        score_bucket INTEGER NOT NULL,
+        trend TEXT NOT NULL,
+        signals INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        losses INTEGER NOT NULL,
+        expired INTEGER NOT NULL,
+        pending INTEGER NOT NULL,
+        return_sum REAL NOT NULL,
+        return_count INTEGER NOT NULL,
+        win_return_sum REAL NOT NULL,
+        loss_return_sum REAL NOT NULL,
+        score_sum REAL NOT NULL,
+        score_count INTEGER NOT NULL,
+        time_sum REAL NOT NULL,
+        time_count INTEGER NOT NULL,
+        atr_sum REAL NOT NULL,
+        atr_count INTEGER NOT NULL,
+        candle_sum REAL NOT NULL,
+        candle_count INTEGER NOT NULL,
+        return_max REAL,
+        return_min REAL,
+        atr_max REAL,
+        PRIMARY KEY (day, hour, symbol, signal_type, score_bucket, trend)
+    )
+'''
+
+ROLLUP_DAYS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS signal_rollup_days (
+        day INTEGER PRIMARY KEY,
+        revision INTEGER NOT NULL
+    )
+'''
+
+def _key_values(row: str) -> Tuple[str, ...]:
+    """Expresiones de la clave de rollup de una fila de signals"""
+    return (f"{row}ts / 86400", f"({row}ts / 3600) % 24", f"{row}symbol", f"{row}signal_type",
+            SCORE_BUCKET_SQL.format(score=f"{row}score"), f"COALESCE({row}market_trend, 'SIDEWAYS')")
+
+# Agregado desde signals (reconstrucción completa y hora parcial del borde de la ventana)
+ROLLUP_SELECT_SQL = """
+    SELECT {}
+    FROM signals
+    WHERE {{}}
+    GROUP BY {}
+""".format(
+    ",\n        ".join(
+        [f"{value} AS {name}" for name, value in zip(ROLLUP_KEYS, _key_values(""))]
+        + [f"SUM({expr.format(row='')})" for _, expr in ROLLUP_SUMS]
+        + [f"{func}({expr.format(row='')})" for _, func, expr in ROLLUP_EXTREMES]
+    ),
+    ", ".join(ROLLUP_KEYS)
+)
+
+ROLLUP_INSERT_SQL = "INSERT INTO signal_rollups ({})".format(", ".join(ROLLUP_KEYS + ROLLUP_METRICS))
+
+def _touch_day_sql(row: str) -> str:
+    """Sentencia de trigger que cambia la revisión del día de la fila NEW/OLD"""
+    return f"""
+        INSERT INTO signal_rollup_days (day, revision)
+        SELECT {row}ts / 86400, random()
+        WHERE {row}ts IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET revision = excluded.revision;
+    """
+
+def _add_row_sql(row: str) -> str:
+    """Sentencias de trigger que suman la fila NEW/OLD a su rollup"""
+    updates = [f"{name} = {name} + excluded.{name}" for name, _ in ROLLUP_SUMS]
+    for name, func, _ in ROLLUP_EXTREMES:
+        keep = ">=" if func == "MAX" else "<="
+        updates.append(f"{name} = CASE WHEN excluded.{name} IS NULL OR {name} {keep} excluded.{name} "
+                       f"THEN {name} ELSE excluded.{name} END")
+    return """
+        {insert}
+        SELECT {values}
+        WHERE {row}ts IS NOT NULL
+        ON CONFLICT ({keys}) DO UPDATE SET {updates};
+        {touch}
+    """.format(touch=_touch_day_sql(row),
+        insert=ROLLUP_INSERT_SQL, row=row, keys=", ".join(ROLLUP_KEYS), updates=", ".join(updates),
+        values=", ".join(list(_key_values(row)) + [expr.format(row=row) for _, expr in ROLLUP_SUMS]
+                         + [expr.format(row=row) for _, _, expr in ROLLUP_EXTREMES])
+    )
+
+def _remove_row_sql(row: str) -> str:
+    """Sentencias de trigger que restan la fila NEW/OLD de su rollup"""
+    rollup_match = " AND ".join(f"{name} = {value}" for name, value in zip(ROLLUP_KEYS, _key_values(row)))
+    hour_start = f"({row}ts / 3600) * 3600"
+    slice_match = " AND ".join(
+        [f"symbol = {row}symbol", f"ts >= {hour_start}", f"ts < {hour_start} + 3600"]
+        + [f"{value} = {row_value}" for value, row_value in list(zip(_key_values(""), _key_values(row)))[3:]]
+    )
+    subtract = ", ".join(f"{name} = {name} - ({expr.format(row=row)})" for name, expr in ROLLUP_SUMS)
+    recompute = ", ".join(f"{name} = (SELECT {func}({expr.format(row='')}) FROM signals WHERE {slice_match})"
+                          for name, func, expr in ROLLUP_EXTREMES)
+    was_extreme = " OR ".join(f"{expr.format(row=row)} = {name}" for name, _, expr in ROLLUP_EXTREMES)
+    return f"""
+        UPDATE signal_rollups SET {subtract} WHERE {rollup_match};
+        UPDATE signal_rollups SET {recompute} WHERE {rollup_match} AND ({was_extreme});
+        DELETE FROM signal_rollups WHERE {rollup_match} AND signals <= 0;
+        {_touch_day_sql(row)}
+    """
+
+ROLLUP_TRIGGERS_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS signals_rollup_insert AFTER INSERT ON signals BEGIN {} END".format(
+        _add_row_sql("NEW.")),
+    """CREATE TRIGGER IF NOT EXISTS signals_rollup_update
+    AFTER UPDATE OF ts, symbol, signal_type, score, market_trend, result, actual_return,
+                    time_to_resolution, atr, candle_change ON signals
+    BEGIN {} {} END""".format(_remove_row_sql("OLD."), _add_row_sql("NEW.")),
+    "CREATE TRIGGER IF NOT EXISTS signals_rollup_delete AFTER DELETE ON signals BEGIN {} END".format(
+        _remove_row_sql("OLD."))
+)
+
+def init_rollups(cursor):
+    """Crea la tabla de rollups y sus triggers; la reconstruye si es nueva o no cuadra con signals"""
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'signal_rollups'")
+    exists = cursor.fetchone()[0] > 0
+
+    cursor.execute(ROLLUP_TABLE_SQL)
+    cursor.execute(ROLLUP_DAYS_TABLE_SQL)
+    for trigger_sql in ROLLUP_TRIGGERS_SQL:
+        cursor.execute(trigger_sql)
+
+    if exists:
+        cursor.execute("SELECT COALESCE(SUM(signals), 0) FROM signal_rollups")
+        materialized = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM signals WHERE ts IS NOT NULL")
+        if materialized == cursor.fetchone()[0]:
+            return
+    rebuild_rollups(cursor)
+
+def rebuild_rollups(cursor):
+    """Reconstruye todos los rollups desde la tabla signals"""
+    cursor.execute("DELETE FROM signal_rollups")
+    cursor.execute(ROLLUP_INSERT_SQL + ROLLUP_SELECT_SQL.format("ts IS NOT NULL"))
+    cursor.execute("DELETE FROM signal_rollup_days")
+    cursor.execute("INSERT INTO signal_rollup_days (day, revision) "
+                   "SELECT day, random() FROM (SELECT DISTINCT day FROM signal_rollups)")
+    logger.info("📊 Rollups de estadísticas reconstruidos")
+
+def _rollup_arrays(rows: List[Tuple]) -> Dict[str, np.ndarray]:
+    """Filas de rollup como arrays por columna"""
+    columns = list(zip(*rows)) if rows else [()] * len(ROLLUP_KEYS + ROLLUP_METRICS)
+    data = {}
+    for name, values in zip(ROLLUP_KEYS + ROLLUP_METRICS, columns):
+        if name in ROLLUP_TEXT_KEYS:
+            data[name] = np.array(values, dtype=object)
+        elif name in ROLLUP_KEYS:
+            data[name] = np.array(values, dtype=np.int64)
+        else:
+            data[name] = np.array(values, dtype=float)  # Extremos sin valores (NULL) -> NaN
+    return data
+
+class RollupStore:
+    """Caché en memoria (por base de datos) de los rollups y resultados de cada día
+
+    Cada consulta lee las revisiones de los días de la ventana (pocas filas) y solo
+    vuelve a pedir a SQLite los días nuevos o modificados; el resto sale de memoria.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}  # db_path -> {día: (revisión, rollups, resultados)}
+
+    def _load_day(self, cursor, day: int) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Rollups y resultados (más reciente primero) de un día"""
+        cursor.execute("SELECT {} FROM signal_rollups WHERE day = ?".format(
+            ", ".join(ROLLUP_KEYS + ROLLUP_METRICS)), (day,))
+        rollups = _rollup_arrays(cursor.fetchall())
+
+        # Para rachas solo enteros: índice en STREAK_SYMBOLS (-1 si es otro) y categoría (1 WIN, -1 LOSS, 0 otro)
+        symbol_index = " ".join(f"WHEN '{symbol}' THEN {i}" for i, symbol in enumerate(STREAK_SYMBOLS))
+        cursor.execute(f'''
+            SELECT ts, id, CASE symbol {symbol_index} ELSE -1 END,
+                   CASE WHEN instr(result, 'WIN') > 0 THEN 1 WHEN instr(result, 'LOSS') > 0 THEN -1 ELSE 0 END
+            FROM signals
+            WHERE result IS NOT NULL AND result != 'None'
+            AND ts >= ? AND ts < ?
+            ORDER BY ts DESC, id DESC
+        ''', (day * 86400, (day + 1) * 86400))
+        rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 4)
+        results = {'ts': rows[:, 0], 'id': rows[:, 1], 'symbol_index': rows[:, 2], 'category': rows[:, 3]}
+        return rollups, results
+
+    def load(self, cursor, db_path: str, cutoff: int) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Rollups y resultados de la ventana ts > cutoff
+
+        Las horas completas salen de los rollups; la hora del borde de la ventana se
+        agrega al vuelo desde signals con el mismo SELECT, así el resultado es exacto.
+        """
+        key = os.path.abspath(db_path)
+        cursor.execute("SELECT day, revision FROM signal_rollup_days WHERE day >= ?", (cutoff // 86400,))
+        revisions = dict(cursor.fetchall())
+
+        with self._lock:
+            cached = self._days.get(key, {})
+        days = {}
+        for day, revision in revisions.items():
+            entry = cached.get(day)
+            if entry is None or entry[0] != revision:
+                entry = (revision,) + self._load_day(cursor, day)
+            days[day] = entry
+        with self._lock:
+            self._days[key] = days  # Solo se conservan los días de la última ventana consultada
+
+        ordered = [days[day] for day in sorted(days, reverse=True)]
+        boundary_hour = cutoff // 3600
+
+        # Rollups: horas completas de la ventana + hora parcial del borde
+        cursor.execute(ROLLUP_SELECT_SQL.format("ts > ? AND ts < ?"), (cutoff, (boundary_hour + 1) * 3600))
+        boundary = _rollup_arrays(cursor.fetchall())
+        rollups = {name: np.concatenate([entry[1][name] for entry in ordered] + [column[:0]])
+                   for name, column in boundary.items()}
+        complete = rollups["day"] * 24 + rollups["hour"] > boundary_hour
+        rollups = {name: np.concatenate((column[complete], boundary[name])) for name, column in rollups.items()}
+
+        # Resultados en el orden de calculate_streaks (más reciente primero)
+        results = {name: np.concatenate([entry[2][name] for entry in ordered] + [np.zeros(0, dtype=np.int64)])
+                   for name in ('ts', 'id', 'symbol_index', 'category')}
+        results = {name: column[results['ts'] > cutoff] for name, column in results.items()}
+
+        # Timestamp de la señal con resultado más reciente de cada símbolo con rachas
+        latest = {}
+        for i, symbol in enumerate(STREAK_SYMBOLS):
+            positions = np.flatnonzero(results['symbol_index'] == i)
+            if len(positions):
+                latest[symbol] = int(results['id'][positions[0]])
+        last_times = {}
+        if latest:
+            cursor.execute("SELECT id, timestamp FROM signals WHERE id IN ({})".format(", ".join("?" * len(latest))),
+                           list(latest.values()))
+            times_by_id = dict(cursor.fetchall())
+            last_times = {symbol: times_by_id.get(signal_id) for symbol, signal_id in latest.items()}
+
+        streaks = {'symbol_index': results['symbol_index'], 'category': results['category'], 'last_times': last_times}
+        return rollups, streaks
+
+# Instancia global
+rollup_store = RollupStore()
+
+# === AGREGACIÓN ===
+
+def encode(values: np.ndarray) -> Tuple[List, np.ndarray]:
+    """Codifica una columna de texto: (etiquetas ordenadas, código por fila)"""
+    if len(values) == 0:
+        return [], np.zeros(0, dtype=np.int64)
+    labels, codes = np.unique(values.astype(str), return_inverse=True)
+    return labels.tolist(), codes.reshape(-1).astype(np.int64)
+
+def _value(value: float, default=0):
+    """NULL de SQL (NaN) -> default, igual que 'valor or 0'"""
+    return default if np.isnan(value) else float(value)
+
+def _rate(part, total) -> float:
+    return (part / total * 100) if total > 0 else 0
+
+def _ratio(total: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """AVG a partir de suma y número de valores no NULL (NaN si no hay ninguno)"""
+    return np.divide(total, count, out=np.full(len(total), np.nan), where=count > 0)
+
+class Groups:
+    """GROUP BY sobre códigos enteros de filas de rollup: SUM con bincount y MAX/MIN ignorando NULL (NaN)"""
+
+    def __init__(self, *code_arrays: np.ndarray, sizes: Tuple[int, ...]):
+        combined = np.ravel_multi_index(code_arrays, sizes) if len(code_arrays) > 1 else code_arrays[0]
+        self.keys, codes = np.unique(combined, return_inverse=True)
+        self.codes = codes.reshape(-1)
+        self.sizes = sizes
+        self.size = len(self.keys)
+
+    def key_tuples(self) -> List[Tuple[int, ...]]:
+        """Códigos de cada grupo en orden ascendente (como GROUP BY)"""
+        if len(self.sizes) == 1:
+            return [(int(k),) for k in self.keys]
+        return list(zip(*(c.tolist() for c in np.unravel_index(self.keys, self.sizes))))
+
+    def sum(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self.codes, weights=values, minlength=self.size)
+
+    def max(self, values: np.ndarray) -> np.ndarray:
+        out = np.full(self.size, np.nan)
+        np.fmax.at(out, self.codes, values)
+        return out
+
+    def min(self, values: np.ndarray) -> np.ndarray:
+        out = np.full(self.size, np.nan)
+        np.fmin.at(out, self.codes, values)
+        return out
+
+    def aggregate(self, rollups: Dict[str, np.ndarray]):
+        """Agregados comunes a todos los desgloses, una fila por grupo"""
+        counts = {
+            'count': self.sum(rollups["signals"]),
+            'wins': self.sum(rollups["wins"]),
+            'losses': self.sum(rollups["losses"]),
+            'expired': self.sum(rollups["expired"]),
+            'pending': self.sum(rollups["pending"])
+        }
+        values = {
+            'avg_return': _ratio(self.sum(rollups["return_sum"]), self.sum(rollups["return_count"])),
+            'avg_score': _ratio(self.sum(rollups["score_sum"]), self.sum(rollups["score_count"])),
+            'best_return': self.max(rollups["return_max"]),
+            'worst_return': self.min(rollups["return_min"])
+        }
+        for i, key in enumerate(self.key_tuples()):
+            row = {name: int(round(column[i])) for name, column in counts.items()}
+            row.update({name: _value(column[i]) for name, column in values.items()})
+            yield key, row
+
+def streak_stats(categories: np.ndarray) -> Tuple[int, int, int]:
+    """Rachas a partir de categorías (1 WIN, -1 LOSS, 0 otro) en el orden de calculate_streaks
+
+    Cualquier resultado distinto rompe la racha; la racha actual es la del último
+    WIN/LOSS recorrido (la señal más antigua de la ventana).
+    """
+    if len(categories) == 0:
+        return 0, 0, 0
+
+    starts = np.flatnonzero(np.concatenate(([True], categories[1:] != categories[:-1])))
+    lengths = np.diff(np.append(starts, len(categories)))
+    values = categories[starts]
+
+    max_win = int(lengths[values == 1].max()) if np.any(values == 1) else 0
+    max_loss = int(lengths[values == -1].max()) if np.any(values == -1) else 0
+
+    decided = np.flatnonzero(values != 0)
+    current = int(values[decided[-1]] * lengths[decided[-1]]) if len(decided) else 0
+    return current, max_win, max_loss
+
+def compute_performance_stats(rollups: Dict[str, np.ndarray], streaks: Dict) -> Dict:
+    """Todas las estadísticas de get_performance_stats sumando los rollups de la ventana"""
+    symbol_labels, symbol_codes = encode(rollups["symbol"])
+    trend_labels, trend_codes = encode(rollups["trend"])
+    type_labels, type_codes = encode(rollups["signal_type"])
+    buckets = rollups["score_bucket"]
+
+    # Estadísticas básicas
+    win_count = int(rollups["wins"].sum())
+    loss_count = int(rollups["losses"].sum())
+    return_count = rollups["return_count"].sum()
+    score_count = rollups["score_count"].sum()
+    time_count = rollups["time_count"].sum()
+    total_profit = float(rollups["win_return_sum"].sum())
+    total_loss = float(rollups["loss_return_sum"].sum())
+
+    # Por rango de score (orden de presentación = orden de los códigos)
+    groups = Groups(buckets, sizes=(len(SCORE_RANGES),))
+    score_breakdown = [{
+        'range': SCORE_RANGES[key[0]][1], 'count': row['count'], 'wins': row['wins'],
+        'win_rate': _rate(row['wins'], row['count']), 'avg_return': row['avg_return'],
+        'best_return': row['best_return'], 'worst_return': row['worst_return']
+    } for key, row in groups.aggregate(rollups)]
+
+    # Por símbolo (más señales primero)
+    symbol_sizes = (max(len(symbol_labels), 1),)
+    groups = Groups(symbol_codes, sizes=symbol_sizes)
+    symbol_breakdown = sorted(({
+        'symbol': symbol_labels[key[0]], 'count': row['count'], 'wins': row['wins'], 'losses': row['losses'],
+        'expired': row['expired'], 'pending': row['pending'],
+        'win_rate': _rate(row['wins'], row['wins'] + row['losses']),
+        'avg_return': row['avg_return'], 'avg_score': row['avg_score']
+    } for key, row in groups.aggregate(rollups)), key=lambda row: -row['count'])
+
+    # Por hora UTC (solo horas con al menos 2 señales, más señales primero)
+    groups = Groups(rollups["hour"], sizes=(24,))
+    hourly_breakdown = sorted(({
+        'hour': f"{key[0]:02d}:00", 'count': row['count'], 'wins': row['wins'],
+        'win_rate': _rate(row['wins'], row['count']),
+        'avg_return': row['avg_return'], 'avg_score': row['avg_score']
+    } for key, row in groups.aggregate(rollups) if row['count'] >= 2), key=lambda row: -row['count'])
+
+    # Por tendencia de mercado y tipo de señal
+    trend_sizes = (max(len(trend_labels), 1), max(len(type_labels), 1))
+    groups = Groups(trend_codes, type_codes, sizes=trend_sizes)
+    trend_breakdown = [{
+        'trend': trend_labels[key[0]], 'signal_type': type_labels[key[1]], 'count': row['count'],
+        'wins': row['wins'], 'win_rate': _rate(row['wins'], row['count']),
+        'avg_return': row['avg_return'], 'avg_score': row['avg_score'],
+        'best_return': row['best_return'], 'worst_return': row['worst_return']
+    } for key, row in groups.aggregate(rollups)]
+
+    # Score por tendencia (solo score ≥80)
+    high = buckets < len(TREND_SCORE_RANGES)
+    groups = Groups(trend_codes[high], buckets[high], sizes=(trend_sizes[0], len(TREND_SCORE_RANGES)))
+    score_by_trend_breakdown = [{
+        'trend': trend_labels[key[0]], 'score_range': TREND_SCORE_RANGES[key[1]][1], 'count': row['count'],
+        'wins': row['wins'], 'win_rate': _rate(row['wins'], row['count']),
+        'avg_return': row['avg_return'], 'avg_score': row['avg_score']
+    } for key, row in groups.aggregate({name: column[high] for name, column in rollups.items()})]
+
+    # Volatilidad por símbolo (ATR como proxy, solo señales con ATR)
+    groups = Groups(symbol_codes, sizes=symbol_sizes)
+    atr_counts = groups.sum(rollups["atr_count"])
+    avg_atr = _ratio(groups.sum(rollups["atr_sum"]), atr_counts)
+    max_atr = groups.max(rollups["atr_max"])
+    avg_candle = _ratio(groups.sum(rollups["candle_sum"]), groups.sum(rollups["candle_count"]))
+    volatility_breakdown = [{
+        'symbol': symbol_labels[key[0]],
+        'avg_atr': _value(avg_atr[i]),
+        'max_atr': _value(max_atr[i]),
+        'avg_candle_volatility': _value(avg_candle[i]),
+        'count': int(round(atr_counts[i]))
+    } for i, key in enumerate(groups.key_tuples()) if atr_counts[i] > 0]
+
+    # Rachas (señales con resultado, de la más reciente a la más antigua)
+    current_streak, max_win_streak, max_loss_streak = streak_stats(streaks['category'])
+    symbol_streaks = {}
+    for i, symbol in enumerate(STREAK_SYMBOLS):
+        mask = streaks['symbol_index'] == i
+        if np.any(mask):
+            current, max_win, max_loss = streak_stats(streaks['category'][mask])
+            symbol_streaks[symbol] = {
+                'current_streak': current,
+                'max_win_streak': max_win,
+                'max_loss_streak': max_loss,
+                'last_signal_time': streaks['last_times'].get(symbol)
+            }
+
+    return {
+        'total_signals': int(rollups["signals"].sum()),
+        'wins': win_count,
+        'losses': loss_count,
+        'expired': int(rollups["expired"].sum()),
+        'pending': int(rollups["pending"].sum()),
+        'win_rate': _rate(win_count, win_count + loss_count),
+        'avg_return': float(rollups["return_sum"].sum() / return_count) if return_count else 0,
+        'avg_score': float(rollups["score_sum"].sum() / score_count) if score_count else 0,
+        'avg_time_minutes': float(rollups["time_sum"].sum() / time_count) if time_count else 0,
+        'best_return': float(np.nanmax(rollups["return_max"])) if return_count else 0,
+        'worst_return': float(np.nanmin(rollups["return_min"])) if return_count else 0,
+        'total_profit': total_profit,
+        'total_loss': total_loss,
+        'net_profit': total_profit + total_loss,
+        'score_breakdown': score_breakdown,
+        'symbol_breakdown': symbol_breakdown,
+        'hourly_breakdown': hourly_breakdown,
+        'trend_breakdown': trend_breakdown,
+        'score_by_trend_breakdown': score_by_trend_breakdown,
+        'volatility_breakdown': volatility_breakdown,
+        'streak_analysis': {
+            'current_streak': current_streak,
+            'max_win_streak': max_win_streak,
+            'max_loss_streak': max_loss_streak,
+            'streak_status': 'WIN' if current_streak > 0 else 'LOSS' if current_streak < 0 else 'NEUTRAL'
+        },
+        'symbol_streaks': symbol_streaks
+    }
@@ -4,9 +4,9 @@ Script de prueba para verificar que el bot funciona correctamente
 """
 import os
 import sys
-import requests
 import time
 from config import Config
+from http_client import http_get
 
 def test_configuration():
     """Prueba la configuración del bot"""
@@ -53,7 +53,7 @@ def test_binance_connection():
             'limit': 5
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -3,7 +3,8 @@ import logging
 import time
 import numpy as np
 from datetime import datetime
-from email_service import send_signal_email
+from email_service import join_signal_digest, open_signal_digest, close_signal_digest
+from notifier import notify_signal, end_notification_cycle
 from indicators import calculate_price_targets
 
 # Importar tracker de rendimiento y optimizador adaptativo
@@ -31,6 +32,10 @@ class TradingLogic:
         self.daily_email_count = 0
         self.last_email_date = None
         self.max_daily_emails = 10  # Máximo 10 emails por día
+        self.clock = time.time      # Reloj de las señales (el backtester usa el tiempo de las velas)
+
+        # Criterios principales requeridos: en tendencia favorable (BUY en BULLISH / SELL en BEARISH) o en otras
+        self.required_criteria = {"buy_trend": 5, "sell_trend": 4, "default": 6}
     
     def validate_breakout_candle(self, data, signal_type):
         """Valida que la vela de ruptura tenga características fuertes"""
@@ -76,7 +81,7 @@ class TradingLogic:
         last_type = last_signal.get("type", "")
 
         # Cooldown inteligente basado en calidad de señal
-        time_diff = time.time() - last_time
+        time_diff = self.clock() - last_time
 
         if score >= 95:  # SEÑALES PREMIUM (95-100)
             cooldown = 300   # 5 minutos - Oportunidades de oro
@@ -102,8 +107,8 @@ class TradingLogic:
         self.last_signals[symbol] = {
             "type": signal_type,
             "price": price,
-            "time": time.time(),
-            "timestamp": datetime.now().isoformat()
+            "time": self.clock(),
+            "timestamp": datetime.fromtimestamp(self.clock()).isoformat()
         }
     
     def detect_market_trend(self, symbol, timeframe_data):
@@ -220,9 +225,9 @@ class TradingLogic:
 
         # Requerimientos BUY adaptativos por tendencia
         if market_trend == "BULLISH":
-            required_main = 5  # Menos estricto en mercado favorable
+            required_main = self.required_criteria["buy_trend"]  # Menos estricto en mercado favorable
         else:
-            required_main = 6  # Más estricto en otros mercados
+            required_main = self.required_criteria["default"]  # Más estricto en otros mercados
 
         main_valid = main_fulfilled >= required_main
 
@@ -273,9 +278,9 @@ class TradingLogic:
 
         # Requerimientos SELL adaptativos por tendencia
         if market_trend == "BEARISH":
-            required_main = 4  # Menos estricto en mercado bajista (66.7% WR histórico)
+            required_main = self.required_criteria["sell_trend"]  # Menos estricto en mercado bajista (66.7% WR histórico)
         else:
-            required_main = 6  # Más estricto en otros mercados
+            required_main = self.required_criteria["default"]  # Más estricto en otros mercados
 
         main_valid = main_fulfilled >= required_main
 
@@ -326,8 +331,9 @@ class TradingLogic:
                     logger.info(f"📊 Señal registrada pero NO enviada por email - {signal_type.upper()} en {market_trend} (Score: {data['score']}) no cumple criterios premium")
                     send_email = False
 
-                # Verificar límite diario solo si la señal fue aprobada
-                if email_approved and not self.check_daily_email_limit():
+                # Verificar límite diario solo si la señal fue aprobada (sumarse a un resumen abierto no gasta email)
+                digest_group = join_signal_digest() if email_approved else None
+                if email_approved and digest_group is None and not self.check_daily_email_limit():
                     logger.warning(f"📧 Límite diario de emails alcanzado ({self.max_daily_emails})")
                     send_email = False
                 elif not email_approved:
@@ -339,18 +345,29 @@ class TradingLogic:
             )
             logger.info(f"🎯 Price targets para {symbol}: {price_targets}")
             
-            # Enviar email solo si send_email=True
+            # Notificar solo si send_email=True: un evento para todos los canales (email, webhook, fichero), sin esperar
             if send_email:
-                email_sent = send_signal_email(
-                    signal_type, symbol, data["price"], data["rsi_1m"], data["rsi_15m"],
-                    data["ema_fast"], data["ema_slow"], data["volume"], data["vol_avg"],
-                    data["score"], data["atr"], data["candle_change_percent"],
-                    conditions, price_targets
+                opens_email = digest_group is None
+                if opens_email:
+                    digest_group = open_signal_digest()  # None sin EMAIL_DIGEST: un email por señal
+                delivered = notify_signal(
+                    signal_type=signal_type, symbol=symbol, price=data["price"], rsi=data["rsi_1m"],
+                    rsi_15m=data["rsi_15m"], ema_fast=data["ema_fast"], ema_slow=data["ema_slow"],
+                    volume=data["volume"], vol_avg=data["vol_avg"], confidence_score=data["score"],
+                    atr_val=data["atr"], candle_change_percent=data["candle_change_percent"],
+                    conditions=conditions, price_targets=price_targets, digest_group=digest_group
                 )
+                # El límite diario solo cuenta emails; sin canal smtp basta con que lo acepte algún canal
+                email_sent = delivered.get("smtp", False)
+                published = email_sent if "smtp" in delivered else any(delivered.values())
+
+                if opens_email and not email_sent and digest_group is not None:
+                    close_signal_digest(digest_group)  # Nadie la recibió: la próxima señal abre su propio email
 
-                if email_sent:
+                if published:
                     self.signal_count += 1
-                    self.daily_email_count += 1  # Incrementar contador diario
+                    if email_sent and opens_email:
+                        self.daily_email_count += 1  # Incrementar contador diario
                     self.update_signal_tracking(symbol, signal_type, data["price"])
 
                     # Registrar en performance tracker
@@ -362,10 +379,10 @@ class TradingLogic:
                     market_data[symbol]["last_signal_price"] = data["price"]
                     market_data[symbol]["last_signal_time"] = time.time()
 
-                    logger.info(f"✅ Señal {signal_type.upper()} enviada por EMAIL para {symbol}")
+                    logger.info(f"✅ Señal {signal_type.upper()} publicada en los canales de notificación para {symbol}")
                     return True
                 else:
-                    logger.error(f"❌ Error enviando señal {signal_type} para {symbol}")
+                    logger.error(f"❌ Señal {signal_type} para {symbol} no aceptada por los canales de notificación: {delivered}")
                     return False
             else:
                 # Solo logging, sin email
@@ -434,6 +451,10 @@ class TradingLogic:
                 
             except Exception as e:
                 logger.error(f"❌ Error analizando señales para {symbol}: {e}")
+
+        # Fin del ciclo para los canales (resumen de señales en un solo email con EMAIL_DIGEST)
+        close_signal_digest()
+        end_notification_cycle()
         
         if signals_sent > 0:
             logger.info(f"📧 {signals_sent} señales enviadas en este ciclo")
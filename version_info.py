@@ -1,23 +1,31 @@
 # version_info.py - Sistema de versiones automático basado en Git
+import json
 import subprocess
 import os
+import sys
+import threading
 from datetime import datetime
 
-def get_git_version():
-    """Obtiene información de versión desde Git"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Versión horneada en el build para entornos sin git (python version_info.py --write)
+VERSION_FILE = os.path.join(BASE_DIR, "version.json")
+
+def read_git_version():
+    """Lee la información de versión desde Git (lanza subprocesos; None si Git no está disponible)"""
     try:
         # Obtener hash del commit actual (corto)
         commit_hash = subprocess.check_output(
             ['git', 'rev-parse', '--short', 'HEAD'], 
             stderr=subprocess.DEVNULL,
-            cwd=os.path.dirname(os.path.abspath(__file__))
+            cwd=BASE_DIR
         ).decode('utf-8').strip()
         
         # Obtener fecha del último commit
         commit_date = subprocess.check_output(
             ['git', 'log', '-1', '--format=%cd', '--date=short'], 
             stderr=subprocess.DEVNULL,
-            cwd=os.path.dirname(os.path.abspath(__file__))
+            cwd=BASE_DIR
         ).decode('utf-8').strip()
         
         # Verificar si hay cambios sin commit
@@ -25,7 +33,7 @@ def get_git_version():
             subprocess.check_output(
                 ['git', 'diff-index', '--quiet', 'HEAD', '--'], 
                 stderr=subprocess.DEVNULL,
-                cwd=os.path.dirname(os.path.abspath(__file__))
+                cwd=BASE_DIR
             )
             dirty = False
         except subprocess.CalledProcessError:
@@ -36,7 +44,7 @@ def get_git_version():
             branch = subprocess.check_output(
                 ['git', 'rev-parse', '--abbrev-ref', 'HEAD'], 
                 stderr=subprocess.DEVNULL,
-                cwd=os.path.dirname(os.path.abspath(__file__))
+                cwd=BASE_DIR
             ).decode('utf-8').strip()
         except:
             branch = "unknown"
@@ -55,25 +63,17 @@ def get_git_version():
             'full_info': f"{version} ({commit_date})"
         }
         
-    except Exception as e:
-        # Fallback si Git no está disponible
-        return {
-            'version': 'v5.0-unknown',
-            'commit': 'unknown',
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'branch': 'unknown',
-            'dirty': False,
-            'full_info': f"v5.0-unknown ({datetime.now().strftime('%Y-%m-%d')})"
-        }
+    except Exception:
+        return None
 
-def get_build_info():
-    """Obtiene información adicional del build"""
+def read_build_info():
+    """Lee la información adicional del build desde Git"""
     try:
         # Obtener número total de commits
         commit_count = subprocess.check_output(
             ['git', 'rev-list', '--count', 'HEAD'], 
             stderr=subprocess.DEVNULL,
-            cwd=os.path.dirname(os.path.abspath(__file__))
+            cwd=BASE_DIR
         ).decode('utf-8').strip()
         
         return {
@@ -81,23 +81,93 @@ def get_build_info():
             'build_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
     except:
-        return {
-            'build_number': 'unknown',
-            'build_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        return unknown_build_info()
+
+def unknown_build_info():
+    """Build sin número (sin Git ni versión horneada)"""
+    return {
+        'build_number': 'unknown',
+        'build_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def read_version_file(path: str = VERSION_FILE):
+    """Versión horneada en el build (None si no existe o está corrupta)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            info = json.load(f)
+        return {'git': info['git'], 'build': info['build']}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def resolve_version_info():
+    """Resuelve la versión: Git si está disponible, si no el fichero horneado, si no 'unknown'"""
+    git_info = read_git_version()
+    if git_info:
+        return {'git': git_info, 'build': read_build_info()}
+
+    baked = read_version_file()
+    if baked:
+        return baked
+
+    # Fallback si Git no está disponible y no hay versión horneada
+    today = datetime.now().strftime('%Y-%m-%d')
+    return {
+        'git': {
+            'version': 'v5.0-unknown',
+            'commit': 'unknown',
+            'date': today,
+            'branch': 'unknown',
+            'dirty': False,
+            'full_info': f"v5.0-unknown ({today})"
+        },
+        'build': unknown_build_info()  # Sin Git: no tiene sentido lanzar otro subproceso
+    }
+
+def write_version_file(path: str = VERSION_FILE) -> bool:
+    """Hornea la versión actual de Git en path para desplegar sin git"""
+    git_info = read_git_version()
+    if not git_info:
+        return False
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'git': git_info, 'build': read_build_info()}, f, indent=2)
+    return True
+
+_version_info = None
+_version_lock = threading.Lock()
+
+def get_version_info():
+    """Versión, build y badge resueltos una sola vez por proceso y servidos desde memoria"""
+    global _version_info
+    if _version_info is None:
+        with _version_lock:
+            if _version_info is None:
+                info = resolve_version_info()
+                info['badge'] = render_version_badge(info['git'], info['build'])
+                _version_info = info
+    return _version_info
+
+def get_git_version():
+    """Obtiene información de versión (Git o fichero horneado)"""
+    return dict(get_version_info()['git'])
+
+def get_build_info():
+    """Obtiene información adicional del build"""
+    return dict(get_version_info()['build'])
 
 def get_version_string():
     """Retorna string de versión completo para mostrar"""
-    git_info = get_git_version()
-    build_info = get_build_info()
-    
+    git_info = get_version_info()['git']
+    build_info = get_version_info()['build']
+
     return f"{git_info['version']} (build #{build_info['build_number']})"
 
 def get_version_badge():
-    """Retorna HTML para badge de versión"""
-    git_info = get_git_version()
-    build_info = get_build_info()
-    
+    """Retorna HTML para badge de versión (renderizado una sola vez)"""
+    return get_version_info()['badge']
+
+def render_version_badge(git_info, build_info):
+    """HTML del badge de versión para git_info y build_info"""
     # Color del badge según estado
     if git_info['dirty']:
         badge_color = '#f59e0b'  # Amarillo para cambios sin commit
@@ -131,3 +201,12 @@ def get_version_badge():
         {status_icon} {git_info['version']}
     </div>
     """
+
+if __name__ == "__main__":
+    # python version_info.py --write: hornear version.json durante el build (donde sí hay git)
+    if "--write" in sys.argv[1:]:
+        if not write_version_file():
+            print("❌ Git no disponible: no se pudo generar version.json")
+            sys.exit(1)
+        print(f"✅ {VERSION_FILE} generado")
+    print(get_version_string())